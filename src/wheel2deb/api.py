@@ -0,0 +1,168 @@
+"""
+Library API, to embed wheel2deb in a long-running process.
+
+Unlike commands, functions of this module never exit the process, and
+return a result per wheel or source package instead of log counters.
+Jobs run one at a time, like in server mode, caches (shared libs, wheel
+catalog, apt lookups) stay warm between jobs, apt lookups are made again
+when the apt cache changed, see apt.refresh_cache.
+"""
+
+import asyncio
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import attr
+
+from wheel2deb import apt
+from wheel2deb import logger as logging
+from wheel2deb.context import Settings, load_configuration
+from wheel2deb.debian import PackageInfo, iter_convert_wheels
+from wheel2deb.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_job_lock = threading.Lock()
+
+
+@attr.s(frozen=True)
+class WheelResult:
+    """
+    Outcome of the conversion of a wheel
+    """
+
+    wheel_path = attr.ib(type=Path)
+    # source packages generated from the wheel, one per target
+    packages = attr.ib(factory=tuple, converter=tuple)
+    warnings = attr.ib(factory=tuple, converter=tuple)
+    errors = attr.ib(factory=tuple, converter=tuple)
+    # duration of each phase in seconds, {"convert": 0.2, "unpack": 0.1}
+    timings = attr.ib(factory=dict)
+
+    @property
+    def success(self) -> bool:
+        return bool(self.packages) and not self.errors
+
+
+@attr.s(frozen=True)
+class BuildResult:
+    """
+    Outcome of the build of a source package
+    """
+
+    source_package = attr.ib(type=Path)
+    # built debian package, None when the build failed
+    deb_path = attr.ib(default=None)
+    warnings = attr.ib(factory=tuple, converter=tuple)
+    errors = attr.ib(factory=tuple, converter=tuple)
+    timings = attr.ib(factory=dict)
+
+    @property
+    def success(self) -> bool:
+        return self.deb_path is not None and not self.errors
+
+
+def load_settings(configuration_path: Path) -> Settings:
+    """
+    Load a configuration file
+    :raise ValueError: When the configuration is invalid
+    """
+    try:
+        return load_configuration(configuration_path)
+    except SystemExit:
+        # the reason is already logged
+        raise ValueError(f"invalid configuration file {configuration_path}") from None
+
+
+def convert(
+    wheel_paths: Iterable[Path],
+    output_directory: Path,
+    settings: Settings | None = None,
+    extra_paths: Iterable[Path] = (),
+    selection: str = "all",
+) -> List[WheelResult]:
+    """
+    Convert wheels to debian source packages, see iter_convert_wheels
+    :param wheel_paths: Wheels to convert, see wheel2deb.discovery.find_wheels
+    :param settings: Defaults to Settings()
+    :return: A result per wheel, in the order of wheel_paths
+    """
+    wheel_paths = list(wheel_paths)
+    packages: Dict[str, List[PackageInfo]] = {p.name: [] for p in wheel_paths}
+
+    with _job_lock, logging.collect_records() as collector:
+        apt.refresh_cache()
+        before = {name: metrics.get("wheels", name) for name in packages}
+        for package in iter_convert_wheels(
+            settings or Settings(),
+            output_directory,
+            wheel_paths,
+            list(extra_paths),
+            selection,
+        ):
+            packages.setdefault(package.wheel_name, []).append(package)
+
+        return [
+            WheelResult(
+                path,
+                packages[path.name],
+                collector.get(path.name, logging.WARNING),
+                collector.get(path.name, logging.ERROR),
+                _timings(before[path.name], metrics.get("wheels", path.name)),
+            )
+            for path in wheel_paths
+        ]
+
+
+def build(
+    source_packages: Iterable[Path],
+    workers: int = 4,
+    force_build: bool = False,
+    apt_index: bool = False,
+) -> List[BuildResult]:
+    """
+    Build debian source packages with dpkg-buildpackage, see build_packages
+    :param source_packages: Root directories of source packages, like
+    PackageInfo.root, or wheel2deb.build.find_source_packages(directory)
+    :return: A result per source package, in the order of source_packages
+    """
+    from wheel2deb.build import build_packages
+
+    source_packages = list(source_packages)
+    with _job_lock, logging.collect_records() as collector:
+        before = {p.name: metrics.get("packages", p.name) for p in source_packages}
+        build_packages(source_packages, workers, force_build, apt_index)
+
+        results = []
+        for path in source_packages:
+            deb_path = path.parent / f"{path.name}.deb"
+            results.append(
+                BuildResult(
+                    path,
+                    deb_path if deb_path.is_file() else None,
+                    collector.get(path.name, logging.WARNING),
+                    collector.get(path.name, logging.ERROR),
+                    _timings(before[path.name], metrics.get("packages", path.name)),
+                )
+            )
+        return results
+
+
+async def convert_async(*args, **kwargs) -> List[WheelResult]:
+    """convert, in a thread so that the event loop is not blocked"""
+    return await asyncio.to_thread(convert, *args, **kwargs)
+
+
+async def build_async(*args, **kwargs) -> List[BuildResult]:
+    """build, in a thread so that the event loop is not blocked"""
+    return await asyncio.to_thread(build, *args, **kwargs)
+
+
+def _timings(before: Dict[str, float], after: Dict[str, float]) -> Dict[str, float]:
+    # metrics add up over the lifetime of the process
+    return {
+        name[: -len("_seconds")]: round(value - before.get(name, 0), 6)
+        for name, value in after.items()
+        if name.endswith("_seconds") and value != before.get(name, 0)
+    }
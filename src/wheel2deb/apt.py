@@ -1,4 +1,6 @@
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 from typing import Optional
 
@@ -19,6 +21,12 @@ logger = logging.getLogger(__name__)
 
 _cache = None
 
+# written by apt-get update, see refresh_cache
+APT_CACHE_PATHS = ("/var/lib/apt/lists", "/var/cache/apt/pkgcache.bin")
+
+# modification times of APT_CACHE_PATHS when lookups were last forgotten
+_cache_mtimes = None
+
 
 @attr.s(frozen=True)
 class Package:
@@ -48,11 +56,37 @@ def search_package(name, arch) -> Optional[Package]:
     return Package.factory(name, match.group(1).strip()) if match is not None else None
 
 
+def clear_cache() -> None:
+    """Forget apt lookups, the apt cache may have changed since they were made"""
+    search_package.cache_clear()
+
+
+def refresh_cache() -> bool:
+    """
+    Forget apt lookups when apt lists or the package cache changed since
+    they were made, long-running processes keep lookups between jobs
+    :return: True if lookups were forgotten
+    """
+    global _cache_mtimes
+    mtimes = []
+    for path in APT_CACHE_PATHS:
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    if mtimes == _cache_mtimes:
+        return False
+    _cache_mtimes = mtimes
+    clear_cache()
+    return True
+
+
 def search_packages(names, arch):
     if not names:
         return
 
     logger.debug(f"searching {' '.join(names)} in apt cache...")
 
-    for name in names:
-        yield search_package(name, arch)
+    # lookups run concurrently, up to the apt-cache limit of the command runner
+    with ThreadPoolExecutor(len(names)) as executor:
+        yield from executor.map(lambda name: search_package(name, arch), names)
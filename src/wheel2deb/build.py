@@ -2,9 +2,15 @@ import re
 from pathlib import Path
 from threading import Event, Thread
 from time import sleep
-from typing import List
+from typing import Iterable, List, Sized
 
 from wheel2deb import logger as logging
+from wheel2deb.graph import GRAPH_FILENAME, DependencyGraph
+from wheel2deb.locking import WorkLock
+from wheel2deb.metrics import metrics
+from wheel2deb.repository import index_package, update_repository
+from wheel2deb.sharding import Shard, shard_source_packages
+from wheel2deb.staging import Staging
 from wheel2deb.utils import shell
 
 logger = logging.getLogger(__name__)
@@ -41,23 +47,92 @@ def build_package(cwd: Path) -> int:
     if arch != "all":
         args += ["--host-arch", arch]
 
-    stdout, returncode = shell(args, cwd=cwd)
-    logger.debug(stdout)
+    with metrics.timer("build", "packages", cwd.name):
+        try:
+            # output is logged as it is produced, builds can take a while
+            _, returncode = shell(args, cwd=cwd, output=logger.debug)
+        except OSError as e:
+            logger.error(f"failed to run dpkg-buildpackage: {e}")
+            returncode = 1
+    metrics.set("build_success", int(returncode == 0), "packages", cwd.name)
     if returncode:
         logger.error(f'failed to build package in "{cwd}" ☹')
+        metrics.increment("builds_failed")
+    else:
+        metrics.increment("builds_succeeded")
+        deb_path = cwd.parent / f"{cwd.name}.deb"
+        if deb_path.is_file():
+            size = deb_path.stat().st_size
+            metrics.increment("deb_size_bytes", size, "packages", cwd.name)
 
     return returncode
 
 
-def build_packages(paths: List[Path], threads: int, force_build: bool) -> None:
+def needs_build(path: Path, output_path: Path) -> bool:
+    """
+    A source package needs to be built when its .deb does not exist, or
+    when the digest of its content changed since the .deb was built
+    :param path: Source package
+    :param output_path: Source package in the output directory, where
+    its .deb is written, differs from path when staging
+    """
+    deb_path = Path(f"{output_path}.deb")
+    if not deb_path.is_file():
+        return True
+    digest_path = Path(f"{path}.digest")
+    if not digest_path.is_file():
+        # generated by an older version of wheel2deb
+        return False
+    output_digest_path = Path(f"{output_path}.digest")
+    if output_digest_path != digest_path:
+        # staged source packages are new, compare with the digest
+        # published with the .deb
+        return (
+            not output_digest_path.is_file()
+            or output_digest_path.read_bytes() != digest_path.read_bytes()
+        )
+    # digests are only written when they change
+    return digest_path.stat().st_mtime_ns > deb_path.stat().st_mtime_ns
+
+
+def build_packages(
+    paths: Iterable[Path],
+    threads: int,
+    force_build: bool,
+    apt_index: bool = False,
+    staging: Staging | None = None,
+) -> None:
     """
     Run several instances of dpkg-buildpackage in parallel.
-    :param paths: List of paths where dpkg-buildpackage will be called
+    :param paths: Paths where dpkg-buildpackage will be called, builds are
+    started in that order, but do not wait for the builds started before
+    them to finish. Paths are consumed as workers become available,
+    so a generator lets builds start while other packages are generated
     :param threads: Number of threads to run in parallel
+    :param apt_index: Update apt repository index of directories holding packages
+    :param staging: Build packages in a work directory, and publish results
+    to the output directory
     """
 
-    paths = [p for p in paths if not Path(str(p) + ".deb").is_file() or force_build]
-    logger.task(f"Building {len(paths)} source packages...")
+    def output_path(path: Path) -> Path:
+        return staging.output_path(path) if staging else path
+
+    if isinstance(paths, Sized):
+        logger.task(f"Building {len(paths)} source packages...")
+    else:
+        logger.task("Building source packages...")
+    paths = iter(paths)
+    directories = set()
+
+    def next_path() -> Path | None:
+        for path in paths:
+            directories.add(output_path(path.parent))
+            if force_build or needs_build(path, output_path(path)):
+                return path
+        return None
+
+    # new packages are indexed by the worker that built them
+    stanzas = {}
 
     workers = []
     for i in range(threads):
@@ -66,25 +141,79 @@ def build_packages(paths: List[Path], threads: int, force_build: bool) -> None:
         workers.append({"done": event, "path": None})
 
     def build(done, path):
-        logger.info(f"building {path}")
-        build_package(path)
-        done.set()
+        try:
+            with logging.log_context(path.name):
+                # other wheel2deb processes may build the same directory
+                lock = WorkLock(Path(f"{output_path(path)}.lock"))
+                if not lock.acquire():
+                    logger.info(f"{path.name} is being built by {lock.read_owner()}")
+                    metrics.increment("builds_skipped")
+                    return
+                try:
+                    deb_path = Path(f"{output_path(path)}.deb")
+                    if not force_build and not needs_build(path, output_path(path)):
+                        logger.info(f"{path.name} was built by another process")
+                        metrics.increment("builds_skipped")
+                        return
+                    if staging:
+                        path = staging.stage(path)
+                    logger.info(f"building {path}")
+                    returncode = build_package(path)
+                    if staging:
+                        try:
+                            staging.publish(path)
+                        except OSError as e:
+                            logger.error(f"failed to publish {path.name}: {e}")
+                    if returncode == 0 and apt_index and deb_path.is_file():
+                        stanzas[deb_path] = index_package(deb_path)
+                finally:
+                    lock.release()
+        finally:
+            done.set()
 
-    while False in [w["done"].is_set() for w in workers] or paths:
+    exhausted = False
+    while not exhausted or False in [w["done"].is_set() for w in workers]:
+        started = False
         for w in workers:
-            if w["done"].is_set() and paths:
+            if w["done"].is_set() and not exhausted:
+                # may generate the next package
+                path = next_path()
+                if path is None:
+                    exhausted = True
+                    break
                 w["done"].clear()
-                w["path"] = paths.pop()
+                w["path"] = path
                 Thread(target=build, kwargs=w).start()
-        sleep(1)
+                started = True
+        if not started:
+            sleep(1)
 
+    if apt_index:
+        for directory in sorted(directories):
+            update_repository(
+                directory,
+                {p.name: s for p, s in stanzas.items() if p.parent == directory and s},
+            )
 
-def build_all_packages(output_directory: Path, workers: int, force_build: bool) -> None:
+
+def build_all_packages(
+    output_directory: Path,
+    workers: int,
+    force_build: bool,
+    apt_index: bool = False,
+    shard: Shard | None = None,
+    shard_by_size: bool = False,
+    staging: Staging | None = None,
+) -> None:
     """
     Build debian source packages in parallel.
     :param output_directory: path where to search for source packages
     :param workers: Number of threads to run in parallel
     :param force_build: Build packages even if .deb already exists
+    :param apt_index: Update apt repository index of output directory
+    :param shard: Only build source packages of that shard, see split_shard
+    :param shard_by_size: Balance shards by size of source packages
+    :param staging: Build packages in a work directory, see build_packages
     """
 
     if output_directory.exists() is False:
@@ -95,9 +224,43 @@ def build_all_packages(output_directory: Path, workers: int, force_build: bool)
         logger.error(f"{output_directory} is not a directory")
         return
 
+    paths = find_source_packages(output_directory)
+    if shard is not None:
+        paths = shard_source_packages(paths, shard, shard_by_size)
+    build_packages(paths, workers, force_build, apt_index, staging)
+
+
+def find_source_packages(directory: Path) -> List[Path]:
+    """
+    List source packages generated by convert in a directory,
+    and in the subdirectories of the targets it was configured with.
+    Dependencies come first when convert saved a dependency graph, builds
+    are started in that order but do not wait for their dependencies.
+    """
     paths = []
-    for output_directory in output_directory.iterdir():
-        if output_directory.is_dir() and (output_directory / "debian/control").is_file():
-            paths.append(output_directory)
+    for path in sorted(directory.iterdir()):
+        if path.is_dir() and (path / "debian/control").is_file():
+            paths.append(path)
+
+    # best-effort: dependencies are started first, see build_packages
+    graph = DependencyGraph.load(directory / GRAPH_FILENAME)
+    if graph is not None:
+        paths = sort_paths(paths, graph.package_order())
+
+    for path in sorted(directory.iterdir()):
+        if path.is_dir() and (path / GRAPH_FILENAME).is_file():
+            paths.extend(find_source_packages(path))
 
-    build_packages(paths, workers, force_build)
+    return paths
+
+
+def sort_paths(paths: List[Path], package_order: List[str]) -> List[Path]:
+    """
+    Sort source package paths following a list of debian package names,
+    source packages missing from that list come last.
+    """
+    rank = {name: i for i, name in enumerate(package_order)}
+    # source package directories are named {package}_{version}_{arch}
+    return sorted(
+        paths, key=lambda p: (rank.get(p.name.split("_")[0], len(rank)), p.name)
+    )
@@ -0,0 +1,189 @@
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import AbstractSet, Dict, List
+
+from wheel2deb import logger as logging
+from wheel2deb.pyvers import Version
+from wheel2deb.utils import runner, write_if_changed
+
+logger = logging.getLogger(__name__)
+
+# -s and -p options of compileall (stripdir, prependdir)
+MIN_COMPILE_VERSION = Version(3, 9)
+
+# minimum number of modules compiled by a compileall process
+CHUNK_SIZE = 64
+
+
+def find_interpreter(version: Version) -> str | None:
+    """:return: Path of a python interpreter of the given major.minor version"""
+    if sys.version_info[:2] == (version.major, version.minor):
+        return sys.executable
+    return shutil.which(f"python{version.major}.{version.minor}")
+
+
+def cache_path(source: Path, version: Version) -> Path:
+    """Path of the bytecode of a module for a CPython version, see PEP 3147"""
+    tag = f"cpython-{version.major}{version.minor}"
+    return source.parent / "__pycache__" / f"{source.stem}.{tag}.pyc"
+
+
+def find_modules(src: Path) -> Dict[str, List[Path]]:
+    """
+    Find modules installed from the src directory of a source package,
+    modules of wheel.data directories are only installed from purelib
+    :return: Modules by the directory they are installed from
+    """
+    modules = {}
+    for path in sorted(src.iterdir()):
+        if path.name.endswith(".data"):
+            path = path / "purelib"
+        if path.is_file() and path.suffix == ".py":
+            # top-level module, six.py for instance
+            modules.setdefault(str(src), []).append(path)
+            continue
+        if not path.is_dir():
+            continue
+        strip = src if path.parent == src else path
+        for parent, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+            modules.setdefault(str(strip), []).extend(
+                Path(parent) / name for name in sorted(filenames) if name.endswith(".py")
+            )
+    return modules
+
+
+def load_manifest(path: Path) -> List[str]:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return []
+
+
+def remove_compiled_bytecode(
+    src: Path, manifest_path: Path, keep: AbstractSet[str] = frozenset()
+) -> int:
+    """
+    Remove bytecode written by compile_bytecode, listed in its manifest,
+    so that bytecode of removed modules is not shipped. Bytecode shipped
+    in wheels is left alone.
+    :param keep: Bytecode files to keep, relative to src
+    :return: Number of removed files
+    """
+    if not manifest_path.exists():
+        return 0
+    removed = 0
+    for name in load_manifest(manifest_path):
+        if name in keep:
+            continue
+        path = src / name
+        if path.exists():
+            path.unlink()
+            removed += 1
+        with contextlib.suppress(OSError):
+            path.parent.rmdir()
+    if not keep:
+        manifest_path.unlink()
+    return removed
+
+
+def compile_bytecode(
+    src: Path,
+    version: Version,
+    destination: str,
+    manifest_path: Path,
+    recorded: AbstractSet[str] = frozenset(),
+) -> bool:
+    """
+    Byte-compile the modules of the src directory of a source package for a
+    python version, with compileall processes of an interpreter of that
+    version running in parallel (see CommandRunner for their limit).
+    Bytecode is hash based (checked against the source when imported, see
+    PEP 552), so it stays valid whatever the modification times of installed
+    files, and only modules that changed since they were compiled are
+    compiled again. Tracebacks show the installed paths of modules.
+    :param destination: Directory modules are installed in
+    :param manifest_path: Bytecode files written, see remove_compiled_bytecode
+    :param recorded: Files listed in RECORD, relative to src, the bytecode
+    of modules shipped with their bytecode is not compiled again
+    :return: True if bytecode of every module was written
+    """
+    if version < MIN_COMPILE_VERSION:
+        logger.warning(
+            f"bytecode can only be compiled for python >= {MIN_COMPILE_VERSION}"
+        )
+        return False
+
+    interpreter = find_interpreter(version)
+    if interpreter is None:
+        logger.warning(
+            f"python{version.major}.{version.minor} not found, bytecode not compiled"
+        )
+        return False
+
+    modules = find_modules(src)
+    for strip, paths in modules.items():
+        modules[strip] = [
+            path
+            for path in paths
+            if str(cache_path(path, version).relative_to(src)) not in recorded
+        ]
+    expected = {
+        str(cache_path(path, version).relative_to(src))
+        for paths in modules.values()
+        for path in paths
+    }
+    remove_compiled_bytecode(src, manifest_path, expected)
+    write_if_changed(manifest_path, json.dumps(sorted(expected)) + "\n")
+
+    futures = []
+    with contextlib.ExitStack() as stack:
+        for strip, paths in modules.items():
+            # a module changed when it is more recent than its bytecode
+            outdated = []
+            for path in paths:
+                pyc = cache_path(path, version)
+                if not pyc.exists() or pyc.stat().st_mtime < path.stat().st_mtime:
+                    outdated.append(path)
+
+            # compileall only uses its process pool for directories, lists of
+            # files are split between several compileall processes instead
+            chunk_count = min(os.cpu_count() or 1, -(-len(outdated) // CHUNK_SIZE))
+            for i in range(chunk_count):
+                file_list = stack.enter_context(
+                    tempfile.NamedTemporaryFile("w", suffix=".list")
+                )
+                file_list.write("".join(f"{p}\n" for p in outdated[i::chunk_count]))
+                file_list.flush()
+                args = [
+                    interpreter,
+                    "-m",
+                    "compileall",
+                    "-q",
+                    "--invalidation-mode=checked-hash",
+                    f"-s{strip}",
+                    f"-p{destination}",
+                    f"-i{file_list.name}",
+                ]
+                futures.append(runner.submit(args))
+
+        if futures:
+            logger.debug(f"compiling modules with {interpreter}")
+        success = True
+        for future in futures:
+            output, returncode = future.result()
+            if returncode != 0:
+                logger.warning(f"failed to compile bytecode:\n{output}")
+                success = False
+
+    # compileall skips what it cannot compile without always failing
+    skipped = [name for name in sorted(expected) if not (src / name).is_file()]
+    if skipped:
+        logger.warning(f"bytecode not compiled: {', '.join(skipped)}")
+        success = False
+    return success
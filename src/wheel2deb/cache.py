@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from wheel2deb import logger as logging
+
+logger = logging.getLogger(__name__)
+
+
+def cache_directory() -> Path:
+    """
+    Directory holding caches persisted between runs:
+    $WHEEL2DEB_CACHE_DIR, or wheel2deb in the XDG cache directory
+    """
+    if directory := os.environ.get("WHEEL2DEB_CACHE_DIR"):
+        return Path(directory)
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(xdg_cache_home) / "wheel2deb"
+
+
+class DiskCache:
+    """
+    JSON values stored on disk, one file per key.
+    The cache is best effort: entries that cannot be read or
+    written are ignored, so that a run never fails because of it.
+    """
+
+    def __init__(self, name: str, directory: Path | None = None):
+        self.name = name
+        self.directory = directory
+
+    @property
+    def path(self) -> Path:
+        # caches created when modules are imported follow the environment
+        return (self.directory or cache_directory()) / self.name
+
+    def _entry_path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.path / digest[:2] / f"{digest}.json"
+
+    def get(self, key: str):
+        """:return: Value stored for key, or None"""
+        try:
+            return json.loads(self._entry_path(key).read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.debug(f"ignoring cache entry {key}: {e}")
+            return None
+
+    def set(self, key: str, value) -> None:
+        path = self._entry_path(key)
+        # concurrent runs may write the same entry, replace it atomically
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(value))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"failed to write cache entry {key}: {e}")
@@ -0,0 +1,119 @@
+import json
+import sqlite3
+import zipfile
+from pathlib import Path
+from typing import List
+
+from wheel2deb import logger as logging
+from wheel2deb.cache import cache_directory
+from wheel2deb.metrics import metrics
+from wheel2deb.pydist import WheelInfo
+from wheel2deb.utils import hash_file
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILENAME = "catalog.sqlite"
+
+# bump when the content of WheelInfo.to_dict() changes
+CATALOG_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS wheels (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    info TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS wheels_sha256 ON wheels (sha256);
+"""
+
+
+class Catalog:
+    """
+    Wheels parsed in previous runs, stored in a SQLite database.
+    A wheel is only opened when its size or modification time changed,
+    and only parsed when its content changed.
+    """
+
+    def __init__(self, path: Path | None = None):
+        path = path or cache_directory() / CATALOG_FILENAME
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.connection = self._connect(str(path))
+        except (OSError, sqlite3.Error) as e:
+            # wheels are parsed every time, like without catalog
+            logger.debug(f"cannot open wheel catalog {path}: {e}")
+            self.connection = self._connect(":memory:")
+
+    @staticmethod
+    def _connect(database: str) -> sqlite3.Connection:
+        # concurrent runs wait for each other's writes
+        connection = sqlite3.connect(database, timeout=60)
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != CATALOG_VERSION:
+            connection.execute("DROP TABLE IF EXISTS wheels")
+            connection.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def get(self, wheel_path: Path) -> WheelInfo:
+        stat = wheel_path.stat()
+        key = str(wheel_path.resolve())
+        row = self.connection.execute(
+            "SELECT size, mtime_ns, sha256, info FROM wheels WHERE path = ?", (key,)
+        ).fetchone()
+        if row is not None and row[:2] == (stat.st_size, stat.st_mtime_ns):
+            metrics.increment("catalog_hits")
+            return self._load(wheel_path, row[2], row[3])
+
+        # the wheel was touched, copied or moved: parse it only if its content changed
+        sha256 = hash_file(wheel_path)
+        row = self.connection.execute(
+            "SELECT info FROM wheels WHERE sha256 = ? LIMIT 1", (sha256,)
+        ).fetchone()
+        info = None
+        if row is not None:
+            info = self._load(wheel_path, sha256, row[0])
+            if info.wheel_name != wheel_path.name:
+                info = None
+        if info is None:
+            metrics.increment("catalog_misses")
+            info = WheelInfo.from_wheel_file(wheel_path, sha256)
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO wheels VALUES (?, ?, ?, ?, ?)",
+                (
+                    key,
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    sha256,
+                    json.dumps(info.to_dict()),
+                ),
+            )
+        return info
+
+    @staticmethod
+    def _load(wheel_path: Path, sha256: str, content: str) -> WheelInfo:
+        return WheelInfo(**json.loads(content), path=wheel_path, sha256=sha256)
+
+    def read_wheels(self, wheel_paths: List[Path]) -> List[WheelInfo]:
+        """Read wheels, ignoring the ones that are not valid wheel archives"""
+        infos = []
+        for path in wheel_paths:
+            try:
+                infos.append(self.get(path))
+            except (OSError, KeyError, StopIteration, zipfile.BadZipFile) as e:
+                with logging.log_context(path.name):
+                    logger.error(f"failed to read {path.name}: {e!r}")
+        return infos
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "Catalog":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
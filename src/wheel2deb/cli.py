@@ -9,12 +9,13 @@ import typer
 from typer.core import TyperGroup
 
 from wheel2deb import logger as logging
-from wheel2deb.build import build_all_packages, build_packages
-from wheel2deb.context import load_configuration
-from wheel2deb.debian import convert_wheels
 from wheel2deb.logger import enable_debug
 from wheel2deb.version import __version__
 
+# Commands import the modules they need when they are called: the conversion
+# stack (jinja2, pkginfo, wheel, packaging, yaml...) is slow to import and is
+# not needed by short invocations like version, build or submit.
+
 logger = logging.getLogger(__name__)
 
 
@@ -79,7 +80,9 @@ option_include_wheels: Optional[List[str]] = typer.Option(
     "--include",
     "-i",
     envvar="WHEEL2DEB_INCLUDE_WHEELS",
-    help="Only wheels with matching names will be converted",
+    help="Only wheels with matching names will be converted. "
+    "Accepts filenames, project names (name or name==version), "
+    "glob patterns, and regexes prefixed with re:",
 )
 
 option_exclude_wheels: Optional[List[str]] = typer.Option(
@@ -87,7 +90,54 @@ option_exclude_wheels: Optional[List[str]] = typer.Option(
     "--exclude",
     "-e",
     envvar="WHEEL2DEB_EXCLUDE_WHEELS",
-    help="Wheels with matching names will not be converted",
+    help="Wheels with matching names will not be converted, "
+    "accepts the same patterns as --include",
+)
+
+option_recursive: bool = typer.Option(
+    False,
+    "--recursive",
+    "-r",
+    envvar="WHEEL2DEB_RECURSIVE",
+    help="Also search wheels in subdirectories of search paths.",
+)
+
+option_select_wheels: str = typer.Option(
+    "all",
+    "--select",
+    envvar="WHEEL2DEB_SELECT",
+    help="Wheels to convert when a project has several: all, newest, or "
+    "best-match (wheels built for the target python version and platform first).",
+)
+
+option_shard: Optional[str] = typer.Option(
+    None,
+    "--shard",
+    envvar="WHEEL2DEB_SHARD",
+    help="Only handle shard K of N (K/N), to split work between processes.",
+)
+
+option_shard_by_size: bool = typer.Option(
+    False,
+    "--shard-by-size",
+    envvar="WHEEL2DEB_SHARD_BY_SIZE",
+    help="Balance shards by size instead of by number of projects.",
+)
+
+option_work_directory: Optional[Path] = typer.Option(
+    None,
+    "--work-dir",
+    envvar="WHEEL2DEB_WORK_DIR",
+    help="Generate and build source packages in that directory (/dev/shm for "
+    "instance), and only move build results to the output directory.",
+)
+
+option_trust_extracted: bool = typer.Option(
+    False,
+    "--trust-extracted",
+    envvar="WHEEL2DEB_TRUST_EXTRACTED",
+    help="Do not verify hashes of previously extracted wheels again when "
+    "the wheel did not change.",
 )
 
 option_search_paths: List[Path] = typer.Option(
@@ -111,42 +161,120 @@ option_force_build: bool = typer.Option(
     False, "--force", help="Build source package even if .deb already exists"
 )
 
+option_graph_format: str = typer.Option(
+    "json",
+    "--format",
+    "-f",
+    envvar="WHEEL2DEB_GRAPH_FORMAT",
+    help="Dependency graph format: json or dot.",
+)
+
+option_socket_path: Path = typer.Option(
+    "/tmp/wheel2deb.sock",
+    "--socket",
+    "-s",
+    envvar="WHEEL2DEB_SOCKET",
+    help="Path to the unix socket of wheel2deb server.",
+)
+
+option_apt_index: bool = typer.Option(
+    False,
+    "--apt-index",
+    envvar="WHEEL2DEB_APT_INDEX",
+    help="Maintain Packages, Packages.gz and Release files in the output directory.",
+)
+
+option_metrics_file: Optional[Path] = typer.Option(
+    None,
+    "--metrics-file",
+    envvar="WHEEL2DEB_METRICS_FILE",
+    help="Write run metrics to this file, in Prometheus textfile format "
+    "if its name ends with .prom, in JSON otherwise.",
+)
+
 app = typer.Typer(cls=DefaultCommandGroup)
 
 
+def save_metrics(metrics_file: Path, elapsed: float) -> None:
+    from wheel2deb.metrics import metrics
+
+    metrics.set("warnings", logging.get_warning_counter())
+    metrics.set("errors", logging.get_error_counter())
+    metrics.set("elapsed_seconds", elapsed)
+
+    # only report caches of modules this command used
+    caches = {
+        "apt_cache": ("wheel2deb.apt", "search_package"),
+        "requirement_cache": ("wheel2deb.pydist", "parse_requirement"),
+        "marker_cache": ("wheel2deb.pydist", "_evaluate_marker"),
+    }
+    for name, (module_name, function_name) in caches.items():
+        if module_name in sys.modules:
+            info = getattr(sys.modules[module_name], function_name).cache_info()
+            metrics.set(f"{name}_hits", info.hits)
+            metrics.set(f"{name}_misses", info.misses)
+
+    try:
+        metrics.save(metrics_file)
+    except OSError as e:
+        logger.error(f"Could not write metrics to {metrics_file}: {e}")
+
+
 @contextmanager
-def print_summary_and_exit():
+def print_summary_and_exit(metrics_file: Optional[Path] = None):
     start_time = time.monotonic()
     yield
+    elapsed = time.monotonic() - start_time
+    if metrics_file is not None:
+        save_metrics(metrics_file, elapsed)
     logger.summary(
         f"\nWarnings: {logging.get_warning_counter()}. "
         f"Errors: {logging.get_error_counter()}. "
-        f"Elapsed: {round(time.monotonic() - start_time, 3)}s."
+        f"Elapsed: {round(elapsed, 3)}s."
     )
+    logging.flush()
     # the return code is the number of errors
     sys.exit(logging.get_error_counter())
 
 
-def filter_wheels(
-    search_paths: List[Path],
-    include_wheels: List[str] | None,
-    exclude_wheels: List[str] | None,
-) -> List[Path]:
-    # list all python wheels in search paths
-    files = []
-    for path in [Path(path) for path in search_paths]:
-        files.extend(path.glob("*.whl"))
-    files = sorted(files, key=lambda x: x.name)
+@contextmanager
+def staged_output(
+    output_directory: Path,
+    work_directory: Path | None,
+    publish_sources: bool = False,
+):
+    """
+    Yield the directory where source packages are generated, and the
+    staging to build them with, the work directory is released on exit
+    """
+    if work_directory is None:
+        yield output_directory, None
+        return
+
+    from wheel2deb.staging import Staging
+
+    staging = Staging.create(work_directory, output_directory, publish_sources)
+    try:
+        yield staging.work_directory, staging
+    finally:
+        staging.cleanup()
+
 
-    filenames = [f.name for f in files]
-    if not include_wheels:
-        include_wheels = filenames
+def select_shard(
+    wheel_paths: List[Path], shard: str | None, shard_by_size: bool
+) -> Tuple[List[Path], List[Path]] | None:
+    """
+    :return: Wheels to convert, and wheels of other shards that
+    satisfy requirements, None when shard is invalid
+    """
+    if shard is None:
+        return wheel_paths, []
 
-    # remove excluded wheels
-    if exclude_wheels:
-        include_wheels = list(filter(lambda x: x not in exclude_wheels, include_wheels))
+    from wheel2deb.sharding import parse_shard, shard_wheels
 
-    return [file for file in files if file.name in include_wheels]
+    if (parsed_shard := parse_shard(shard)) is None:
+        return None
+    return shard_wheels(wheel_paths, parsed_shard, shard_by_size)
 
 
 @app.command(help="Generate and build source packages.")
@@ -157,14 +285,53 @@ def default(
     search_paths: List[Path] = option_search_paths,
     include_wheels: Optional[List[str]] = option_include_wheels,
     exclude_wheels: Optional[List[str]] = option_exclude_wheels,
+    recursive: bool = option_recursive,
+    selection: str = option_select_wheels,
+    shard: Optional[str] = option_shard,
+    shard_by_size: bool = option_shard_by_size,
     workers_count: int = option_workers_count,
     force_build: bool = option_force_build,
+    apt_index: bool = option_apt_index,
+    metrics_file: Optional[Path] = option_metrics_file,
+    work_directory: Optional[Path] = option_work_directory,
+    trust_extracted: bool = option_trust_extracted,
+    publish_sources: bool = typer.Option(
+        False,
+        "--publish-sources",
+        envvar="WHEEL2DEB_PUBLISH_SOURCES",
+        help="With --work-dir, also copy source packages to the output directory.",
+    ),
 ) -> None:
-    with print_summary_and_exit():
+    from wheel2deb.build import build_packages
+    from wheel2deb.context import load_configuration
+    from wheel2deb.debian import iter_convert_wheels
+    from wheel2deb.discovery import find_wheels
+    from wheel2deb.pydist import trust_verified_extractions
+
+    with print_summary_and_exit(metrics_file):
+        trust_verified_extractions(trust_extracted)
         settings = load_configuration(configuration_path)
-        wheel_paths = filter_wheels(search_paths, include_wheels, exclude_wheels)
-        packages = convert_wheels(settings, output_directory, wheel_paths)
-        build_packages([p.root for p in packages], workers_count, force_build)
+        wheel_paths = find_wheels(search_paths, include_wheels, exclude_wheels, recursive)
+        if (shard_paths := select_shard(wheel_paths, shard, shard_by_size)) is None:
+            return
+        wheel_paths, extra_paths = shard_paths
+        with staged_output(output_directory, work_directory, publish_sources) as (
+            directory,
+            staging,
+        ):
+            # packages are built while the next ones are generated
+            packages = iter_convert_wheels(
+                settings, directory, wheel_paths, extra_paths, selection
+            )
+            build_packages(
+                (p.root for p in packages),
+                workers_count,
+                force_build,
+                apt_index,
+                staging,
+            )
+            if staging is not None:
+                staging.publish_graphs()
 
 
 @app.command(help="Convert wheels in search paths to debian source packages")
@@ -175,11 +342,51 @@ def convert(
     search_paths: List[Path] = option_search_paths,
     include_wheels: Optional[List[str]] = option_include_wheels,
     exclude_wheels: Optional[List[str]] = option_exclude_wheels,
+    recursive: bool = option_recursive,
+    selection: str = option_select_wheels,
+    shard: Optional[str] = option_shard,
+    shard_by_size: bool = option_shard_by_size,
+    metrics_file: Optional[Path] = option_metrics_file,
+    trust_extracted: bool = option_trust_extracted,
 ) -> None:
+    from wheel2deb.context import load_configuration
+    from wheel2deb.debian import convert_wheels
+    from wheel2deb.discovery import find_wheels
+    from wheel2deb.pydist import trust_verified_extractions
+
+    with print_summary_and_exit(metrics_file):
+        trust_verified_extractions(trust_extracted)
+        settings = load_configuration(configuration_path)
+        wheel_paths = find_wheels(search_paths, include_wheels, exclude_wheels, recursive)
+        if (shard_paths := select_shard(wheel_paths, shard, shard_by_size)) is None:
+            return
+        wheel_paths, extra_paths = shard_paths
+        convert_wheels(settings, output_directory, wheel_paths, extra_paths, selection)
+
+
+@app.command(help="Compute the dependency graph of wheels in search paths.")
+def resolve(
+    verbose: bool = option_verbose,
+    configuration_path: Optional[Path] = option_configuration,
+    output_directory: Path = option_output_directory,
+    search_paths: List[Path] = option_search_paths,
+    include_wheels: Optional[List[str]] = option_include_wheels,
+    exclude_wheels: Optional[List[str]] = option_exclude_wheels,
+    recursive: bool = option_recursive,
+    selection: str = option_select_wheels,
+    graph_format: str = option_graph_format,
+) -> None:
+    from wheel2deb.context import load_configuration
+    from wheel2deb.debian import resolve_wheels
+    from wheel2deb.discovery import find_wheels
+
     with print_summary_and_exit():
+        if graph_format not in ("json", "dot"):
+            logger.error(f"Unsupported dependency graph format: {graph_format}")
+            return
         settings = load_configuration(configuration_path)
-        wheel_paths = filter_wheels(search_paths, include_wheels, exclude_wheels)
-        convert_wheels(settings, output_directory, wheel_paths)
+        wheel_paths = find_wheels(search_paths, include_wheels, exclude_wheels, recursive)
+        resolve_wheels(settings, output_directory, wheel_paths, graph_format, selection)
 
 
 @app.command(help="Build debian packages from source packages.")
@@ -188,9 +395,134 @@ def build(
     output_directory: Path = option_output_directory,
     workers_count: int = option_workers_count,
     force_build: bool = option_force_build,
+    apt_index: bool = option_apt_index,
+    metrics_file: Optional[Path] = option_metrics_file,
+    shard: Optional[str] = option_shard,
+    shard_by_size: bool = option_shard_by_size,
+    work_directory: Optional[Path] = option_work_directory,
 ) -> None:
+    from wheel2deb.build import build_all_packages
+    from wheel2deb.sharding import parse_shard
+
+    with print_summary_and_exit(metrics_file):
+        parsed_shard = None
+        if shard is not None and (parsed_shard := parse_shard(shard)) is None:
+            return
+        with staged_output(output_directory, work_directory) as (_, staging):
+            build_all_packages(
+                output_directory,
+                workers_count,
+                force_build,
+                apt_index,
+                parsed_shard,
+                shard_by_size,
+                staging,
+            )
+
+
+@app.command(help="Convert and build wheels as they land in search paths.")
+def watch(
+    verbose: bool = option_verbose,
+    configuration_path: Optional[Path] = option_configuration,
+    output_directory: Path = option_output_directory,
+    search_paths: List[Path] = option_search_paths,
+    include_wheels: Optional[List[str]] = option_include_wheels,
+    exclude_wheels: Optional[List[str]] = option_exclude_wheels,
+    recursive: bool = option_recursive,
+    selection: str = option_select_wheels,
+    workers_count: int = option_workers_count,
+    force_build: bool = option_force_build,
+    apt_index: bool = option_apt_index,
+    debounce: float = typer.Option(
+        2.0,
+        "--debounce",
+        envvar="WHEEL2DEB_DEBOUNCE",
+        help="Seconds a wheel must stay unchanged before being converted.",
+    ),
+) -> None:
+    from wheel2deb.context import load_configuration
+    from wheel2deb.watch import watch_wheels
+
     with print_summary_and_exit():
-        build_all_packages(output_directory, workers_count, force_build)
+        settings = load_configuration(configuration_path)
+        watch_wheels(
+            settings,
+            output_directory,
+            search_paths,
+            include_wheels,
+            exclude_wheels,
+            recursive,
+            selection,
+            workers_count,
+            force_build,
+            debounce,
+            apt_index,
+        )
+
+
+@app.command(help="Run jobs submitted with wheel2deb submit, keeping caches warm.")
+def serve(
+    verbose: bool = option_verbose,
+    socket_path: Path = option_socket_path,
+) -> None:
+    from wheel2deb.server import serve as serve_jobs
+
+    serve_jobs(socket_path)
+
+
+@app.command(help="Submit a job to wheel2deb server and wait for its completion.")
+def submit(
+    command: str = typer.Argument("default", help="Job: default, convert or build."),
+    verbose: bool = option_verbose,
+    socket_path: Path = option_socket_path,
+    configuration_path: Optional[Path] = option_configuration,
+    output_directory: Path = option_output_directory,
+    search_paths: List[Path] = option_search_paths,
+    include_wheels: Optional[List[str]] = option_include_wheels,
+    exclude_wheels: Optional[List[str]] = option_exclude_wheels,
+    recursive: bool = option_recursive,
+    selection: str = option_select_wheels,
+    workers_count: int = option_workers_count,
+    force_build: bool = option_force_build,
+    apt_index: bool = option_apt_index,
+) -> None:
+    from wheel2deb.server import submit as submit_job
+
+    # paths are resolved here since the server runs in another directory
+    if configuration_path is None and Path("wheel2deb.yml").is_file():
+        configuration_path = Path("wheel2deb.yml")
+    args = {
+        "configuration_path": str(configuration_path.absolute())
+        if configuration_path
+        else None,
+        "output_directory": str(output_directory.absolute()),
+        "search_paths": [str(p.absolute()) for p in search_paths],
+        "include_wheels": include_wheels,
+        "exclude_wheels": exclude_wheels,
+        "recursive": recursive,
+        "selection": selection,
+        "workers_count": workers_count,
+        "force_build": force_build,
+        "apt_index": apt_index,
+    }
+
+    try:
+        result = submit_job(socket_path, command, args)
+    except OSError as e:
+        logger.error(f"Could not submit job to {socket_path}: {e}")
+        sys.exit(1)
+
+    if "error" in result:
+        logger.error(result["error"])
+        sys.exit(1)
+
+    logger.summary(
+        f"\nWarnings: {result['warnings']}. "
+        f"Errors: {result['errors']}. "
+        f"Elapsed: {result['elapsed']}s."
+    )
+    logging.flush()
+    sys.exit(result["errors"])
 
 
 @app.command(help="Output wheel2deb version.")
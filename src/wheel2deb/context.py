@@ -27,6 +27,7 @@ class Context:
     arch = attr.ib(default="")
     ignore_entry_points = attr.ib(default=False)
     ignore_upstream_versions = attr.ib(default=False)
+    precompile = attr.ib(default=False)
     ignore_requirements = attr.ib(factory=list)
     ignore_specifiers = attr.ib(factory=list)
     extra = attr.ib(default="")
@@ -49,16 +50,52 @@ class Context:
                 setattr(self, k, changes[k])
 
 
+@attr.s(frozen=True)
+class Target:
+    """
+    A combination of settings (python_version, arch, distribution...)
+    for which every wheel is converted, in its own output subdirectory
+    """
+
+    name = attr.ib(type=str)
+    changes = attr.ib(factory=dict)
+
+    @classmethod
+    def from_dict(cls, changes):
+        """
+        :raise ValueError: When python_version is not a string, YAML
+        parses an unquoted 3.10 as the number 3.1
+        """
+        check_python_version(changes)
+        changes = dict(changes)
+        name = changes.pop("name", None)
+        if name is None:
+            name = "-".join(str(v) for v in changes.values()) or "default"
+        return cls(re.sub(r"[^\w.+-]+", "_", name), changes)
+
+
+def check_python_version(changes: dict) -> None:
+    """:raise ValueError: When python_version is set and is not a string"""
+    value = changes.get("python_version")
+    if value is not None and not isinstance(value, str):
+        raise ValueError(
+            f'python_version must be a string, quote it: python_version: "{value}"'
+        )
+
+
 @attr.s
 class Settings:
     config = attr.ib(factory=dict)
     default_ctx = attr.ib(factory=Context)
+    targets = attr.ib(factory=list)
 
-    def get_ctx(self, key):
+    def get_ctx(self, key, target: Target | None = None):
         ctx = self.default_ctx
         for k in self.config.keys():
             if re.match(k, key):
                 ctx = attr.evolve(ctx, **self.config[k])
+        if target is not None:
+            ctx = attr.evolve(ctx, **target.changes)
         return ctx
 
 
@@ -85,4 +122,30 @@ def load_configuration(configuration_path: Path | None) -> Settings:
         logger.error(f"Invalid YAML in configuration file: {e}")
         sys.exit(1)
 
-    return Settings(configuration)
+    configuration = configuration or {}
+
+    # "targets" is reserved, it holds a list of settings for which
+    # every wheel is converted
+    targets = configuration.pop("targets", None) or []
+    if not isinstance(targets, list) or not all(isinstance(t, dict) for t in targets):
+        logger.error("Invalid configuration: targets must be a list of mappings")
+        sys.exit(1)
+
+    try:
+        for changes in configuration.values():
+            if isinstance(changes, dict):
+                check_python_version(changes)
+        targets = [Target.from_dict(t) for t in targets]
+    except ValueError as e:
+        logger.error(f"Invalid configuration: {e}")
+        sys.exit(1)
+
+    # each target is converted in its own subdirectory
+    names = [t.name for t in targets]
+    if duplicates := sorted({name for name in names if names.count(name) > 1}):
+        logger.error(
+            f"Invalid configuration: several targets are named {', '.join(duplicates)}"
+        )
+        sys.exit(1)
+
+    return Settings(configuration, targets=targets)
@@ -1,20 +1,31 @@
+import hashlib
+import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterator, List, Tuple
 
-from dirsync import sync
+import attr
+from packaging.version import InvalidVersion, parse
 
 from wheel2deb import logger as logging
-from wheel2deb.context import Settings
-from wheel2deb.depends import normalize_package_version, search_python_deps, suggest_name
-from wheel2deb.pydist import Wheel, parse_wheel
+from wheel2deb.bytecode import compile_bytecode, remove_compiled_bytecode
+from wheel2deb.cache import DiskCache
+from wheel2deb.catalog import Catalog
+from wheel2deb.context import Settings, Target
+from wheel2deb.depends import normalize_package_version, resolve_python_deps, suggest_name
+from wheel2deb.elf import find_missing_libs, read_elf
+from wheel2deb.graph import GRAPH_FILENAME, PythonDeps, resolve_graph, save_graph
+from wheel2deb.metrics import metrics
+from wheel2deb.pydist import Wheel, WheelInfo, parse_wheel
+from wheel2deb.sharding import write_wheel_descriptor
+from wheel2deb.sync import sync_record
 from wheel2deb.templates import environment
-from wheel2deb.utils import shell
+from wheel2deb.utils import shell, write_if_changed
 from wheel2deb.version import __version__
 
 logger = logging.getLogger(__name__)
-dirsync_logger = logging.getLogger("dirsync")
-dirsync_logger.setLevel(logging.ERROR)
 
 
 COPYRIGHT_RE = re.compile(
@@ -22,10 +33,61 @@ COPYRIGHT_RE = re.compile(
     re.IGNORECASE,
 )
 
-DPKG_SHLIBS_RE = re.compile(r"find library (.+\.so[.\d]*) needed")
+WHEEL_SELECTIONS = ("all", "newest", "best-match")
+
+# python tag of wheels built for a cpython version (cp311)
+CPYTHON_TAG_RE = re.compile(r"^cp(\d)(\d+)$")
 
 APT_FILE_RE = re.compile(r"(.*lib.+):\s(?:/usr/lib/|/lib/)")
 
+# sonames needed by a shared lib, the ones missing from the system and
+# packages providing them, by shared lib content hash and arch
+# (bump version when entries change)
+SHLIBS_CACHE_VERSION = 2
+shlibs_cache = DiskCache("shlibs")
+
+# files of debian/ written by SourcePackage.create
+GENERATED_DEBIAN_FILES = (
+    "changelog",
+    "compat",
+    "control",
+    "copyright",
+    "install",
+    "postinst",
+    "prerm",
+    "rules",
+)
+
+# date of changelog entries when SOURCE_DATE_EPOCH is not set,
+# generated files must not change from one run to another
+DEFAULT_CHANGELOG_EPOCH = 1557261090
+
+
+def changelog_date() -> str:
+    """
+    Date of changelog entries, SOURCE_DATE_EPOCH if set, see
+    https://reproducible-builds.org/specs/source-date-epoch/
+    """
+    epoch = os.environ.get("SOURCE_DATE_EPOCH", "")
+    if not epoch.isdigit():
+        epoch = DEFAULT_CHANGELOG_EPOCH
+    return time.strftime("%a, %d %b %Y %H:%M:%S +0000", time.gmtime(int(epoch)))
+
+
+def digest_path(root: Path) -> Path:
+    """Path of the content digest of a source package, see SourcePackage.digest"""
+    return root.parent / f"{root.name}.digest"
+
+
+def sync_manifest_path(root: Path) -> Path:
+    """Path of the files synced to the src directory, see sync_record"""
+    return root.parent / f"{root.name}.sync"
+
+
+def bytecode_manifest_path(root: Path) -> Path:
+    """Path of the bytecode compiled in the src directory, see compile_bytecode"""
+    return root.parent / f"{root.name}.bytecode"
+
 
 def platform_to_arch(platform_tag):
     translation_table = {
@@ -42,19 +104,73 @@ def platform_to_arch(platform_tag):
     return None
 
 
+@attr.s(frozen=True)
+class PackageInfo:
+    """
+    A generated source package
+    """
+
+    # debian package name
+    name = attr.ib(type=str)
+    version = attr.ib(type=str)
+    arch = attr.ib(type=str)
+    # root directory of the source package
+    root = attr.ib(type=Path)
+    wheel_name = attr.ib(type=str)
+    # dependencies written in debian/control
+    depends = attr.ib(factory=tuple, converter=tuple)
+    # requirements of the wheel that no package satisfies
+    missing = attr.ib(factory=tuple, converter=tuple)
+
+    @classmethod
+    def from_source_package(cls, package: "SourcePackage") -> "PackageInfo":
+        return cls(
+            package.name,
+            package.version,
+            package.arch,
+            package.root,
+            package.wheel.wheel_name,
+            package.depends,
+            package.missing,
+        )
+
+
 class SourcePackage:
     """
     Create a debian source package that can be built
     with dpkg-buildpackage from a python wheel
     """
 
-    def __init__(self, ctx, wheel: Wheel, output, extras=None):
+    __slots__ = (
+        "wheel",
+        "ctx",
+        "pyvers",
+        "name",
+        "version",
+        "homepage",
+        "description",
+        "extended_desc",
+        "license",
+        "arch",
+        "filename",
+        "root",
+        "src",
+        "debian",
+        "interpreter",
+        "depends",
+        "missing",
+        "bytecode",
+    )
+
+    def __init__(
+        self, ctx, wheel: Wheel, output, extras=None, deps: PythonDeps | None = None
+    ):
         self.wheel = wheel
         self.ctx = ctx
         self.pyvers = ctx.python_version
 
         # debian package name
-        self.name = suggest_name(ctx, wheel.name)
+        self.name = suggest_name(ctx, wheel.project_name)
 
         # debian package version
         self.version = ctx.version_template.format(
@@ -92,13 +208,19 @@ class SourcePackage:
         self.debian = self.root / "debian"
 
         # sync src directory with files from the wheel
-        sync(
-            str(wheel.extract_path),
-            str(self.root / self.src),
-            "sync",
-            create=True,
-            logger=dirsync_logger,
+        src = self.root / self.src
+        src.mkdir(parents=True, exist_ok=True)
+        with metrics.timer("sync", "wheels", wheel.wheel_name):
+            copied, deleted = sync_record(
+                wheel.extract_path, src, wheel.record, sync_manifest_path(self.root)
+            )
+        metrics.increment(
+            "bytes_copied",
+            sum((src / p).stat().st_size for p in copied),
+            "wheels",
+            wheel.wheel_name,
         )
+        metrics.increment("files_deleted", len(deleted), "wheels", wheel.wheel_name)
 
         self.interpreter = "python" if self.pyvers.major == 2 else "python3"
 
@@ -110,31 +232,62 @@ class SourcePackage:
             if vrange.min:
                 self.depends.append(f"{self.interpreter} (>= {vrange.min}~)")
 
-        deps, missing = search_python_deps(ctx, wheel, extras)
-        self.depends.extend(deps)
+        if deps is None:
+            deps = resolve_python_deps(ctx, wheel, extras)
+        self.depends.extend(deps.depends)
         self.depends.extend(ctx.depends)
 
-        # write unsatisfied requirements in missing.txt
-        (self.root / "missing.txt").write_text("\n".join(missing) + "\n")
+        # write unsatisfied requirements in missing.txt, sorted since
+        # the file is part of the digest
+        self.missing = sorted(deps.missing)
+        write_if_changed(self.root / "missing.txt", "\n".join(self.missing) + "\n")
+        write_wheel_descriptor(
+            self.root,
+            wheel.wheel_name,
+            wheel.path.stat().st_size if wheel.path else 0,
+        )
+
+        # bytecode of modules is shipped in the package, see compile_bytecode
+        self.bytecode = False
 
     def install_console_scripts(self) -> None:
         output_path = self.root / "entrypoints"
         output_path.mkdir(exist_ok=True)
         for entrypoint in self.wheel.entrypoints:
             template = environment.get_template("entrypoint")
-            script_path = str(output_path / entrypoint.name)
-            template.stream(pyvers=self.pyvers, entrypoint=entrypoint).dump(script_path)
+            write_if_changed(
+                output_path / entrypoint.name,
+                template.render(pyvers=self.pyvers, entrypoint=entrypoint),
+            )
+
+    @property
+    def install_path(self) -> str:
+        """Install path of wheel modules"""
+        if self.pyvers.major == 2:
+            return "/usr/lib/python2.7/dist-packages/"
+        return "/usr/lib/python3/dist-packages/"
+
+    def compile_bytecode(self) -> None:
+        """
+        Byte-compile modules when ctx.precompile is set, so that they are
+        not compiled by postinst when the package is installed
+        """
+        src = self.root / self.src
+        manifest_path = bytecode_manifest_path(self.root)
+        if not self.ctx.precompile:
+            remove_compiled_bytecode(src, manifest_path)
+            return
+        recorded = {path for path, _, _ in self.wheel.record.iter_entries()}
+        with metrics.timer("compile", "wheels", self.wheel.wheel_name):
+            self.bytecode = compile_bytecode(
+                src, self.pyvers, self.install_path, manifest_path, recorded
+            )
 
     def install(self):
         """Generate debian/install"""
 
         install = set()
-
-        # wheel modules install path
-        if self.pyvers.major == 2:
-            destination_path = "/usr/lib/python2.7/dist-packages/"
-        else:
-            destination_path = "/usr/lib/python3/dist-packages/"
+        destination_path = self.install_path
 
         for absolute_source_path in (self.root / self.src).iterdir():
             source_path = absolute_source_path.relative_to(self.root)
@@ -151,7 +304,7 @@ class SourcePackage:
         for script in self.wheel.record.scripts:
             install.add(f"{self.src / script} /usr/bin")
 
-        (self.debian / "install").write_text("\n".join(install))
+        write_if_changed(self.debian / "install", "\n".join(sorted(install)))
 
     def rules(self):
         """Generate debian/rules"""
@@ -212,8 +365,13 @@ class SourcePackage:
         if not self.debian.exists():
             self.debian.mkdir(parents=True)
 
+        # debian/control lists shared libs dependencies
+        self.search_shlibs_deps()
+
+        # postinst and prerm depend on shipped bytecode
+        self.compile_bytecode()
+        self.dump_template("changelog", date=changelog_date())
         for template in [
-            "changelog",
             "control",
             "compat",
             "postinst",
@@ -225,17 +383,54 @@ class SourcePackage:
         self.rules()
         self.install()
         self.copyright()
-
-        # dpkg-shlibdeps won't work without debian/control
-        self.search_shlibs_deps()
-
-        # re-generate debian/control with deps found by dpkg-shlibdeps
-        self.dump_template("control")
+        self.digest()
 
     def dump_template(self, template_name, **kwargs):
         template = environment.get_template(template_name)
-        output_path = str(self.debian / template_name)
-        template.stream(package=self, ctx=self.ctx, **kwargs).dump(output_path)
+        write_if_changed(
+            self.debian / template_name,
+            template.render(package=self, ctx=self.ctx, **kwargs),
+        )
+
+    def digest(self) -> str:
+        """
+        Compute a digest of the content of the source package, and save it
+        next to it (<root>.digest). The file is only written when the digest
+        changes, so packages built before it was written are up to date.
+        Files copied from the wheel are identified by their RECORD hash,
+        files written by dpkg-buildpackage in debian/ are ignored, only the
+        names of bytecode files are hashed.
+        """
+        hashes = {path: digest for path, digest, _ in self.wheel.record.iter_entries()}
+        src = self.root / self.src
+        paths = [self.root / "missing.txt"]
+        paths.extend(self.debian / name for name in GENERATED_DEBIAN_FILES)
+        for directory in (src, self.root / "entrypoints"):
+            for parent, dirnames, filenames in os.walk(directory):
+                dirnames.sort()
+                paths.extend(Path(parent) / name for name in sorted(filenames))
+
+        sha = hashlib.sha256()
+        for path in paths:
+            if not path.exists() and not path.is_symlink():
+                continue
+            relative_path = path.relative_to(self.root)
+            record_path = str(path.relative_to(src)) if path.is_relative_to(src) else ""
+            if path.is_symlink():
+                content = f"-> {os.readlink(path)}"
+            elif hashes.get(record_path):
+                content = hashes[record_path]
+            elif path.parent.name == "__pycache__":
+                # bytecode is derived from modules, which are already hashed
+                content = "bytecode"
+            else:
+                content = hashlib.sha256(path.read_bytes()).hexdigest()
+            executable = os.access(path, os.X_OK)
+            sha.update(f"{relative_path}\0{executable:d}\0{content}\n".encode())
+
+        digest = sha.hexdigest()
+        write_if_changed(digest_path(self.root), digest + "\n")
+        return digest
 
     def fix_shebangs(self):
         files = [self.root / self.src / x for x in self.wheel.record.scripts]
@@ -246,78 +441,208 @@ class SourcePackage:
                 content = content.split("\n")
                 content[0] = shebang
                 content = "\n".join(content)
-                with file.open("w") as g:
-                    g.write(content)
+                write_if_changed(file, content)
+
+    def shlibs_cache_key(self, lib: str) -> str:
+        """Cache key of a shared lib: its hash from RECORD and the package arch"""
+        digest = self.wheel.record.hash(lib)
+        if digest is None:
+            content = (self.root / self.src / lib).read_bytes()
+            digest = f"sha256={hashlib.sha256(content).hexdigest()}"
+        return f"{SHLIBS_CACHE_VERSION}:{self.arch}:{digest}"
 
     def search_shlibs_deps(self):
         """
-        Search packages providing shared libs dependencies
-        :return: List of packages providing those libs
+        Search packages providing shared libs dependencies.
+        Results are cached per shared lib, only libs that
+        were never seen before are scanned.
         """
         shlibdeps = set()
-        missing_libs = set()
-
-        if self.wheel.record.lib_dirs:
-            args = (
-                ["dpkg-shlibdeps"]
-                + ["-l" + str(self.src / x) for x in self.wheel.record.lib_dirs]
-                + [str(self.src / x) for x in self.wheel.record.libs]
-            )
-            output, _ = shell(args, cwd=self.root)
-            missing_libs.update(DPKG_SHLIBS_RE.findall(output, re.MULTILINE))
-
-        if missing_libs:
-            logger.info(
-                "dpkg-shlibdeps reported the following missing "
-                "shared libs dependencies: %s",
-                missing_libs,
-            )
-
-            # search packages providing those libs
-            for lib in missing_libs:
-                output, _ = shell(["apt-file", "search", lib, "-a", self.arch])
-                packages = set(APT_FILE_RE.findall(output))
+        # packages providing missing shared libs, by soname
+        missing_libs = {}
+
+        uncached = []
+        for lib in self.wheel.record.libs:
+            entry = shlibs_cache.get(self.shlibs_cache_key(lib))
+            if entry is None:
+                uncached.append(lib)
+            else:
+                metrics.increment("shlibs_cache_hits", 1, "wheels", self.wheel.wheel_name)
+                missing_libs.update(entry["missing"])
 
-                # remove dbg packages
-                packages = [p for p in packages if p[-3:] != "dbg"]
+        if uncached:
+            missing_libs.update(self.scan_shlibs(uncached))
 
-                if not len(packages):
-                    logger.warning("did not find a package providing %s", lib)
-                else:
-                    # we pick the package with the shortest name
-                    packages = sorted(packages, key=len)
-                    shlibdeps.add(packages[0])
+        for lib, packages in sorted(missing_libs.items()):
+            if not len(packages):
+                logger.warning("did not find a package providing %s", lib)
+            else:
+                # we pick the package with the shortest name
+                shlibdeps.add(packages[0])
 
-                if len(packages) > 1:
-                    logger.warning(
-                        f"several packages providing {lib}: {packages}, picking "
-                        f"{packages[0]}, edit debian/control to use another one."
-                    )
+            if len(packages) > 1:
+                logger.warning(
+                    f"several packages providing {lib}: {packages}, picking "
+                    f"{packages[0]}, edit debian/control to use another one."
+                )
 
         if shlibdeps:
             logger.info(f"detected dependencies: {shlibdeps}")
 
         self.depends = list(set(self.depends) | shlibdeps)
 
+    def scan_shlibs(self, libs: List[str]) -> Dict[str, List[str]]:
+        """
+        Search the sonames needed by shared libs in the system and in the
+        wheel, and packages providing missing ones with apt-file
+        :return: Candidate packages by missing soname
+        """
+        src = self.root / self.src
+        lib_dirs = [src / x for x in self.wheel.record.lib_dirs]
 
-def convert_wheels(
-    settings: Settings,
-    output_directory: Path,
-    wheel_paths: List[Path],
-) -> List[SourcePackage]:
-    if output_directory.exists() is True and output_directory.is_dir() is False:
-        logger.error(f"{output_directory} is not a directory")
-        return []
+        def scan(lib):
+            path = src / lib
+            elf = read_elf(path)
+            if elf is None:
+                return (), []
+            return elf.needed, find_missing_libs(path, elf, lib_dirs, self.arch)
 
-    output_directory.mkdir(exist_ok=True, parents=True)
+        with metrics.timer("shlibs_scan", "wheels", self.wheel.wheel_name):
+            with ThreadPoolExecutor() as executor:
+                results = dict(zip(libs, executor.map(scan, libs)))
+
+        missing = {soname for _, sonames in results.values() for soname in sonames}
+        if missing:
+            logger.info("the following shared libs dependencies are missing: %s", missing)
+
+        # search packages providing those libs
+        candidates = {lib: self.search_lib_packages(lib) for lib in sorted(missing)}
+
+        for lib, (needed, sonames) in results.items():
+            entry = {
+                "needed": list(needed),
+                "missing": {x: candidates[x] for x in sorted(sonames)},
+            }
+            shlibs_cache.set(self.shlibs_cache_key(lib), entry)
+
+        return candidates
+
+    def search_lib_packages(self, lib: str) -> List[str]:
+        """:return: Packages providing a shared lib, shortest name first"""
+        output, _ = shell(["apt-file", "search", lib, "-a", self.arch])
+        packages = set(APT_FILE_RE.findall(output))
 
+        # remove dbg packages
+        return sorted((p for p in packages if p[-3:] != "dbg"), key=lambda p: (len(p), p))
+
+
+def read_wheels(wheel_paths: List[Path]) -> List[WheelInfo]:
+    """Read wheels metadata from the catalog, without unpacking them"""
     if wheel_paths:
-        logger.task("Unpacking %s wheels", len(wheel_paths))
+        logger.task("Reading %s wheels", len(wheel_paths))
+    with Catalog() as catalog:
+        return catalog.read_wheels(wheel_paths)
 
-    wheels = []
-    for file in wheel_paths:
-        wheel = parse_wheel(file)
-        ctx = settings.get_ctx(wheel.wheel_name)
+
+def tags_score(ctx, wheel: WheelInfo) -> Tuple[int, int]:
+    """
+    How closely the tags of a wheel match a context, higher is better:
+    wheels built for the exact python version, then wheels built for the
+    context platform, come before generic ones
+    """
+    python_version = f"{ctx.python_version.major}{ctx.python_version.minor}"
+    python_tags = wheel.python_tag.split(".")
+    python_score = int(f"cp{python_version}" in python_tags) + int(
+        f"py{python_version}" in python_tags
+    )
+    if wheel.platform_tag == "any":
+        platform_score = 0
+    elif ctx.platform_machine in wheel.platform_tag:
+        platform_score = 1
+    else:
+        platform_score = -1
+    return platform_score, python_score
+
+
+def tags_compatible(ctx, wheel: WheelInfo) -> bool:
+    """
+    Whether a wheel can be installed in a context: built for any platform
+    or for the context one, and, when only built for cpython, for the
+    context python version (or an older one for abi3 wheels)
+    """
+    if tags_score(ctx, wheel)[0] < 0:
+        return False
+    versions = [CPYTHON_TAG_RE.match(tag) for tag in wheel.python_tag.split(".")]
+    if not versions or not all(versions):
+        return True
+    python_version = (ctx.python_version.major, ctx.python_version.minor)
+    for match in versions:
+        version = (int(match[1]), int(match[2]))
+        if version == python_version:
+            return True
+        if wheel.abi_tag == "abi3" and version[0] == python_version[0]:
+            if version <= python_version:
+                return True
+    return False
+
+
+def parse_wheel_version(wheel: WheelInfo):
+    try:
+        return parse(wheel.version)
+    except InvalidVersion:
+        return parse("0")
+
+
+def select_wheel_per_project(
+    settings: Settings,
+    wheels: List[WheelInfo],
+    target: Target | None = None,
+    selection: str = "newest",
+) -> List[WheelInfo]:
+    """
+    Keep one wheel per project, so that several versions
+    of a project do not produce the same debian package
+    :param selection: newest to keep the newest version, best-match to keep
+    the wheel whose tags best match the context, see tags_score. Wheels that
+    cannot be installed in the context are only kept when no wheel of their
+    project can, see tags_compatible
+    """
+    projects = {}
+    for wheel in wheels:
+        projects.setdefault(wheel.name, []).append(wheel)
+
+    selected = []
+    for candidates in projects.values():
+        ctx = settings.get_ctx(candidates[0].wheel_name, target)
+
+        def key(wheel):
+            version, score = parse_wheel_version(wheel), tags_score(ctx, wheel)
+            return (version, score) if selection == "newest" else (score, version)
+
+        compatible = [w for w in candidates if tags_compatible(ctx, w)]
+        best = max(compatible or candidates, key=key)
+        for wheel in candidates:
+            if wheel is not best:
+                logger.info(f"ignoring {wheel.wheel_name}, {best.wheel_name} is selected")
+        selected.append(best)
+
+    return [wheel for wheel in wheels if any(wheel is w for w in selected)]
+
+
+def select_supported_wheels(
+    settings: Settings,
+    wheels: List[WheelInfo],
+    target: Target | None = None,
+    selection: str = "all",
+) -> List[WheelInfo]:
+    """
+    Keep wheels compatible with the configured python version
+    :param selection: Wheels to keep when a project has several ones: all,
+    or one of the selections of select_wheel_per_project
+    """
+    supported = []
+    for wheel in wheels:
+        ctx = settings.get_ctx(wheel.wheel_name, target)
 
         if not wheel.cpython_supported:
             # ignore wheels that are not cpython compatible
@@ -332,14 +657,139 @@ def convert_wheels(
             continue
 
         logger.info("%s", wheel.wheel_name)
-        wheels.append(wheel)
+        supported.append(wheel)
 
-    packages = []
-    for wheel in wheels:
-        logger.task(f"Converting wheel {wheel}")
-        ctx = settings.get_ctx(wheel.wheel_name)
-        package = SourcePackage(ctx, wheel, output_directory, extras=wheels)
-        package.create()
-        packages.append(package)
+    if selection != "all":
+        supported = select_wheel_per_project(settings, supported, target, selection)
+
+    return supported
+
+
+def convert_wheels(
+    settings: Settings,
+    output_directory: Path,
+    wheel_paths: List[Path],
+    extra_paths: List[Path] | None = None,
+    selection: str = "all",
+) -> List[PackageInfo]:
+    """
+    Convert wheels to debian source packages, see iter_convert_wheels
+    """
+    return list(
+        iter_convert_wheels(
+            settings, output_directory, wheel_paths, extra_paths, selection
+        )
+    )
 
-    return packages
+
+def iter_convert_wheels(
+    settings: Settings,
+    output_directory: Path,
+    wheel_paths: List[Path],
+    extra_paths: List[Path] | None = None,
+    selection: str = "all",
+) -> Iterator[PackageInfo]:
+    """
+    Convert wheels to debian source packages, packages are yielded as soon
+    as they are generated, and the state of their wheel is released
+    :param extra_paths: Wheels that are not converted, but whose packages
+    are considered to satisfy requirements of converted wheels
+    :param selection: all, newest or best-match, see select_supported_wheels
+    """
+    if output_directory.exists() is True and output_directory.is_dir() is False:
+        logger.error(f"{output_directory} is not a directory")
+        return
+
+    if selection not in WHEEL_SELECTIONS:
+        logger.error(f"Unsupported wheel selection: {selection}")
+        return
+
+    # wheels are read once, and then converted for every target,
+    # only wheels that are converted are unpacked
+    wheels = read_wheels(wheel_paths)
+    with Catalog() as catalog:
+        extras = catalog.read_wheels(extra_paths or [])
+
+    if not settings.targets:
+        yield from iter_convert_target(
+            settings, output_directory, wheels, extras=extras, selection=selection
+        )
+        return
+
+    for target in settings.targets:
+        logger.task(f"Converting wheels for target {target.name}")
+        yield from iter_convert_target(
+            settings,
+            output_directory / target.name,
+            wheels,
+            target,
+            extras,
+            selection,
+        )
+
+
+def resolve_wheels(
+    settings: Settings,
+    output_directory: Path,
+    wheel_paths: List[Path],
+    graph_format: str = "json",
+    selection: str = "all",
+) -> None:
+    """
+    Write the dependency graph of wheels in output directory
+    :param graph_format: json or dot
+    :param selection: all, newest or best-match, see select_supported_wheels
+    """
+    if selection not in WHEEL_SELECTIONS:
+        logger.error(f"Unsupported wheel selection: {selection}")
+        return
+
+    wheels = read_wheels(wheel_paths)
+    for target in settings.targets or [None]:
+        directory = output_directory / target.name if target else output_directory
+        graph = resolve_graph(
+            settings,
+            select_supported_wheels(settings, wheels, target, selection),
+            target,
+        )
+        directory.mkdir(exist_ok=True, parents=True)
+        graph_path = directory / f"dependency-graph.{graph_format}"
+        graph.save(graph_path)
+        logger.info(f"dependency graph written to {graph_path}")
+
+
+def iter_convert_target(
+    settings: Settings,
+    output_directory: Path,
+    wheels: List[WheelInfo],
+    target: Target | None = None,
+    extras: List[WheelInfo] | None = None,
+    selection: str = "all",
+) -> Iterator[PackageInfo]:
+    output_directory.mkdir(exist_ok=True, parents=True)
+
+    wheels = select_supported_wheels(settings, wheels, target, selection)
+
+    # dependencies are computed once for all wheels, and saved
+    # so that packages can be built in topological order
+    graph = resolve_graph(settings, wheels, target, extras)
+    save_graph(graph, output_directory / GRAPH_FILENAME)
+
+    wheels_by_name = {wheel.wheel_name: wheel for wheel in wheels}
+
+    for wheel_name in graph.order():
+        wheel = wheels_by_name[wheel_name]
+        logger.task(f"Converting wheel {wheel}")
+        ctx = settings.get_ctx(wheel.wheel_name, target)
+        with (
+            logging.log_context(wheel_name),
+            metrics.timer("convert", "wheels", wheel_name),
+        ):
+            if not isinstance(wheel, Wheel):
+                wheel = parse_wheel(wheel.path, sha256=wheel.sha256)
+            package = SourcePackage(
+                ctx, wheel, output_directory, deps=graph.nodes[wheel_name].deps
+            )
+            package.create()
+        # only the descriptor outlives the conversion
+        yield PackageInfo.from_source_package(package)
@@ -3,7 +3,9 @@ import re
 from packaging.version import parse
 
 from wheel2deb import logger as logging
-from wheel2deb.apt import search_packages
+from wheel2deb.apt import Package, search_packages
+from wheel2deb.graph import PythonDeps
+from wheel2deb.pydist import normalize_name
 
 logger = logging.getLogger(__name__)
 
@@ -57,8 +59,9 @@ def suggest_name(ctx, wheel_name):
 
     prefix = {2: "python", 3: "python3"}[ctx.python_version.major]
 
-    if wheel_name in ctx.map:
-        return prefix + "-" + ctx.map[wheel_name]
+    mapping = {normalize_name(k): v for k, v in ctx.map.items()}
+    if normalize_name(wheel_name) in mapping:
+        return prefix + "-" + mapping[normalize_name(wheel_name)]
 
     basename = re.compile("[^A-Za-z0-9.]+").sub("-", wheel_name)
     basename = basename.replace("python-", "")
@@ -72,16 +75,41 @@ def suggest_names(ctx, wheel_names):
         yield suggest_name(ctx, wheel_name)
 
 
+def index_wheels(wheels):
+    """
+    Index wheels by normalized name, the index holds compact
+    copies of wheels, see WheelInfo.compact
+    :return: dict of lists of wheels
+    """
+    index = {}
+    for wheel in wheels:
+        index.setdefault(wheel.name, []).append(wheel.compact())
+    return index
+
+
 def search_python_deps(ctx, wheel, extras=None):
     """
     Search debian python dependencies
     :param wheel: Python wheel to guess dependencies for
     :param extras: List of wheels. Dependencies provided by this list will be
     considered satisfied
-    :return: list of debian packages
+    :return: list of debian packages and list of missing requirements
     """
+    deps = resolve_python_deps(ctx, wheel, extras)
+    return deps.depends, deps.missing
 
-    extras = extras or []
+
+def resolve_python_deps(ctx, wheel, extras=None) -> PythonDeps:
+    """
+    Search debian python dependencies and the candidates satisfying them
+    :param wheel: Python wheel to guess dependencies for
+    :param extras: List of wheels, or wheels indexed by name with index_wheels.
+    Dependencies provided by those wheels will be considered satisfied
+    :return: PythonDeps object
+    """
+
+    if not isinstance(extras, dict):
+        extras = index_wheels(extras or [])
 
     # keep only requirements that match the environment
     # https://www.python.org/dev/peps/pep-0508/#environment-markers
@@ -94,8 +122,10 @@ def search_python_deps(ctx, wheel, extras=None):
     )
 
     # filter out ignored requirements
+    ignored = {normalize_name(name) for name in ctx.ignore_requirements}
+
     def is_required(r):
-        if r.name in ctx.ignore_requirements:
+        if normalize_name(r.name) in ignored:
             logger.warning(f"ignoring requirement {str(r)}")
             return False
         else:
@@ -104,26 +134,30 @@ def search_python_deps(ctx, wheel, extras=None):
     # remove ignored requirements
     requirements = list(filter(is_required, requirements))
 
-    # remove duplicates
-    requirements = list(set(requirements))
+    # remove duplicates, keeping the order of requirements so that
+    # generated files do not depend on the hash seed
+    requirements = list(dict.fromkeys(requirements))
 
-    # translate requirements to debian package names
-    # and search them in apt cache
+    # translate requirements to debian package names, from names as
+    # written (zope.interface), and search them in apt cache
     debnames = list(suggest_names(ctx, [r.name for r in requirements]))
     results = search_packages(debnames, ctx.arch)
 
-    candidates = {r.name: [] for r in requirements}
+    # candidates are indexed by normalized name, like extras
+    candidates = {normalize_name(r.name): [] for r in requirements}
     for res, req in zip(results, requirements):
         if res:
             # add debian package to candidates list
-            candidates[req.name].append(res)
-        for extra in extras:
-            if extra.name == req.name and extra.version_supported(ctx.python_version):
+            candidates[normalize_name(req.name)].append(res)
+        for extra in extras.get(normalize_name(req.name), []):
+            if extra.version_supported(ctx.python_version):
                 # add extra wheel to candidates list
                 candidates[extra.name].append(extra)
 
     debian_deps = []
     missing_deps = []
+    satisfying_wheels = []
+    satisfying_packages = []
     for pdep, req in zip(debnames, requirements):
 
         def check(x):
@@ -136,16 +170,22 @@ def search_python_deps(ctx, wheel, extras=None):
             )
 
         version = None
-        for candidate in candidates[req.name]:
+        for candidate in candidates[normalize_name(req.name)]:
             if check(candidate):
                 if (version and parse(candidate.version) < parse(version)) or not version:
                     version = candidate.version
+                if isinstance(candidate, Package):
+                    satisfying_packages.append(str(candidate))
+                else:
+                    satisfying_wheels.append(candidate.wheel_name)
 
         if not version:
             logger.error(f"could not find a candidate for requirement {req}")
             missing_deps.append(str(req))
 
-        if req.name in ctx.ignore_specifiers:
+        if normalize_name(req.name) in {
+            normalize_name(name) for name in ctx.ignore_specifiers
+        }:
             logger.warning(f"ignoring specifiers for dependency {req.name}")
             debian_deps.append(pdep)
         elif not ctx.ignore_upstream_versions and len(req.specifier):
@@ -156,7 +196,12 @@ def search_python_deps(ctx, wheel, extras=None):
         else:
             debian_deps.append(pdep)
 
-    return debian_deps, missing_deps
+    return PythonDeps(
+        depends=debian_deps,
+        missing=missing_deps,
+        wheels=sorted(set(satisfying_wheels)),
+        packages=sorted(set(satisfying_packages)),
+    )
 
 
 def get_dependency_string(package_name, operator, version):
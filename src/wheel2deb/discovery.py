@@ -0,0 +1,113 @@
+import fnmatch
+import os
+import re
+from pathlib import Path
+from typing import Iterable, Iterator, List
+
+from wheel2deb.pydist import normalize_name
+
+# {name}-{version}(-{build})?-{python}-{abi}-{platform}.whl
+WHEEL_FILENAME_RE = re.compile(
+    r"^(?P<name>[^-]+)-(?P<version>[^-]+)(?:-\d[^-]*)?-[^-]+-[^-]+-[^-]+\.whl$"
+)
+
+GLOB_CHARS = frozenset("*?[")
+
+
+def iter_wheels(search_paths: Iterable[Path], recursive: bool = False) -> Iterator[Path]:
+    """
+    List python wheels in search paths
+    :param recursive: Also search subdirectories, symlinks to directories
+    are not followed
+    """
+    directories = [str(path) for path in search_paths]
+    while directories:
+        try:
+            entries = os.scandir(directories.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.endswith(".whl") and entry.is_file():
+                    yield Path(entry.path)
+                elif recursive and entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.path)
+
+
+class WheelMatcher:
+    """
+    Match wheels against a list of patterns. A pattern is either:
+    - a wheel filename, or a glob matching wheel filenames (foo-*.whl)
+    - a project name, optionally with a version (foo, foo==1.0), both
+      can be globs (foo-*, foo==1.*), names are normalized
+    - a regular expression searched in wheel filenames, prefixed with re:
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        # patterns without globs are looked up in sets
+        self.filenames = set()
+        self.projects = set()
+        filename_regexes = []
+        project_regexes = []
+
+        for pattern in patterns:
+            if pattern.startswith("re:"):
+                filename_regexes.append(pattern[3:])
+            elif pattern.endswith(".whl"):
+                if GLOB_CHARS.isdisjoint(pattern):
+                    self.filenames.add(pattern)
+                else:
+                    filename_regexes.append("^" + fnmatch.translate(pattern))
+            else:
+                name, _, version = pattern.partition("==")
+                project = f"{normalize_name(name)}=={version or '*'}"
+                if GLOB_CHARS.isdisjoint(project):
+                    self.projects.add(project)
+                else:
+                    project_regexes.append(fnmatch.translate(project))
+
+        # all regexes are compiled to a single alternation
+        self.filename_re = _compile(filename_regexes)
+        self.project_re = _compile(project_regexes)
+
+    def match(self, filename: str) -> bool:
+        if filename in self.filenames:
+            return True
+        if self.filename_re and self.filename_re.search(filename):
+            return True
+        if match := WHEEL_FILENAME_RE.match(filename):
+            name, version = normalize_name(match["name"]), match["version"]
+            project = f"{name}=={version}"
+            if f"{name}==*" in self.projects or project in self.projects:
+                return True
+            if self.project_re and self.project_re.match(project):
+                return True
+        return False
+
+
+def _compile(regexes: List[str]) -> re.Pattern | None:
+    if not regexes:
+        return None
+    return re.compile("|".join(f"(?:{regex})" for regex in regexes))
+
+
+def find_wheels(
+    search_paths: Iterable[Path],
+    include_wheels: Iterable[str] | None = None,
+    exclude_wheels: Iterable[str] | None = None,
+    recursive: bool = False,
+) -> List[Path]:
+    """
+    List wheels of search paths matching include patterns and not matching
+    exclude patterns, see WheelMatcher. All wheels are included by default.
+    :return: Wheel paths sorted by filename
+    """
+    include = WheelMatcher(include_wheels) if include_wheels else None
+    exclude = WheelMatcher(exclude_wheels) if exclude_wheels else None
+    wheels = [
+        path
+        for path in iter_wheels(search_paths, recursive)
+        if (include is None or include.match(path.name))
+        and (exclude is None or not exclude.match(path.name))
+    ]
+    return sorted(wheels, key=lambda x: x.name)
@@ -0,0 +1,191 @@
+import glob
+import mmap
+import os
+import struct
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Tuple
+
+import attr
+
+from wheel2deb import logger as logging
+
+logger = logging.getLogger(__name__)
+
+ELF_MAGIC = b"\x7fELF"
+
+SHT_DYNAMIC = 6
+
+DT_NULL = 0
+DT_NEEDED = 1
+DT_RPATH = 15
+DT_RUNPATH = 29
+
+# struct formats by ELF class: file header (after e_ident),
+# section header, dynamic entry
+ELF_FORMATS = {
+    1: ("HHIIIIIHHHHHH", "IIIIIIIIII", "iI"),
+    2: ("HHIQQQIHHHHHH", "IIQQQQIIQQ", "qQ"),
+}
+
+# debian architecture to multiarch tuple
+MULTIARCH_TUPLES = {
+    "amd64": "x86_64-linux-gnu",
+    "i386": "i386-linux-gnu",
+    "i686": "i386-linux-gnu",
+    "armhf": "arm-linux-gnueabihf",
+    "arm64": "aarch64-linux-gnu",
+}
+
+LD_SO_CONF = "/etc/ld.so.conf"
+
+
+@attr.s(frozen=True)
+class ElfFile:
+    """
+    Dynamic linking information of an ELF shared object
+    """
+
+    # class, data encoding and machine: a shared object
+    # can only be linked with objects of the same abi
+    abi = attr.ib(type=tuple)
+    needed = attr.ib(factory=tuple)
+    rpath = attr.ib(factory=tuple)
+    runpath = attr.ib(factory=tuple)
+
+
+def read_elf(path: Path) -> ElfFile | None:
+    """
+    Read DT_NEEDED, DT_RPATH and DT_RUNPATH entries of an ELF file
+    :return: None when path is not a valid ELF file
+    """
+    try:
+        with (
+            open(path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m,
+        ):
+            return _parse_elf(m)
+    except (OSError, ValueError, struct.error) as e:
+        logger.debug(f"failed to read {path}: {e}")
+        return None
+
+
+def _parse_elf(data) -> ElfFile | None:
+    if data[:4] != ELF_MAGIC or data[4] not in ELF_FORMATS or data[5] not in (1, 2):
+        return None
+    elf_class = data[4]
+    byte_order = "<" if data[5] == 1 else ">"
+    header_format, section_format, dynamic_format = (
+        struct.Struct(byte_order + f) for f in ELF_FORMATS[elf_class]
+    )
+
+    header = header_format.unpack_from(data, 16)
+    machine, shoff, shentsize, shnum = header[1], header[5], header[10], header[11]
+    abi = (elf_class, data[5], machine)
+
+    sections = [
+        section_format.unpack_from(data, shoff + i * shentsize) for i in range(shnum)
+    ]
+    entries = {DT_NEEDED: [], DT_RPATH: [], DT_RUNPATH: []}
+    for section in sections:
+        if section[1] != SHT_DYNAMIC:
+            continue
+        # sh_link of the dynamic section is the index of its string table
+        strtab_offset = sections[section[6]][4]
+        offset, end = section[4], section[4] + section[5]
+        while offset < end:
+            tag, value = dynamic_format.unpack_from(data, offset)
+            offset += dynamic_format.size
+            if tag == DT_NULL:
+                break
+            if tag in entries:
+                start = strtab_offset + value
+                entries[tag].append(data[start : data.find(b"\0", start)].decode())
+
+    def split(paths):
+        return tuple(p for x in paths for p in x.split(":") if p)
+
+    return ElfFile(
+        abi,
+        tuple(entries[DT_NEEDED]),
+        split(entries[DT_RPATH]),
+        split(entries[DT_RUNPATH]),
+    )
+
+
+def read_abi(path: str) -> tuple | None:
+    """:return: ELF class, data encoding and machine of a file"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read(20)
+    except OSError:
+        return None
+    if len(data) < 20 or data[:4] != ELF_MAGIC or data[5] not in (1, 2):
+        return None
+    byte_order = "<" if data[5] == 1 else ">"
+    return data[4], data[5], struct.unpack_from(byte_order + "H", data, 18)[0]
+
+
+def _ld_so_conf_dirs(path: str, depth: int = 0) -> List[str]:
+    directories = []
+    try:
+        lines = Path(path).read_text().splitlines()
+    except OSError:
+        return directories
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if line.startswith("include") and depth < 8:
+            for pattern in line.split()[1:]:
+                pattern = os.path.join(os.path.dirname(path), pattern)
+                for include in sorted(glob.glob(pattern)):
+                    directories.extend(_ld_so_conf_dirs(include, depth + 1))
+        elif line:
+            directories.append(line)
+    return directories
+
+
+@lru_cache(maxsize=None)
+def system_lib_dirs(arch: str) -> Tuple[str, ...]:
+    """
+    Directories searched by the dynamic linker for libraries of an arch
+    :param arch: Debian architecture
+    """
+    directories = []
+    if multiarch := MULTIARCH_TUPLES.get(arch):
+        directories.extend([f"/lib/{multiarch}", f"/usr/lib/{multiarch}"])
+    directories.extend(_ld_so_conf_dirs(LD_SO_CONF))
+    directories.extend(["/lib", "/usr/lib"])
+    return tuple(d for d in dict.fromkeys(directories) if os.path.isdir(d))
+
+
+def find_library(soname: str, abi: tuple, directories) -> str | None:
+    """:return: Path of the first library named soname with a matching abi"""
+    for directory in directories:
+        path = os.path.join(directory, soname)
+        if read_abi(path) == abi:
+            return path
+    return None
+
+
+def find_missing_libs(
+    path: Path, elf: ElfFile, lib_dirs: List[Path], arch: str
+) -> List[str]:
+    """
+    Resolve the sonames needed by a shared object like the dynamic linker,
+    against its RPATH/RUNPATH, other directories of the wheel and the system
+    :param lib_dirs: Directories of the wheel holding shared libs
+    :return: Sonames that could not be found
+    """
+    origin = str(path.parent)
+    # DT_RPATH is ignored when DT_RUNPATH is set
+    run_paths = elf.runpath or elf.rpath
+    directories = [
+        *(p.replace("${ORIGIN}", origin).replace("$ORIGIN", origin) for p in run_paths),
+        *(str(d) for d in lib_dirs),
+        *system_lib_dirs(arch),
+    ]
+    return [
+        soname
+        for soname in elf.needed
+        if "/" not in soname and find_library(soname, elf.abi, directories) is None
+    ]
@@ -0,0 +1,187 @@
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import attr
+
+from wheel2deb import logger as logging
+from wheel2deb.metrics import metrics
+
+if TYPE_CHECKING:
+    from wheel2deb.context import Settings, Target
+
+logger = logging.getLogger(__name__)
+
+GRAPH_FILENAME = "dependency-graph.json"
+
+
+@attr.s(frozen=True)
+class PythonDeps:
+    """
+    Python dependencies of a wheel translated to debian
+    """
+
+    # debian dependency strings
+    depends = attr.ib(factory=list)
+    # requirements satisfied by no candidate
+    missing = attr.ib(factory=list)
+    # names of the wheels satisfying a requirement
+    wheels = attr.ib(factory=list)
+    # apt packages satisfying a requirement
+    packages = attr.ib(factory=list)
+
+
+@attr.s(frozen=True)
+class Node:
+    """
+    A wheel of the dependency graph
+    """
+
+    wheel_name = attr.ib(type=str)
+    # debian package name
+    package = attr.ib(type=str)
+    deps = attr.ib(type=PythonDeps)
+
+
+@attr.s
+class DependencyGraph:
+    """
+    Dependencies between the wheels of a run, and between those
+    wheels and the packages available in the apt cache
+    """
+
+    nodes: Dict[str, Node] = attr.ib(factory=dict)
+
+    def edges(self, wheel_name: str) -> List[str]:
+        """Wheels of the graph satisfying requirements of a wheel"""
+        return [w for w in self.nodes[wheel_name].deps.wheels if w in self.nodes]
+
+    def order(self) -> List[str]:
+        """
+        Sort wheels topologically, dependencies come first.
+        Cycles are broken deterministically.
+        """
+        ordered = []
+        visited = set()
+        for root in sorted(self.nodes):
+            if root in visited:
+                continue
+            visited.add(root)
+            stack = [(root, iter(self.edges(root)))]
+            while stack:
+                name, children = stack[-1]
+                for child in children:
+                    if child not in visited:
+                        visited.add(child)
+                        stack.append((child, iter(self.edges(child))))
+                        break
+                else:
+                    stack.pop()
+                    ordered.append(name)
+        return ordered
+
+    def merge(self, other: "DependencyGraph") -> None:
+        """
+        Add the nodes of another graph, replacing nodes of the same wheels,
+        and of other versions of their debian packages
+        """
+        packages = {node.package for node in other.nodes.values()}
+        self.nodes = {
+            name: node
+            for name, node in self.nodes.items()
+            if node.package not in packages
+        }
+        self.nodes.update(other.nodes)
+
+    def package_order(self) -> List[str]:
+        """Debian package names sorted topologically"""
+        return [self.nodes[name].package for name in self.order()]
+
+    def to_dict(self) -> dict:
+        return {
+            "wheels": {
+                name: {"package": node.package, **attr.asdict(node.deps)}
+                for name, node in sorted(self.nodes.items())
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, content: dict) -> "DependencyGraph":
+        graph = cls()
+        for name, fields in content["wheels"].items():
+            fields = dict(fields)
+            package = fields.pop("package")
+            graph.nodes[name] = Node(name, package, PythonDeps(**fields))
+        return graph
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2) + "\n"
+
+    def to_dot(self) -> str:
+        lines = ["digraph wheel2deb {"]
+        for name in self.order():
+            deps = self.nodes[name].deps
+            lines.append(f'  "{name}";')
+            for wheel_name in deps.wheels:
+                lines.append(f'  "{name}" -> "{wheel_name}";')
+            for package in deps.packages:
+                lines.append(f'  "{name}" -> "{package}" [style=dashed];')
+                lines.append(f'  "{package}" [shape=box];')
+            for requirement in deps.missing:
+                lines.append(f'  "{name}" -> "{requirement}" [color=red];')
+                lines.append(f'  "{requirement}" [shape=box, color=red];')
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, path: Path) -> None:
+        """Write graph to path, in DOT format if path ends with .dot, in JSON otherwise"""
+        path.write_text(self.to_dot() if path.suffix == ".dot" else self.to_json())
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["DependencyGraph"]:
+        if not path.is_file():
+            return None
+        try:
+            return cls.from_dict(json.loads(path.read_text()))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"ignoring invalid dependency graph {path}: {e}")
+            return None
+
+
+def save_graph(graph: DependencyGraph, path: Path) -> None:
+    """
+    Merge a graph into the one saved at path, so that it still lists the
+    wheels converted by previous runs (of other shards for instance)
+    """
+    saved = DependencyGraph.load(path) or DependencyGraph()
+    saved.merge(graph)
+    saved.save(path)
+
+
+def resolve_graph(
+    settings: "Settings", wheels, target: "Target | None" = None, extras=None
+) -> DependencyGraph:
+    """
+    Compute python dependencies of all wheels at once
+    :param wheels: List of wheels, dependencies provided by those wheels
+    will be considered satisfied
+    :param extras: List of wheels that are not part of the graph, but
+    that are also considered to satisfy dependencies
+    """
+    # the graph is loaded by build, which does not need the conversion stack
+    from wheel2deb.depends import index_wheels, resolve_python_deps, suggest_name
+
+    if wheels:
+        logger.task(f"Resolving dependencies of {len(wheels)} wheels")
+
+    extras = index_wheels([*wheels, *(extras or [])])
+    graph = DependencyGraph()
+    for wheel in wheels:
+        logger.info("%s", wheel.wheel_name)
+        ctx = settings.get_ctx(wheel.wheel_name, target)
+        with metrics.timer("resolve", "wheels", wheel.wheel_name):
+            deps = resolve_python_deps(ctx, wheel, extras)
+        graph.nodes[wheel.wheel_name] = Node(
+            wheel.wheel_name, suggest_name(ctx, wheel.project_name), deps
+        )
+    return graph
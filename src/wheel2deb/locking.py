@@ -0,0 +1,138 @@
+import os
+import socket
+import threading
+import uuid
+from pathlib import Path
+
+from wheel2deb import logger as logging
+
+logger = logging.getLogger(__name__)
+
+# seconds between two refreshes of the modification time of a held lock
+HEARTBEAT_INTERVAL = 15
+
+# locks that were not refreshed for that long are taken over
+STALE_TIMEOUT = 120
+
+
+class WorkLock:
+    """
+    Claim a piece of work, so that a single process works on it, even when
+    processes run on several hosts sharing a directory over NFS.
+
+    Locks are created with link(2), which is atomic over NFS unlike
+    O_EXCL on older clients. While a lock is held, a heartbeat thread
+    refreshes its modification time. Locks that were not refreshed for
+    stale_timeout seconds, or whose owner died on this host, are taken over.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        stale_timeout: float = STALE_TIMEOUT,
+        heartbeat_interval: float = HEARTBEAT_INTERVAL,
+    ):
+        self.path = path
+        self.stale_timeout = stale_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        self._stopped = threading.Event()
+        self._heartbeat = None
+        # time of the server holding the lock, see _link
+        self._now = 0.0
+
+    def read_owner(self) -> str | None:
+        try:
+            return self.path.read_text()
+        except OSError:
+            return None
+
+    def acquire(self) -> bool:
+        """:return: True if the lock was claimed by this process"""
+        claimed = self._link()
+        if not claimed and self._is_stale():
+            self._break()
+            claimed = self._link()
+
+        if claimed:
+            self._stopped.clear()
+            self._heartbeat = threading.Thread(target=self._refresh, daemon=True)
+            self._heartbeat.start()
+        return claimed
+
+    def release(self) -> None:
+        self._stopped.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+        if self.read_owner() == self.owner:
+            self.path.unlink(missing_ok=True)
+
+    def _link(self) -> bool:
+        tmp_path = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}")
+        tmp_path.write_text(self.owner)
+        try:
+            os.link(tmp_path, self.path)
+        except FileExistsError:
+            return False
+        except OSError:
+            # link may fail on NFS after succeeding on the server,
+            # the link count of the temporary file tells the truth
+            return tmp_path.stat().st_nlink == 2
+        finally:
+            # the temporary file is also used as a clock: its modification
+            # time was set by the server, like the one of the lock
+            self._now = tmp_path.stat().st_mtime
+            tmp_path.unlink()
+        return True
+
+    def _is_stale(self) -> bool:
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            # released in the meantime
+            return True
+        if self._now - mtime > self.stale_timeout:
+            return True
+
+        owner = self.read_owner() or ""
+        hostname, _, pid = owner.partition(":")
+        pid = pid.partition(":")[0]
+        if hostname == socket.gethostname() and pid.isdigit():
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                return True
+            except PermissionError:
+                pass
+        return False
+
+    def _break(self) -> None:
+        owner = self.read_owner()
+        if owner is None:
+            # released in the meantime
+            return
+        logger.warning(f"taking over stale lock {self.path} held by {owner}")
+        # renaming is atomic, a single process breaks a given lock
+        stale_path = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}.stale")
+        try:
+            os.rename(self.path, stale_path)
+        except FileNotFoundError:
+            return
+        if stale_path.read_text() != owner:
+            # the lock was claimed again in the meantime, give it back
+            try:
+                os.link(stale_path, self.path)
+            except FileExistsError:
+                pass
+        stale_path.unlink()
+
+    def _refresh(self) -> None:
+        while not self._stopped.wait(self.heartbeat_interval):
+            if self.read_owner() != self.owner:
+                logger.warning(f"lock {self.path} was taken over by another process")
+                return
+            try:
+                os.utime(self.path)
+            except OSError as e:
+                logger.warning(f"failed to refresh lock {self.path}: {e}")
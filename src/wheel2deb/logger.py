@@ -19,9 +19,15 @@
 #  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 #  DEALINGS IN THE SOFTWARE.
 
+import atexit
 import logging
+import queue
 import sys
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from logging import DEBUG, ERROR, INFO, WARNING
+from logging.handlers import QueueHandler, QueueListener
 
 import colorama
 
@@ -30,6 +36,9 @@ colorama.init(autoreset=True)
 SUMMARY = 100
 TASK = 101
 
+# name of the wheel or package the current thread is working on
+_context: ContextVar[str] = ContextVar("context", default="")
+
 
 class LogFilter(object):
     """
@@ -65,25 +74,73 @@ class CustomLogger(logging.getLoggerClass()):
             self._log(TASK, msg, args, **kwargs)
 
 
-class CounterStreamHandler(logging.StreamHandler):
+class ContextQueueHandler(QueueHandler):
     """
-    A StreamHandler which stores a call counter for each level
-    Not thread-safe !
+    A QueueHandler which stores the context of the emitting thread
+    in records, see log_context
     """
 
-    counters = {}
+    def prepare(self, record):
+        if not hasattr(record, "context"):
+            record.context = _context.get()
+        return super().prepare(record)
+
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+class CounterQueueHandler(ContextQueueHandler):
+    """
+    A ContextQueueHandler which stores a call counter for each level.
+    Records are counted in the emitting thread, so counters are up to date
+    even if the listener thread did not output them yet. Thread-safe.
+    """
+
+    counters = {}
+    collectors = []
+    lock = threading.Lock()
 
     def emit(self, record):
-        level = record.levelno
-        if level not in self.counters:
-            self.counters[level] = 0
-        self.counters[level] += 1
+        if not hasattr(record, "context"):
+            record.context = _context.get()
+        with self.lock:
+            self.counters[record.levelno] = self.counters.get(record.levelno, 0) + 1
+            for collector in self.collectors:
+                collector.add(record)
         super().emit(record)
 
 
+class RecordCollector(object):
+    """
+    Collect messages of records by context, see collect_records
+    """
+
+    def __init__(self, level=WARNING):
+        self.level = level
+        # {context: [(levelno, message)]}
+        self.messages = {}
+
+    def add(self, record):
+        # summaries and tasks have levels above CRITICAL
+        if self.level <= record.levelno <= logging.CRITICAL:
+            self.messages.setdefault(record.context, []).append(
+                (record.levelno, record.getMessage().strip())
+            )
+
+    def get(self, context, level):
+        """:return: Messages of a context logged with exactly that level"""
+        with CounterQueueHandler.lock:
+            return [m for lvl, m in self.messages.get(context, []) if lvl == level]
+
+
+class ContextFilter(object):
+    """
+    A log filter which adds the context of a record as a message prefix
+    """
+
+    def filter(self, record):
+        context = getattr(record, "context", "")
+        record.context_prefix = f"[{context}] " if context else ""
+        return True
+
+
 class TrailingNewlineFormatter(logging.Formatter):
     """
     A custom logging formatter which removes additional newlines from messages.
@@ -112,17 +169,72 @@ class MultilineFormatter(logging.Formatter):
 
 
 def get_warning_counter():
-    if WARNING in CounterStreamHandler.counters:
-        return CounterStreamHandler.counters[WARNING]
-    else:
-        return 0
+    with CounterQueueHandler.lock:
+        return CounterQueueHandler.counters.get(WARNING, 0)
 
 
 def get_error_counter():
-    if ERROR in CounterStreamHandler.counters:
-        return CounterStreamHandler.counters[ERROR]
-    else:
-        return 0
+    with CounterQueueHandler.lock:
+        return CounterQueueHandler.counters.get(ERROR, 0)
+
+
+# Loggers only put records in a queue, records are formatted and written
+# to stdout/stderr by a listener thread, so that logging never blocks workers
+_queue = queue.Queue()
+_queue_handler = CounterQueueHandler(_queue)
+_listener = None
+
+
+def _start_listener():
+    global _listener
+    if _listener is None:
+        _listener = QueueListener(
+            _queue,
+            _get_debug_handler(),
+            _get_info_handler(),
+            _get_task_handler(),
+            _get_warn_handler(),
+            _get_error_handler(),
+            _get_critical_handler(),
+            _get_summary_handler(),
+            respect_handler_level=True,
+        )
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def flush():
+    """Wait until all records logged so far have been output"""
+    _queue.join()
+
+
+@contextmanager
+def log_context(context):
+    """
+    Set the context (wheel or package name) of records logged
+    by the current thread, it is shown before their message
+    """
+    token = _context.set(context)
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+@contextmanager
+def collect_records(level=WARNING):
+    """
+    Collect messages of records logged with level or above by all threads
+    while in the block, by context
+    """
+    collector = RecordCollector(level)
+    with CounterQueueHandler.lock:
+        CounterQueueHandler.collectors.append(collector)
+    try:
+        yield collector
+    finally:
+        with CounterQueueHandler.lock:
+            CounterQueueHandler.collectors.remove(collector)
 
 
 def getLogger(name=None):
@@ -138,32 +250,33 @@ def getLogger(name=None):
     logger = logging.getLogger(name)
     logger.setLevel(logging.NOTSET)
 
-    logger.addHandler(_get_debug_handler())
-    logger.addHandler(_get_info_handler())
-    logger.addHandler(_get_task_handler())
-    logger.addHandler(_get_warn_handler())
-    logger.addHandler(_get_error_handler())
-    logger.addHandler(_get_critical_handler())
-    logger.addHandler(_get_summary_handler())
+    if _queue_handler not in logger.handlers:
+        logger.addHandler(_queue_handler)
     logger.propagate = False
 
+    _start_listener()
+
     return logger
 
 
 def _get_debug_handler():
     handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(MultilineFormatter(dim_text("     %(message)s")))
+    handler.setFormatter(
+        MultilineFormatter(dim_text("     %(context_prefix)s%(message)s"))
+    )
     handler.setLevel(logging.DEBUG)
     handler.addFilter(LogFilter(logging.DEBUG))
+    handler.addFilter(ContextFilter())
 
     return handler
 
 
 def _get_info_handler():
     handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(TrailingNewlineFormatter("     %(message)s"))
+    handler.setFormatter(TrailingNewlineFormatter("     %(context_prefix)s%(message)s"))
     handler.setLevel(logging.INFO)
     handler.addFilter(LogFilter(logging.INFO))
+    handler.addFilter(ContextFilter())
 
     return handler
 
@@ -180,19 +293,25 @@ def _get_task_handler():
 
 
 def _get_warn_handler():
-    handler = CounterStreamHandler(sys.stdout)
+    handler = logging.StreamHandler(sys.stdout)
     handler.setLevel(logging.WARN)
     handler.addFilter(LogFilter(logging.WARN))
-    handler.setFormatter(TrailingNewlineFormatter(yellow_text("     %(message)s")))
+    handler.addFilter(ContextFilter())
+    handler.setFormatter(
+        TrailingNewlineFormatter(yellow_text("     %(context_prefix)s%(message)s"))
+    )
 
     return handler
 
 
 def _get_error_handler():
-    handler = CounterStreamHandler(sys.stderr)
+    handler = logging.StreamHandler(sys.stderr)
     handler.setLevel(logging.ERROR)
     handler.addFilter(LogFilter(logging.ERROR))
-    handler.setFormatter(TrailingNewlineFormatter(red_text("     %(message)s")))
+    handler.addFilter(ContextFilter())
+    handler.setFormatter(
+        TrailingNewlineFormatter(red_text("     %(context_prefix)s%(message)s"))
+    )
 
     return handler
 
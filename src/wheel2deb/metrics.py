@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict
+
+# Metrics are collected for the whole run, like log counters,
+# and written at the end of the run with --metrics-file.
+
+
+class Metrics:
+    """
+    Thread-safe collector of run metrics. Metrics are numbers, stored
+    globally (totals) or per item, items being wheels or source packages.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals: Dict[str, float] = {}
+        self.items: Dict[str, Dict[str, Dict[str, float]]] = {
+            "wheels": {},
+            "packages": {},
+        }
+
+    def _metrics(self, kind: str | None, item: str | None) -> Dict[str, float]:
+        if kind is None:
+            return self.totals
+        return self.items[kind].setdefault(item, {})
+
+    def increment(self, name: str, value: float = 1, kind=None, item=None) -> None:
+        """Add value to a metric, and to its total when kind is given"""
+        with self.lock:
+            if kind is not None:
+                metrics = self._metrics(kind, item)
+                metrics[name] = metrics.get(name, 0) + value
+            self.totals[name] = self.totals.get(name, 0) + value
+
+    def set(self, name: str, value: float, kind=None, item=None) -> None:
+        with self.lock:
+            self._metrics(kind, item)[name] = value
+
+    @contextmanager
+    def timer(self, phase: str, kind=None, item=None):
+        """Add the duration of a block to {phase}_seconds"""
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            self.increment(f"{phase}_seconds", time.monotonic() - start_time, kind, item)
+
+    def reset(self) -> None:
+        """Forget all metrics, long-running processes reset them for each job"""
+        with self.lock:
+            self.totals.clear()
+            for items in self.items.values():
+                items.clear()
+
+    def get(self, kind: str, item: str) -> Dict[str, float]:
+        """:return: Copy of the metrics of an item"""
+        with self.lock:
+            return dict(self.items[kind].get(item, {}))
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {
+                "totals": dict(sorted(self.totals.items())),
+                **{
+                    kind: {
+                        item: dict(sorted(m.items())) for item, m in sorted(items.items())
+                    }
+                    for kind, items in self.items.items()
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        """Format metrics for node-exporter textfile collector"""
+        content = self.to_dict()
+        lines = []
+        for name, value in content["totals"].items():
+            lines.append(f"# TYPE wheel2deb_{name} gauge")
+            lines.append(f"wheel2deb_{name} {_format_value(value)}")
+        for kind, label in (("wheels", "wheel"), ("packages", "package")):
+            samples = {}
+            for item, metrics in content[kind].items():
+                for name, value in metrics.items():
+                    samples.setdefault(name, []).append(
+                        f'wheel2deb_{label}_{name}{{{label}="{_escape(item)}"}} '
+                        f"{_format_value(value)}"
+                    )
+            for name in sorted(samples):
+                lines.append(f"# TYPE wheel2deb_{label}_{name} gauge")
+                lines.extend(samples[name])
+        return "\n".join(lines) + "\n"
+
+    def save(self, path: Path) -> None:
+        """
+        Write metrics to path, in Prometheus textfile format if path ends
+        with .prom, in JSON otherwise. The file is replaced atomically.
+        """
+        if path.suffix == ".prom":
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.to_dict(), indent=2) + "\n"
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(content)
+        os.replace(tmp_path, path)
+
+
+def _format_value(value: float) -> str:
+    return str(round(value, 6)) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+metrics = Metrics()
@@ -1,19 +1,30 @@
+import base64
 import configparser
+import csv
+import hashlib
 import os.path
 import re
+import shutil
+import sys
+import zipfile
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from functools import cached_property, lru_cache
+from functools import lru_cache, wraps
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterator, List, Tuple
 
 import attr
 from packaging import specifiers, version
+from packaging.markers import Marker
 from packaging.requirements import Requirement
 from pkginfo import Distribution
-from wheel.wheelfile import WheelFile
+from wheel.wheelfile import WheelError
 
 from wheel2deb import logger as logging
+from wheel2deb.metrics import metrics
 from wheel2deb.pyvers import Version, VersionRange
+from wheel2deb.utils import hash_file
 
 logger = logging.getLogger(__name__)
 
@@ -25,13 +36,67 @@ WHEEL_NAME_RE = re.compile(
 )
 
 
-def normalize_name(name):
+def normalize_name(name: str) -> str:
     """
-    All comparisons of distribution names MUST be case insensitive,
-    and MUST consider hyphens and underscores to be equivalent.
-    https://www.python.org/dev/peps/pep-0426/#name
+    Normalize a project name, runs of hyphens, underscores and dots are
+    equivalent and comparisons are case insensitive.
+    https://peps.python.org/pep-0503/#normalized-names
     """
-    return name.replace("-", "_").lower()
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+# entries of the requirement and marker caches, bounded so that long running
+# processes (serve, watch) do not grow with every wheel they ever converted
+REQUIREMENT_CACHE_SIZE = 1 << 14
+MARKER_CACHE_SIZE = 1 << 14
+
+
+@lru_cache(maxsize=REQUIREMENT_CACHE_SIZE)
+def parse_requirement(requirement: str) -> Requirement:
+    """
+    Parse a PEP 508 requirement string, its name is kept as written: debian
+    names are suggested from it, see normalize_name to compare names.
+    The same requirement strings show up in many wheels, so parsed
+    requirements are interned and must not be modified by callers.
+    """
+    return Requirement(requirement)
+
+
+def evaluate_marker(marker: Marker, env: dict) -> bool:
+    """
+    Evaluate an environment marker, results are memoized
+    per (marker, environment) pair
+    """
+    return _evaluate_marker(marker, tuple(sorted(env.items())))
+
+
+@lru_cache(maxsize=MARKER_CACHE_SIZE)
+def _evaluate_marker(marker: Marker, env: tuple) -> bool:
+    return marker.evaluate(dict(env))
+
+
+def intern_strings(strings) -> Tuple[str, ...]:
+    return tuple(sys.intern(s) for s in strings)
+
+
+def memoized(method):
+    """
+    Cache the results of a method per instance, in its _memo attribute,
+    which can be a slot. Unlike lru_cache on a method, the cache does
+    not keep instances alive. Stack with property for lazy attributes.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args):
+        memo = getattr(self, "_memo", None)
+        if memo is None:
+            memo = self._memo = {}
+        key = (method.__name__, *args)
+        if key not in memo:
+            memo[key] = method(self, *args)
+        return memo[key]
+
+    return wrapper
 
 
 @dataclass
@@ -41,47 +106,113 @@ class Entrypoint:
     function: str
 
 
-@attr.s(frozen=True)
+@attr.s(frozen=True, slots=True)
 class Record:
     """
-    Entries of *.dist-info/RECORD organized in categories
+    Entries of *.dist-info/RECORD organized in categories.
+    Wheels list thousands of files in a few directories: paths are
+    stored as an index in a tuple of interned directories and a
+    basename, libs, licenses and scripts are stored as full paths.
     """
 
     LICENSE_RE = re.compile(r"(^|[^\w])license(\..*)?$", re.IGNORECASE)
     SHLIBS_RE = re.compile(r"\.so[.\d]*")
 
-    libs = attr.ib(factory=list)
-    lib_dirs = attr.ib(factory=list)
-    licenses = attr.ib(factory=list)
-    scripts = attr.ib(factory=list)
-    files = attr.ib(factory=list)
+    libs = attr.ib(default=(), converter=tuple)
+    lib_dirs = attr.ib(default=(), converter=tuple)
+    licenses = attr.ib(default=(), converter=tuple)
+    scripts = attr.ib(default=(), converter=tuple)
+    # number of entries that are neither licenses nor scripts
+    file_count = attr.ib(default=0)
+    # every entry of RECORD, see iter_entries
+    directories = attr.ib(default=(), converter=tuple)
+    directory_indexes = attr.ib(factory=lambda: array("I"))
+    basenames = attr.ib(default=(), converter=tuple)
+    # hash of each entry, as written in RECORD: {algorithm}={urlsafe b64 digest}
+    digests = attr.ib(default=(), converter=tuple)
+    # size of each entry, -1 when RECORD does not tell
+    sizes = attr.ib(factory=lambda: array("q"))
+    # hash by path, built on the first lookup, see hash
+    _hashes = attr.ib(factory=dict, init=False, eq=False, repr=False)
 
     @classmethod
     def from_str(cls, content):
-        files = [line.rstrip().split(",")[0] for line in content.split("\n")]
-        record = Record()
-        for file in files:
+        libs, licenses, scripts = [], [], []
+        file_count = 0
+        directories = {}
+        directory_indexes = array("I")
+        basenames, digests = [], []
+        sizes = array("q")
+
+        for row in csv.reader(content.splitlines()):
+            file = row[0] if row else ""
+            if file:
+                directory, basename = os.path.split(file)
+                index = directories.setdefault(sys.intern(directory), len(directories))
+                directory_indexes.append(index)
+                basenames.append(basename)
+                digests.append(sys.intern(row[1]) if len(row) > 1 else "")
+                size = row[2] if len(row) > 2 else ""
+                sizes.append(int(size) if size.isdigit() else -1)
+
             if re.search(cls.LICENSE_RE, file):
                 logger.debug(f"found license: {file}")
-                record.licenses.append(file)
+                licenses.append(file)
                 continue
 
             if ".data/scripts/" in file:
                 logger.debug(f"found script: {file}")
-                record.scripts.append(file)
+                scripts.append(file)
                 continue
 
             if re.findall(cls.SHLIBS_RE, os.path.basename(file)):
                 logger.debug(f"found shared lib: {file}")
-                record.libs.append(file)
+                libs.append(file)
 
             if file:
                 # everything else
-                record.files.append(file)
-
-        record.lib_dirs.extend(list({os.path.dirname(x) for x in record.libs}))
-
-        return record
+                file_count += 1
+
+        return cls(
+            libs=libs,
+            lib_dirs=sorted({os.path.dirname(x) for x in libs}),
+            licenses=licenses,
+            scripts=scripts,
+            file_count=file_count,
+            directories=directories,
+            directory_indexes=directory_indexes,
+            basenames=basenames,
+            digests=digests,
+            sizes=sizes,
+        )
+
+    def iter_entries(self) -> Iterator[Tuple[str, str, int]]:
+        """:return: Path, hash (or an empty string) and size of every entry"""
+        for index, basename, digest, size in zip(
+            self.directory_indexes, self.basenames, self.digests, self.sizes
+        ):
+            yield os.path.join(self.directories[index], basename), digest, size
+
+    def hash(self, path: str) -> str | None:
+        """:return: Hash of a file, as written in RECORD"""
+        if not self._hashes:
+            self._hashes.update(
+                (entry, digest) for entry, digest, _ in self.iter_entries() if digest
+            )
+        return self._hashes.get(path)
+
+    @property
+    def files(self) -> List[str]:
+        excluded = set(self.licenses) | set(self.scripts)
+        return [path for path, _, _ in self.iter_entries() if path not in excluded]
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "files": self.file_count,
+            "libs": len(self.libs),
+            "licenses": len(self.licenses),
+            "scripts": len(self.scripts),
+        }
 
 
 class Metadata(Distribution):
@@ -92,54 +223,121 @@ class Metadata(Distribution):
         pass
 
 
-class Wheel:
-    def __init__(self, wheel_name: str, extract_path: Path) -> None:
-        self.wheel_name = wheel_name
-        self.extract_path = extract_path
-        self.info_dir = next(iter(self.extract_path.glob("*.dist-info")))
+class WheelInfo:
+    """
+    What is needed to select a wheel and to resolve its dependencies,
+    read from the wheel archive without extracting it
+    """
 
+    __slots__ = (
+        "wheel_name",
+        "name",
+        "version",
+        "python_tag",
+        "abi_tag",
+        "platform_tag",
+        "requires_dist",
+        "requires_python",
+        "classifiers",
+        "tags",
+        "record_summary",
+        "path",
+        "sha256",
+        "_memo",
+        "__weakref__",
+    )
+
+    def __init__(
+        self,
+        wheel_name: str,
+        requires_dist=(),
+        requires_python: str | None = None,
+        classifiers=(),
+        tags=(),
+        record_summary: Dict[str, int] | None = None,
+        path: Path | None = None,
+        sha256: str | None = None,
+    ) -> None:
+        self._init_archive(wheel_name, path, sha256)
+        # the same requirements and classifiers show up in many wheels
+        self.requires_dist = intern_strings(requires_dist)
+        self.requires_python = requires_python
+        self.classifiers = intern_strings(classifiers)
+        # compatibility tags listed in the WHEEL file
+        self.tags = intern_strings(tags)
+        # number of files, libs, licenses and scripts in RECORD
+        self.record_summary = record_summary or {}
+
+    def _init_archive(
+        self, wheel_name: str, path: Path | None, sha256: str | None
+    ) -> None:
+        """
+        Set attributes describing the wheel archive, shared with Wheel whose
+        other attributes are read from its extracted files
+        """
+        self.path = path
+        self.sha256 = sha256
         # parse wheel name, see https://www.python.org/dev/peps/pep-0425
-        g = re.match(WHEEL_NAME_RE, self.wheel_name).groupdict()
+        self.wheel_name = wheel_name
+        g = re.match(WHEEL_NAME_RE, wheel_name).groupdict()
         self.name = normalize_name(g["name"])
         self.version = g["version"]
-        self.python_tag = g["python_tag"]
-        self.abi_tag = g["abi_tag"]
-        self.platform_tag = g["platform_tag"]
-
-    @cached_property
-    def metadata(self) -> Metadata:
-        return Metadata((self.info_dir / "METADATA").read_text())
-
-    @cached_property
-    def record(self) -> Record:
-        return Record.from_str((self.info_dir / "RECORD").read_text())
+        self.python_tag = sys.intern(g["python_tag"])
+        self.abi_tag = sys.intern(g["abi_tag"])
+        self.platform_tag = sys.intern(g["platform_tag"])
 
-    @cached_property
-    def entrypoints(self) -> List[Entrypoint]:
-        entrypoints = []
-        try:
-            config = configparser.ConfigParser()
-            config.read_string((self.info_dir / "entry_points.txt").read_text())
-            if "console_scripts" in config.sections():
-                name, path = config.items("console_scripts")[0]
-                entrypoints.append(Entrypoint(name, *(path.split(":"))))
-        except FileNotFoundError:
-            pass
-        return entrypoints
+    @classmethod
+    def from_wheel_file(cls, path: Path, sha256: str | None = None) -> "WheelInfo":
+        """Read METADATA, WHEEL and RECORD files from a wheel archive"""
+        with zipfile.ZipFile(path) as zf:
+            info_dir = next(
+                name.split("/")[0]
+                for name in zf.namelist()
+                if re.match(r"^[^/]+\.dist-info/METADATA$", name)
+            )
+            metadata = Metadata(zf.read(f"{info_dir}/METADATA").decode())
+            wheel_file = zf.read(f"{info_dir}/WHEEL").decode()
+            record = Record.from_str(zf.read(f"{info_dir}/RECORD").decode())
+
+        return cls(
+            path.name,
+            requires_dist=metadata.requires_dist,
+            requires_python=metadata.requires_python,
+            classifiers=metadata.classifiers,
+            tags=re.findall(r"^Tag:\s*(\S+)", wheel_file, re.MULTILINE),
+            record_summary=record.summary(),
+            path=path,
+            sha256=sha256,
+        )
+
+    @property
+    def project_name(self) -> str:
+        """Name of the project as written in the wheel name, see normalize_name"""
+        return self.wheel_name.split("-", 1)[0]
+
+    def compact(self) -> "WheelInfo":
+        """
+        Copy of the wheel holding only what is needed to check
+        if it satisfies a requirement of another wheel
+        """
+        return WheelInfo(self.wheel_name, requires_python=self.requires_python)
+
+    def to_dict(self) -> dict:
+        return {
+            "wheel_name": self.wheel_name,
+            "requires_dist": list(self.requires_dist),
+            "requires_python": self.requires_python,
+            "classifiers": list(self.classifiers),
+            "tags": list(self.tags),
+            "record_summary": self.record_summary,
+        }
 
     def requires(self, env=None):
-        if not env:
-            env = {"extra": ""}
-        elif env and "extra" not in env:
-            env["extra"] = ""
-        reqs = [Requirement(req) for req in self.metadata.requires_dist]
-        reqs = filter(lambda r: not r.marker or r.marker.evaluate(env), reqs)
-        reqs = list(reqs)
-        for req in reqs:
-            req.name = normalize_name(req.name)
-        return reqs
-
-    @lru_cache
+        env = {"extra": "", **(env or {})}
+        reqs = [parse_requirement(req) for req in self.requires_dist]
+        return [r for r in reqs if not r.marker or evaluate_marker(r.marker, env)]
+
+    @memoized
     def version_range(self, pyvers):
         m = re.search(r"(\d)(\d+)", self.python_tag)
 
@@ -154,7 +352,7 @@ class Wheel:
 
         # TODO: use requires_python ?
         versions = []
-        for classifier in self.metadata.classifiers:
+        for classifier in self.classifiers:
             m = re.match(r"Programming Language :: Python :: ([\d.]+)", classifier)
             if m:
                 version = Version.from_str(m.group(1))
@@ -170,14 +368,14 @@ class Wheel:
         # supported by that wheel
         return None
 
-    @lru_cache
+    @memoized
     def version_supported(self, pyvers):
         m = re.search(r"(?:py|cp)%s" % pyvers.major, self.python_tag)
         if not m:
             return False
 
-        requires_python = self.metadata.requires_python
-        if self.metadata.requires_python is None:
+        requires_python = self.requires_python
+        if requires_python is None:
             # The package provides no information
             return True
 
@@ -185,7 +383,7 @@ class Wheel:
         python_version = version.parse(str(pyvers))
         return python_version in requires_python_specifier
 
-    @cached_property
+    @property
     def cpython_supported(self):
         if re.search(r"(?:py|cp)", self.python_tag):
             return True
@@ -195,10 +393,266 @@ class Wheel:
         return self.wheel_name
 
 
-def parse_wheel(wheel_path: Path, base_extract_path: Path = EXTRACT_PATH) -> Wheel:
+class Wheel(WheelInfo):
+    """
+    An extracted wheel, files are parsed when first needed
+    """
+
+    __slots__ = ("extract_path", "info_dir")
+
+    def __init__(
+        self,
+        wheel_name: str,
+        extract_path: Path,
+        path: Path | None = None,
+        sha256: str | None = None,
+    ) -> None:
+        self._init_archive(wheel_name, path, sha256)
+        self.extract_path = extract_path
+        self.info_dir = next(iter(self.extract_path.glob("*.dist-info")))
+
+    @property
+    @memoized
+    def metadata(self) -> Metadata:
+        return Metadata((self.info_dir / "METADATA").read_text())
+
+    @property
+    @memoized
+    def record(self) -> Record:
+        return Record.from_str((self.info_dir / "RECORD").read_text())
+
+    @property
+    @memoized
+    def entrypoints(self) -> List[Entrypoint]:
+        entrypoints = []
+        try:
+            config = configparser.ConfigParser()
+            config.read_string((self.info_dir / "entry_points.txt").read_text())
+            if "console_scripts" in config.sections():
+                name, path = config.items("console_scripts")[0]
+                entrypoints.append(Entrypoint(name, *(path.split(":"))))
+        except FileNotFoundError:
+            pass
+        return entrypoints
+
+    @property
+    @memoized
+    def requires_dist(self) -> Tuple[str, ...]:
+        return intern_strings(self.metadata.requires_dist)
+
+    @property
+    def requires_python(self) -> str | None:
+        return self.metadata.requires_python
+
+    @property
+    @memoized
+    def classifiers(self) -> Tuple[str, ...]:
+        return intern_strings(self.metadata.classifiers)
+
+    @property
+    @memoized
+    def tags(self) -> Tuple[str, ...]:
+        content = (self.info_dir / "WHEEL").read_text()
+        return intern_strings(re.findall(r"^Tag:\s*(\S+)", content, re.MULTILINE))
+
+    @property
+    def record_summary(self) -> Dict[str, int]:
+        return self.record.summary()
+
+
+# wheels whose files add up to less than that are verified in a single thread
+PARALLEL_VERIFY_SIZE = 16 << 20
+
+# hash algorithms allowed in RECORD files, see PEP 427
+HASH_ALGORITHMS = ("sha256", "sha384", "sha512")
+
+# files of a wheel that RECORD does not need to list
+UNRECORDED_FILE_RE = re.compile(r"^[^/]+\.dist-info/RECORD(?:\.jws|\.p7s)?$")
+
+# wheels returned by parse_wheel, only used by long-running processes:
+# {(wheel path, extract path): (size, modification time, wheel)}
+_wheel_cache: Dict[tuple, tuple] | None = None
+
+# wheels kept by the wheel cache, least recently used ones are dropped
+WHEEL_CACHE_SIZE = 1 << 10
+
+# hash of the wheel archive each extraction was verified against, or extracted
+# from, by this process: extractions are verified once per process, not once
+# per target they are converted for
+_verified_extractions: Dict[Path, str] = {}
+
+
+def enable_wheel_cache() -> None:
+    """
+    Keep the last WHEEL_CACHE_SIZE parsed wheels in memory, wheels are
+    parsed again when their size or modification time changes
+    """
+    global _wheel_cache
+    if _wheel_cache is None:
+        _wheel_cache = {}
+
+
+def trust_verified_extractions(enabled: bool = True) -> None:
+    """
+    Do not verify RECORD hashes of extracted wheels again when the wheel
+    archive is identical to the one that was verified
+    """
+    global _trust_verified_extractions
+    _trust_verified_extractions = enabled
+
+
+_trust_verified_extractions = False
+
+
+def verify_record(path: Path, record: Record) -> List[str]:
+    """
+    Check files of an extracted wheel against hashes of its RECORD,
+    files of large wheels are hashed in parallel
+    :return: Files whose content does not match their hash
+    """
+    entries = [(p, d, s) for p, d, s in record.iter_entries() if d]
+    total_size = sum(max(s, 0) for _, _, s in entries)
+
+    def verify(entry):
+        file, digest, _ = entry
+        algorithm, _, expected = digest.partition("=")
+        if algorithm not in HASH_ALGORITHMS:
+            return False
+        try:
+            sha = hashlib.new(algorithm)
+            with (path / file).open("rb") as f:
+                while block := f.read(1 << 20):
+                    sha.update(block)
+        except (OSError, ValueError):
+            return False
+        actual = base64.urlsafe_b64encode(sha.digest()).rstrip(b"=").decode()
+        return actual == expected
+
+    if total_size < PARALLEL_VERIFY_SIZE:
+        results = list(map(verify, entries))
+    else:
+        # hashlib releases the GIL while hashing
+        with ThreadPoolExecutor() as executor:
+            results = list(executor.map(verify, entries))
+    return [file for (file, _, _), ok in zip(entries, results) if not ok]
+
+
+def check_record(names: List[str], record: Record) -> None:
+    """
+    Check that RECORD lists every file of a wheel archive with a strong
+    hash, like wheel.wheelfile.WheelFile does
+    :param names: Members of the wheel archive
+    :raise WheelError: When a file is not listed, or has a weak hash
+    """
+    hashes = {path: digest for path, digest, _ in record.iter_entries()}
+    for name in names:
+        if name.endswith("/") or UNRECORDED_FILE_RE.match(name):
+            continue
+        if not hashes.get(name):
+            raise WheelError(f"No hash found for file '{name}'")
+        algorithm = hashes[name].partition("=")[0]
+        if algorithm not in HASH_ALGORITHMS:
+            raise WheelError(
+                f"Weak hash algorithm ({algorithm}) is not permitted by PEP 427"
+            )
+
+
+def extract_wheel(wheel_path: Path, extract_path: Path, sha256: str) -> None:
+    """
+    Extract a wheel and verify its RECORD in a temporary directory, which
+    replaces extract_path once verified. The sha256 of verified wheels is
+    written next to their extraction, see verified_marker_path
+    :raise WheelError: When a file does not match its hash, see also check_record
+    """
+    tmp_path = extract_path.with_name(f".{extract_path.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    try:
+        with metrics.timer("unpack", "wheels", wheel_path.name):
+            with zipfile.ZipFile(wheel_path) as zf:
+                logger.debug(f"unpacking wheel to: {extract_path}...")
+                zf.extractall(tmp_path)
+                size = sum(info.file_size for info in zf.infolist())
+                names = zf.namelist()
+        metrics.increment("bytes_extracted", size, "wheels", wheel_path.name)
+
+        info_dir = next(iter(tmp_path.glob("*.dist-info")))
+        record = Record.from_str((info_dir / "RECORD").read_text())
+        check_record(names, record)
+        with metrics.timer("verify", "wheels", wheel_path.name):
+            mismatches = verify_record(tmp_path, record)
+        if mismatches:
+            raise WheelError(f"hash mismatch for {', '.join(mismatches)}")
+
+        verified_marker_path(extract_path).unlink(missing_ok=True)
+        if extract_path.exists():
+            old_path = tmp_path.with_suffix(".old")
+            os.rename(extract_path, old_path)
+            shutil.rmtree(old_path)
+        os.rename(tmp_path, extract_path)
+        verified_marker_path(extract_path).write_text(sha256 + "\n")
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def verified_marker_path(extract_path: Path) -> Path:
+    return extract_path.with_name(f"{extract_path.name}.verified")
+
+
+def parse_wheel(
+    wheel_path: Path,
+    base_extract_path: Path = EXTRACT_PATH,
+    sha256: str | None = None,
+) -> Wheel:
+    """
+    Extract a wheel, or reuse its previous extraction when the wheel did
+    not change. Files of reused extractions are verified again, once per
+    process, unless trust_verified_extractions was called.
+    :param sha256: Hash of the wheel archive, computed if not given
+    """
     extract_path = base_extract_path / wheel_path.name[:-4]
-    if extract_path.exists() is False:
-        with WheelFile(str(wheel_path)) as wf:
-            logger.debug(f"unpacking wheel to: {extract_path}...")
-            wf.extractall(str(extract_path))
-    return Wheel(wheel_path.name, extract_path)
+
+    key = None
+    if _wheel_cache is not None:
+        stat = wheel_path.stat()
+        key = (str(wheel_path.resolve()), extract_path)
+        # most recently used wheels come last
+        size, mtime, wheel = _wheel_cache.pop(key, (None, None, None))
+        if (size, mtime) == (stat.st_size, stat.st_mtime_ns) and extract_path.exists():
+            metrics.increment("wheel_cache_hits")
+            _wheel_cache[key] = (size, mtime, wheel)
+            return wheel
+
+    sha256 = sha256 or hash_file(wheel_path)
+    try:
+        verified = verified_marker_path(extract_path).read_text().strip() == sha256
+    except OSError:
+        verified = False
+
+    if (
+        verified
+        and extract_path.exists()
+        and not _trust_verified_extractions
+        and _verified_extractions.get(extract_path) != sha256
+    ):
+        info_dir = next(iter(extract_path.glob("*.dist-info")), None)
+        if info_dir is None:
+            verified = False
+        else:
+            record = Record.from_str((info_dir / "RECORD").read_text())
+            with metrics.timer("verify", "wheels", wheel_path.name):
+                verified = not verify_record(extract_path, record)
+            if not verified:
+                logger.warning(f"{extract_path} was modified, extracting it again")
+
+    if verified and extract_path.exists():
+        metrics.increment("extraction_cache_hits")
+    else:
+        extract_wheel(wheel_path, extract_path, sha256)
+    _verified_extractions[extract_path] = sha256
+    wheel = Wheel(wheel_path.name, extract_path, wheel_path, sha256)
+
+    if key is not None:
+        _wheel_cache[key] = (stat.st_size, stat.st_mtime_ns, wheel)
+        if len(_wheel_cache) > WHEEL_CACHE_SIZE:
+            del _wheel_cache[next(iter(_wheel_cache))]
+    return wheel
@@ -0,0 +1,142 @@
+import gzip
+import hashlib
+import time
+from email.utils import formatdate
+from pathlib import Path
+from typing import Dict, List
+
+from wheel2deb import logger as logging
+from wheel2deb.locking import WorkLock
+from wheel2deb.utils import shell, write_atomic
+
+logger = logging.getLogger(__name__)
+
+# A stanza is the list of fields of a package in a Packages file,
+# multiline values keep their continuation lines
+Stanza = Dict[str, str]
+
+HASHES = {"MD5sum": "md5", "SHA1": "sha1", "SHA256": "sha256"}
+
+# seconds between two attempts to lock the index of a directory
+LOCK_RETRY_INTERVAL = 0.5
+RELEASE_HASHES = {"MD5Sum": "md5", "SHA1": "sha1", "SHA256": "sha256"}
+
+
+def parse_stanzas(content: str) -> List[Stanza]:
+    """Parse a Packages file or the output of dpkg-deb --field"""
+    stanzas = []
+    stanza: Stanza = {}
+    key = None
+    for line in content.split("\n"):
+        if not line.strip():
+            if stanza:
+                stanzas.append(stanza)
+            stanza, key = {}, None
+        elif line[0] in " \t" and key is not None:
+            stanza[key] += "\n" + line
+        elif ":" in line:
+            key, value = line.split(":", 1)
+            stanza[key] = value.strip()
+    if stanza:
+        stanzas.append(stanza)
+    return stanzas
+
+
+def format_stanza(stanza: Stanza) -> str:
+    return "".join(f"{key}: {value}\n" for key, value in stanza.items())
+
+
+def package_hashes(path: Path) -> Dict[str, str]:
+    """Compute the hashes listed in Packages and Release files in a single pass"""
+    hashes = {name: hashlib.new(name) for name in set(HASHES.values())}
+    with path.open("rb") as f:
+        while block := f.read(1 << 20):
+            for h in hashes.values():
+                h.update(block)
+    return {name: h.hexdigest() for name, h in hashes.items()}
+
+
+def index_package(deb_path: Path) -> Stanza | None:
+    """
+    Compute the Packages stanza of a .deb: its control fields,
+    filename, size and hashes
+    """
+    output, returncode = shell(["dpkg-deb", "--field", str(deb_path)])
+    stanzas = parse_stanzas(output)
+    if returncode or not stanzas:
+        logger.error(f"failed to read control fields of {deb_path}")
+        return None
+
+    stanza = stanzas[0]
+    stanza["Filename"] = f"./{deb_path.name}"
+    stanza["Size"] = str(deb_path.stat().st_size)
+    hashes = package_hashes(deb_path)
+    for field, name in HASHES.items():
+        stanza[field] = hashes[name]
+    return stanza
+
+
+def update_repository(directory: Path, stanzas: Dict[str, Stanza] | None = None) -> None:
+    """
+    Maintain Packages, Packages.gz and Release files for the .deb
+    files of a directory, to use it as a flat apt repository.
+    Only packages missing from the existing Packages file, or modified
+    since it was written, are hashed.
+    :param stanzas: Stanzas of packages that were just built, by filename
+    """
+    # builds of other processes, maybe on other hosts, update the same index
+    lock = WorkLock(directory / ".Packages.lock")
+    while not lock.acquire():
+        time.sleep(LOCK_RETRY_INTERVAL)
+    try:
+        _update_repository(directory, stanzas)
+    finally:
+        lock.release()
+
+
+def _update_repository(directory: Path, stanzas: Dict[str, Stanza] | None) -> None:
+    stanzas = dict(stanzas or {})
+    debs = {p.name: p for p in directory.glob("*.deb")}
+
+    # reuse entries of packages that did not change
+    packages_path = directory / "Packages"
+    if packages_path.is_file():
+        indexed_at = packages_path.stat().st_mtime_ns
+        for stanza in parse_stanzas(packages_path.read_text()):
+            name = stanza.get("Filename", "")[2:]
+            if name in stanzas or name not in debs:
+                continue
+            # a package rebuilt with the same size is newer than the index
+            stat = debs[name].stat()
+            if stanza.get("Size") == str(stat.st_size) and stat.st_mtime_ns < indexed_at:
+                stanzas[name] = stanza
+
+    stanzas = {name: stanza for name, stanza in stanzas.items() if name in debs}
+    for name in sorted(debs.keys() - stanzas.keys()):
+        logger.debug(f"indexing {name}")
+        if (stanza := index_package(debs[name])) is not None:
+            stanzas[name] = stanza
+
+    content = "\n".join(format_stanza(stanzas[name]) for name in sorted(stanzas))
+    write_atomic(packages_path, content.encode())
+    write_atomic(directory / "Packages.gz", gzip.compress(content.encode(), mtime=0))
+    write_release(directory, stanzas.values())
+
+    logger.info(f"indexed {len(stanzas)} packages in {packages_path}")
+
+
+def write_release(directory: Path, stanzas) -> None:
+    architectures = sorted({s["Architecture"] for s in stanzas if "Architecture" in s})
+    lines = [
+        "Origin: wheel2deb",
+        "Label: wheel2deb",
+        f"Date: {formatdate(usegmt=True)}",
+        f"Architectures: {' '.join(architectures)}",
+    ]
+    files = {name: directory / name for name in ("Packages", "Packages.gz")}
+    hashes = {name: package_hashes(path) for name, path in files.items()}
+    for field, hash_name in RELEASE_HASHES.items():
+        lines.append(f"{field}:")
+        for name, path in files.items():
+            lines.append(f" {hashes[name][hash_name]} {path.stat().st_size} {name}")
+    write_atomic(directory / "Release", ("\n".join(lines) + "\n").encode())
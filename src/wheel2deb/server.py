@@ -0,0 +1,166 @@
+import json
+import os
+import socket
+import socketserver
+import time
+from pathlib import Path
+from typing import Dict, Tuple
+
+from wheel2deb import apt
+from wheel2deb import logger as logging
+from wheel2deb.build import build_all_packages, build_packages
+from wheel2deb.context import Settings, load_configuration
+from wheel2deb.debian import convert_wheels
+from wheel2deb.discovery import find_wheels
+from wheel2deb.metrics import metrics
+from wheel2deb.pydist import enable_wheel_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = Path("/tmp/wheel2deb.sock")
+
+JOB_COMMANDS = ("default", "convert", "build")
+
+
+class JobHandler(socketserver.StreamRequestHandler):
+    """
+    Read a job from a client, run it and send back its summary.
+    Requests and responses are JSON documents terminated by a newline.
+    """
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError as e:
+            response = {"error": f"invalid request: {e}"}
+        else:
+            response = self.server.run_job(request)
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class JobServer(socketserver.UnixStreamServer):
+    """
+    Run conversion and build jobs one at a time, keeping parsed settings
+    and unpacked wheels in memory between jobs. Apt lookups and metrics
+    are reset for each job.
+    """
+
+    def __init__(self, socket_path: Path):
+        self.socket_path = socket_path
+        self.settings: Dict[Tuple[str, int], Settings] = {}
+        # the socket is created by bind, only its owner can connect
+        umask = os.umask(0o177)
+        try:
+            super().__init__(str(socket_path), JobHandler)
+        finally:
+            os.umask(umask)
+
+    def load_settings(self, configuration_path: str | None) -> Settings:
+        if configuration_path is None:
+            return Settings()
+        path = Path(configuration_path)
+        # settings are parsed again when the configuration file changes
+        key = (str(path), path.stat().st_mtime_ns if path.exists() else 0)
+        if key not in self.settings:
+            self.settings[key] = load_configuration(path)
+        return self.settings[key]
+
+    def run_job(self, request: dict) -> dict:
+        warnings = logging.get_warning_counter()
+        errors = logging.get_error_counter()
+        start_time = time.monotonic()
+        # packages may have been added to the apt cache since the last job
+        apt.refresh_cache()
+        metrics.reset()
+
+        command = request.get("command")
+        logger.task(f"Running {command} job")
+        try:
+            self.dispatch(command, request.get("args", {}))
+        except SystemExit:
+            # raised by load_configuration, the error is already logged
+            pass
+        except Exception as e:
+            logger.error(f"{command} job failed: {e!r}")
+
+        return {
+            "warnings": logging.get_warning_counter() - warnings,
+            "errors": logging.get_error_counter() - errors,
+            "elapsed": round(time.monotonic() - start_time, 3),
+        }
+
+    def dispatch(self, command: str, args: dict) -> None:
+        if command not in JOB_COMMANDS:
+            logger.error(f"unknown job command: {command}")
+            return
+
+        output_directory = Path(args["output_directory"])
+        workers_count = args.get("workers_count", 4)
+        force_build = args.get("force_build", False)
+        apt_index = args.get("apt_index", False)
+
+        if command == "build":
+            build_all_packages(output_directory, workers_count, force_build, apt_index)
+            return
+
+        settings = self.load_settings(args.get("configuration_path"))
+        wheel_paths = find_wheels(
+            [Path(p) for p in args["search_paths"]],
+            args.get("include_wheels"),
+            args.get("exclude_wheels"),
+            args.get("recursive", False),
+        )
+        packages = convert_wheels(
+            settings,
+            output_directory,
+            wheel_paths,
+            selection=args.get("selection", "all"),
+        )
+        if command == "default":
+            build_packages(
+                [p.root for p in packages], workers_count, force_build, apt_index
+            )
+
+
+def serve(socket_path: Path) -> None:
+    """Accept jobs on a unix socket until interrupted"""
+    if socket_path.exists():
+        if is_listening(socket_path):
+            logger.error(f"a server is already listening on {socket_path}")
+            return
+        # left behind by a server that did not exit cleanly
+        socket_path.unlink()
+
+    enable_wheel_cache()
+    with JobServer(socket_path) as server:
+        logger.task(f"Listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            socket_path.unlink(missing_ok=True)
+
+
+def is_listening(socket_path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+        except OSError:
+            return False
+    return True
+
+
+def submit(socket_path: Path, command: str, args: dict) -> dict:
+    """
+    Send a job to a server and wait for its summary
+    :param command: one of default, convert or build
+    :param args: job arguments, paths must be absolute
+    :return: Dict with warnings and errors counters and elapsed time
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+        request = {"command": command, "args": args}
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            return json.loads(f.readline())
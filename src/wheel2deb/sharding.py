@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from wheel2deb import logger as logging
+from wheel2deb.utils import write_if_changed
+
+logger = logging.getLogger(__name__)
+
+SHARD_RE = re.compile(r"^(\d+)/(\d+)$")
+
+# shard index (starting at 1) and number of shards
+Shard = Tuple[int, int]
+
+# written in source packages by convert, so that build shards them
+# like the wheels they were generated from
+WHEEL_DESCRIPTOR = "wheel.json"
+
+
+def parse_shard(value: str) -> Shard | None:
+    """Parse K/N, logs an error when value is invalid"""
+    match = SHARD_RE.match(value.strip())
+    if match:
+        index, count = int(match.group(1)), int(match.group(2))
+        if 1 <= index <= count:
+            return index, count
+    logger.error(f"invalid shard {value}, expected K/N with 1 <= K <= N")
+    return None
+
+
+def stable_hash(name: str) -> int:
+    # unlike hash(), does not change between processes
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big")
+
+
+def wheel_project(path: Path) -> str:
+    # build does not need the conversion stack
+    from wheel2deb.discovery import WHEEL_FILENAME_RE, normalize_name
+
+    match = WHEEL_FILENAME_RE.match(path.name)
+    return normalize_name(match["name"] if match else path.name)
+
+
+def write_wheel_descriptor(root: Path, wheel_name: str, size: int) -> None:
+    """Save the wheel a source package was generated from, and its size"""
+    content = json.dumps({"size": size, "wheel": wheel_name}, sort_keys=True)
+    write_if_changed(root / WHEEL_DESCRIPTOR, content + "\n")
+
+
+def read_wheel_descriptor(root: Path) -> dict | None:
+    try:
+        descriptor = json.loads((root / WHEEL_DESCRIPTOR).read_text())
+    except (OSError, ValueError):
+        return None
+    return descriptor if isinstance(descriptor, dict) else None
+
+
+def package_wheel(path: Path) -> Tuple[str, str, int]:
+    """
+    :return: Normalized project name, name and size of the wheel a source
+    package was generated from
+    """
+    if descriptor := read_wheel_descriptor(path):
+        wheel_name = descriptor["wheel"]
+        return wheel_project(Path(wheel_name)), wheel_name, descriptor.get("size", 0)
+    # generated by an older version of wheel2deb, source package
+    # directories are named {package}_{version}_{arch}
+    return path.name.split("_")[0], path.name, directory_size(path)
+
+
+def directory_size(path: Path) -> int:
+    size = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                size += os.lstat(os.path.join(root, file)).st_size
+            except OSError:
+                pass
+    return size
+
+
+def split_shard(
+    paths: List[Path],
+    shard: Shard,
+    project: Callable[[Path], str] = wheel_project,
+    size: Callable[[Path], Tuple[str, int]] | None = None,
+) -> Tuple[List[Path], List[Path]]:
+    """
+    Partition paths in shards, so that independent processes given the same
+    paths and different shard indexes share the work without coordinating.
+    All paths of a project land in the same shard.
+    :param project: Normalized project name of a path
+    :param size: Name and size of the wheel of a path, to balance the total
+    size of the wheels of shards instead of their number of projects. Paths
+    of the same wheel (source packages of several targets) count once
+    :return: Paths of the shard, and the other paths
+    """
+    index, count = shard
+    projects = {path: project(path) for path in paths}
+
+    if size is None:
+        assignment = {name: stable_hash(name) % count for name in projects.values()}
+    else:
+        weights = {name: {} for name in projects.values()}
+        for path, name in projects.items():
+            wheel_name, wheel_size = size(path)
+            weights[name][wheel_name] = wheel_size
+        weights = {name: sum(sizes.values()) for name, sizes in weights.items()}
+        # greedy: biggest projects first, each one to the lightest shard
+        loads = [0] * count
+        assignment = {}
+        for name in sorted(weights, key=lambda x: (-weights[x], stable_hash(x), x)):
+            lightest = loads.index(min(loads))
+            assignment[name] = lightest
+            loads[lightest] += weights[name]
+
+    selected = [p for p in paths if assignment[projects[p]] == index - 1]
+    others = [p for p in paths if assignment[projects[p]] != index - 1]
+    logger.info(f"shard {index}/{count}: {len(selected)} of {len(paths)} selected")
+    return selected, others
+
+
+def shard_wheels(
+    paths: List[Path], shard: Shard, by_size: bool = False
+) -> Tuple[List[Path], List[Path]]:
+    """:return: Wheels of the shard, and the other wheels"""
+    size = (lambda p: (p.name, p.stat().st_size)) if by_size else None
+    return split_shard(paths, shard, wheel_project, size)
+
+
+def shard_source_packages(
+    paths: List[Path], shard: Shard, by_size: bool = False
+) -> List[Path]:
+    """
+    Source packages of the shard, balanced like the wheels they were
+    generated from, see shard_wheels
+    :return: Source packages of the shard
+    """
+    # wheel descriptors are read once
+    wheels = {path: package_wheel(path) for path in paths}
+    size = (lambda p: wheels[p][1:]) if by_size else None
+    return split_shard(paths, shard, lambda p: wheels[p][0], size)[0]
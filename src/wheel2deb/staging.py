@@ -0,0 +1,186 @@
+import errno
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List
+
+from wheel2deb import logger as logging
+from wheel2deb.graph import GRAPH_FILENAME, DependencyGraph
+from wheel2deb.locking import WorkLock
+
+logger = logging.getLogger(__name__)
+
+# files written by dpkg-buildpackage next to the source package, and the
+# digest of the source package the .deb was built from
+BUILD_RESULTS = (".buildinfo", ".changes", ".ddeb", ".digest", ".deb")
+
+
+class Staging:
+    """
+    Source packages generated and built in a work directory (a tmpfs for
+    instance), mirroring the output directory. Only build results, and
+    optionally source packages, are published to the output directory,
+    each file or directory is replaced atomically.
+
+    Generated source packages stay in the work directory, along with their
+    .sync and .bytecode manifests, so that the next run only rewrites what
+    changed.
+    """
+
+    def __init__(
+        self,
+        work_directory: Path,
+        output_directory: Path,
+        publish_sources: bool = False,
+        lock: WorkLock | None = None,
+    ):
+        self.work_directory = work_directory
+        self.output_directory = output_directory
+        self.publish_sources = publish_sources
+        # held while the work directory is in use, None for a temporary one
+        self.lock = lock
+        # source packages copied from the output directory
+        self.staged = set()
+
+    @classmethod
+    def create(
+        cls, work_dir: Path, output_directory: Path, publish_sources: bool = False
+    ) -> "Staging":
+        """
+        Use the work directory of the output directory, each output directory
+        has its own subdirectory of work_dir. When another run uses it, a
+        temporary work directory is created instead.
+        """
+        work_dir.mkdir(parents=True, exist_ok=True)
+        output_directory.mkdir(parents=True, exist_ok=True)
+        resolved = output_directory.resolve()
+        key = hashlib.sha256(str(resolved).encode()).hexdigest()[:16]
+        name = f"{resolved.name}-{key}"
+        lock = WorkLock(work_dir / f"{name}.lock")
+        if lock.acquire():
+            work_directory = work_dir / name
+            work_directory.mkdir(exist_ok=True)
+            return cls(work_directory, output_directory, publish_sources, lock)
+
+        logger.info(f"{work_dir / name} is used by {lock.read_owner()}")
+        work_directory = Path(tempfile.mkdtemp(prefix="wheel2deb-", dir=work_dir))
+        return cls(work_directory, output_directory, publish_sources)
+
+    def output_path(self, path: Path) -> Path:
+        """Path of a staged file or directory in the output directory"""
+        if path.is_relative_to(self.work_directory):
+            return self.output_directory / path.relative_to(self.work_directory)
+        return path
+
+    def stage(self, path: Path) -> Path:
+        """
+        Copy a source package of the output directory to the work directory
+        :return: Path of the source package in the work directory
+        """
+        if path.is_relative_to(self.work_directory):
+            return path
+        work_path = self.work_directory / path.relative_to(self.output_directory)
+        shutil.rmtree(work_path, ignore_errors=True)
+        shutil.copytree(path, work_path, symlinks=True)
+        self.staged.add(work_path)
+        return work_path
+
+    def publish(self, path: Path) -> List[Path]:
+        """
+        Move build results of a staged source package to the output directory,
+        and the source package itself when publish_sources is set
+        :return: Published build results
+        """
+        output_directory = self.output_path(path.parent)
+        output_directory.mkdir(parents=True, exist_ok=True)
+
+        # source packages directories are named {package}_{version}_{arch}
+        prefix = path.name.rsplit("_", 1)[0] + "_"
+        results = [
+            p
+            for p in path.parent.iterdir()
+            if p.name.startswith(prefix) and p.suffix in BUILD_RESULTS and p.is_file()
+        ]
+        if not any(p.suffix == ".deb" for p in results):
+            # the build failed, the .deb in the output directory is outdated
+            results = [p for p in results if p.suffix != ".digest"]
+        published = []
+        # .deb files come last, other processes consider that a package
+        # was built when its .deb exists
+        for result in sorted(results, key=lambda p: (p.suffix == ".deb", p.name)):
+            published.append(publish_file(result, output_directory / result.name))
+
+        # generated source packages are kept for the next run
+        if self.publish_sources:
+            publish_tree(path, output_directory / path.name, path not in self.staged)
+        elif path in self.staged:
+            shutil.rmtree(path, ignore_errors=True)
+        self.staged.discard(path)
+        return published
+
+    def publish_graphs(self) -> None:
+        """
+        Merge dependency graphs saved by convert into those of the output
+        directory, so that they still list wheels converted by other runs
+        """
+        for path in self.work_directory.rglob(GRAPH_FILENAME):
+            output_path = self.output_path(path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            graph = DependencyGraph.load(output_path) or DependencyGraph()
+            graph.merge(DependencyGraph.load(path) or DependencyGraph())
+            # saved in the work directory first, the file is replaced at once
+            graph.save(path)
+            publish_file(path, output_path)
+
+    def cleanup(self) -> None:
+        """Release the work directory, a temporary one is removed"""
+        if self.lock is None:
+            shutil.rmtree(self.work_directory, ignore_errors=True)
+            return
+        for path in self.staged:
+            shutil.rmtree(path, ignore_errors=True)
+        self.staged.clear()
+        self.lock.release()
+
+
+def publish_file(path: Path, destination: Path) -> Path:
+    """Move a file, replacing destination atomically"""
+    try:
+        os.replace(path, destination)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        # copy next to destination first, so that the file appears at once
+        tmp_path = destination.with_name(f".{destination.name}.{os.getpid()}.tmp")
+        shutil.copy2(path, tmp_path)
+        os.replace(tmp_path, destination)
+        path.unlink()
+    return destination
+
+
+def publish_tree(path: Path, destination: Path, keep: bool = False) -> None:
+    """
+    Move a directory, replacing destination
+    :param keep: Copy the directory instead
+    """
+    tmp_path = destination.with_name(f".{destination.name}.{os.getpid()}.tmp")
+    if keep:
+        shutil.copytree(path, tmp_path, symlinks=True)
+    else:
+        try:
+            os.rename(path, tmp_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.copytree(path, tmp_path, symlinks=True)
+            shutil.rmtree(path)
+
+    # directories cannot be replaced atomically, the old one is
+    # moved away first and removed once the new one is in place
+    old_path = destination.with_name(f".{destination.name}.{os.getpid()}.old")
+    if destination.exists():
+        os.rename(destination, old_path)
+    os.rename(tmp_path, destination)
+    shutil.rmtree(old_path, ignore_errors=True)
@@ -0,0 +1,150 @@
+import errno
+import fcntl
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from wheel2deb import logger as logging
+from wheel2deb.pydist import Record
+from wheel2deb.utils import write_if_changed
+
+logger = logging.getLogger(__name__)
+
+# ioctl sharing the blocks of a file with another one (btrfs, xfs)
+FICLONE = 0x40049409
+
+# errors of copy_file_range when it is not supported between two files
+COPY_FILE_RANGE_ERRORS = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP)
+
+
+def copy_file(source: Path, destination: Path) -> None:
+    """
+    Copy the content and permissions of a file, as a reflink when the
+    filesystem supports it, with copy_file_range otherwise.
+    The destination is replaced atomically.
+    """
+    tmp_path = destination.with_name(f".{destination.name}.{os.getpid()}.tmp")
+    try:
+        with source.open("rb") as fsrc, tmp_path.open("wb") as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            except OSError:
+                _copy_content(fsrc, fdst)
+        shutil.copymode(source, tmp_path)
+        os.replace(tmp_path, destination)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _copy_content(fsrc, fdst) -> None:
+    # copy_file_range copies in the kernel, without reading the file in
+    # user space, python may be built without it
+    if hasattr(os, "copy_file_range"):
+        try:
+            while os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30):
+                pass
+            return
+        except OSError as e:
+            if e.errno not in COPY_FILE_RANGE_ERRORS:
+                raise
+    fsrc.seek(0)
+    fdst.seek(0)
+    fdst.truncate()
+    shutil.copyfileobj(fsrc, fdst, 1 << 20)
+
+
+def load_manifest(path: Path) -> Dict[str, list]:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def sync_record(
+    source: Path, destination: Path, record: Record, manifest_path: Path
+) -> Tuple[List[str], List[str]]:
+    """
+    Synchronize a directory with an extracted wheel, using entries of its
+    RECORD to decide what to copy. The hash and size of synced files are
+    saved in a manifest, files whose entry did not change since they were
+    synced are not compared, files removed from RECORD are deleted.
+    Without manifest, files of destination missing from RECORD are deleted.
+    :param manifest_path: Manifest of a previous sync
+    :return: Copied files and deleted files, relative to destination
+    """
+    manifest = load_manifest(manifest_path)
+    if not manifest_path.exists() and destination.is_dir():
+        # synced by an older version of wheel2deb, list files once
+        manifest = dict.fromkeys(_walk_files(destination))
+    entries = {}
+    for path, digest, size in record.iter_entries():
+        if os.path.isabs(path) or ".." in Path(path).parts:
+            logger.warning(f"ignoring {path} listed in RECORD, outside of the wheel")
+            continue
+        entries[path] = [digest, size]
+
+    copies = []
+    for path, entry in entries.items():
+        target = destination / path
+        if entry[0] and manifest.get(path) == entry and target.exists():
+            continue
+        if not entry[0] and _same_content(source / path, target):
+            # RECORD lists itself without hash
+            continue
+        copies.append(path)
+
+    deleted = [path for path in manifest if path not in entries]
+    for path in deleted:
+        (destination / path).unlink(missing_ok=True)
+        _remove_empty_parents(destination / path, destination)
+
+    for directory in sorted({(destination / path).parent for path in copies}):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    def copy(path):
+        try:
+            copy_file(source / path, destination / path)
+            return True
+        except OSError as e:
+            logger.warning(f"failed to copy {path}: {e}")
+            entries.pop(path, None)
+            return False
+
+    # biggest files first, so that they do not end up running alone
+    copies.sort(key=lambda p: -entries[p][1])
+    with ThreadPoolExecutor() as executor:
+        copied = [p for p, ok in zip(copies, executor.map(copy, copies)) if ok]
+
+    write_if_changed(manifest_path, json.dumps(entries, sort_keys=True) + "\n")
+    return copied, deleted
+
+
+def _walk_files(root: Path) -> List[str]:
+    files = []
+    for parent, _, filenames in os.walk(root):
+        relative_parent = Path(parent).relative_to(root)
+        files.extend(str(relative_parent / name) for name in filenames)
+    return files
+
+
+def _same_content(source: Path, destination: Path) -> bool:
+    try:
+        if source.stat().st_size != destination.stat().st_size:
+            return False
+        return source.read_bytes() == destination.read_bytes()
+    except OSError:
+        return False
+
+
+def _remove_empty_parents(path: Path, root: Path) -> None:
+    for parent in path.parents:
+        if parent == root or not parent.is_relative_to(root):
+            return
+        try:
+            parent.rmdir()
+        except OSError:
+            return
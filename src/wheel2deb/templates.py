@@ -7,7 +7,7 @@ DEBIAN_CHANGELOG = """\
 
   * Release {{ package.version }}
 
- -- {{ ctx.maintainer_name }} <{{ ctx.maintainer_email }}>  Tue, 07 May 2019 20:31:30 +0000
+ -- {{ ctx.maintainer_name }} <{{ ctx.maintainer_email }}>  {{ date }}
 """
 
 DEBIAN_COMPAT = """\
@@ -44,9 +44,11 @@ set -e
 {% set pycompile = 'py3compile' %}
 {% endif %}
 
+{% if not package.bytecode %}
 if which {{ pycompile }} >/dev/null 2>&1; then
     {{ pycompile }} -p {{ package.name }}
 fi
+{% endif %}
 
 #DEBHELPER#
 """
@@ -63,9 +65,11 @@ set -e
 {% set pyclean = 'py3clean' %}
 {% endif %}
 
+{% if not package.bytecode %}
 if which {{ pyclean }} >/dev/null 2>&1; then
     {{ pyclean }} -p {{ package.name }}
 fi
+{% endif %}
 
 #DEBHELPER#
 """
@@ -1,13 +1,212 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import hashlib
 import os
+import stat
 import subprocess
+import threading
+import uuid
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, Dict, List, Tuple
 
+from wheel2deb import logger as logging
+from wheel2deb.metrics import metrics
 
-def shell(args: List[str], cwd: Path | None = None) -> Tuple[str, int]:
+logger = logging.getLogger(__name__)
+
+# maximum number of concurrent instances of a tool, apt-file reads
+# large indexes from disk, dpkg-buildpackage is CPU bound
+TOOL_LIMITS = {
+    "apt-cache": 8,
+    "apt-file": 2,
+    "dpkg-buildpackage": os.cpu_count() or 1,
+    "dpkg-deb": 8,
+}
+DEFAULT_TOOL_LIMIT = 8
+
+# size of the chunks of output read from commands
+READ_SIZE = 1 << 16
+
+# called with each line of output, without its newline
+OutputCallback = Callable[[str], None]
+
+
+@lru_cache(maxsize=None)
+def sanitized_env() -> Dict[str, str]:
+    """Environment of commands, computed once"""
     env = os.environ.copy()
+    # libs of the wheels being converted must not be loaded by tools
     env.pop("LD_LIBRARY_PATH", None)
-    result = subprocess.run(
-        args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=env
-    )
-    return result.stdout.decode("utf-8"), result.returncode
+    return env
+
+
+def parse_tool_limits(value: str) -> Dict[str, int]:
+    """Parse tool=N pairs separated by commas, logs invalid pairs"""
+    limits = {}
+    for pair in filter(None, (p.strip() for p in value.split(","))):
+        tool, _, limit = pair.partition("=")
+        if not limit.isdigit() or int(limit) < 1:
+            logger.error(f"invalid tool limit {pair}, expected tool=N with N >= 1")
+            continue
+        limits[tool.strip()] = int(limit)
+    return limits
+
+
+class CommandRunner:
+    """
+    Run commands in an event loop running in a background thread.
+    Threads and coroutines submit commands, which run concurrently,
+    each tool being limited to its own number of concurrent instances.
+    """
+
+    def __init__(self, limits: Dict[str, int] | None = None):
+        self.limits = {**TOOL_LIMITS, **(limits or {})}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._loop = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="command-runner", daemon=True
+                ).start()
+            return self._loop
+
+    def _semaphore(self, tool: str) -> asyncio.Semaphore:
+        # semaphores are created in the thread of the loop
+        with self._lock:
+            if tool not in self._semaphores:
+                limit = self.limits.get(tool, DEFAULT_TOOL_LIMIT)
+                self._semaphores[tool] = asyncio.Semaphore(limit)
+            return self._semaphores[tool]
+
+    async def _run(
+        self, args: List[str], cwd: Path | None, output: OutputCallback | None
+    ) -> Tuple[str, int]:
+        with metrics.timer("subprocess_wait"):
+            semaphore = self._semaphore(os.path.basename(args[0]))
+            await semaphore.acquire()
+        process = None
+        try:
+            metrics.increment("subprocesses")
+            with metrics.timer("subprocess"):
+                process = await asyncio.create_subprocess_exec(
+                    *args,
+                    cwd=cwd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    env=sanitized_env(),
+                )
+                # output is read in chunks, lines of the stream reader
+                # are limited to 64 KiB
+                chunks = []
+                pending = b""
+                while chunk := await process.stdout.read(READ_SIZE):
+                    chunks.append(chunk)
+                    if output is not None:
+                        *lines, pending = (pending + chunk).split(b"\n")
+                        for line in lines:
+                            output(line.decode("utf-8", errors="replace"))
+                if output is not None and pending:
+                    output(pending.decode("utf-8", errors="replace"))
+                returncode = await process.wait()
+        finally:
+            if process is not None and process.returncode is None:
+                # the caller gave up on the command (output callback failed)
+                process.kill()
+                await process.wait()
+            semaphore.release()
+        return b"".join(chunks).decode("utf-8", errors="replace"), returncode
+
+    def submit(
+        self,
+        args: List[str],
+        cwd: Path | None = None,
+        output: OutputCallback | None = None,
+    ) -> concurrent.futures.Future:
+        """
+        Start a command
+        :param output: Called with each line of output as soon as it is
+        read, in the log context of the caller
+        :return: Future of the output and return code of the command
+        """
+        if output is not None:
+            context = contextvars.copy_context()
+            callback = output
+
+            def output(line):
+                context.run(callback, line)
+
+        return asyncio.run_coroutine_threadsafe(
+            self._run(list(args), cwd, output), self.loop
+        )
+
+
+runner = CommandRunner(parse_tool_limits(os.environ.get("WHEEL2DEB_TOOL_LIMITS", "")))
+
+
+def shell(
+    args: List[str], cwd: Path | None = None, output: OutputCallback | None = None
+) -> Tuple[str, int]:
+    """Run a command, see CommandRunner.submit"""
+    return runner.submit(args, cwd, output).result()
+
+
+async def shell_async(
+    args: List[str], cwd: Path | None = None, output: OutputCallback | None = None
+) -> Tuple[str, int]:
+    """Run a command without blocking the event loop of the caller"""
+    return await asyncio.wrap_future(runner.submit(args, cwd, output))
+
+
+def write_if_changed(path: Path, content: str | bytes) -> bool:
+    """
+    Write a file only when its content changes, so that its modification
+    time tells when it last changed. The file is replaced atomically,
+    keeping its permissions.
+    :return: True if the file was written
+    """
+    data = content.encode() if isinstance(content, str) else content
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+
+    write_atomic(path, data)
+    return True
+
+
+def write_atomic(path: Path, content: bytes) -> None:
+    """
+    Replace a file atomically, keeping its permissions, readers see either
+    the old or the new content. The temporary file has a unique name, so
+    that processes of several hosts sharing the directory do not collide.
+    """
+    try:
+        mode = stat.S_IMODE(path.stat().st_mode)
+    except OSError:
+        mode = None
+
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        tmp_path.write_bytes(content)
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def hash_file(path: Path) -> str:
+    """:return: Hex sha256 of a file"""
+    sha = hashlib.sha256()
+    with path.open("rb") as f:
+        while block := f.read(1 << 20):
+            sha.update(block)
+    return sha.hexdigest()
@@ -0,0 +1,207 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import shutil
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from wheel2deb import apt
+from wheel2deb import logger as logging
+from wheel2deb.build import build_packages
+from wheel2deb.context import Settings
+from wheel2deb.debian import convert_wheels
+from wheel2deb.discovery import find_wheels
+from wheel2deb.metrics import metrics
+from wheel2deb.pydist import EXTRACT_PATH, enable_wheel_cache
+
+logger = logging.getLogger(__name__)
+
+# inotify(7) events signaling that a file may have landed in a directory
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+
+# how long to sleep between two scans when nothing happens
+IDLE_TIMEOUT = 30
+
+
+class Notifier:
+    """
+    Wait for files to be written in a list of directories, and in their
+    subdirectories when recursive. Uses inotify when available, and falls
+    back to polling.
+    """
+
+    def __init__(self, directories: List[Path], recursive: bool = False):
+        self.fd = None
+        self.recursive = recursive
+        # directories with an inotify watch
+        self.watched = set()
+        try:
+            self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+            self.fd = fd
+            self.watch(directories)
+        except (OSError, AttributeError) as e:
+            self.close()
+            logger.debug(f"inotify unavailable, polling search paths: {e}")
+
+    def watch(self, directories: List[Path]) -> None:
+        """
+        Watch directories that are not watched yet, with their subdirectories
+        when recursive, call it again to watch subdirectories created since
+        """
+        if self.fd is None:
+            return
+        # watches of removed directories are removed by the kernel
+        self.watched = {d for d in self.watched if d.is_dir()}
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        for directory in directories:
+            tree = [directory]
+            if self.recursive:
+                tree.extend(
+                    Path(parent) / name
+                    for parent, dirnames, _ in os.walk(directory)
+                    for name in dirnames
+                )
+            for path in tree:
+                if path in self.watched:
+                    continue
+                if self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask) < 0:
+                    raise OSError(ctypes.get_errno(), f"cannot watch {path}")
+                self.watched.add(path)
+
+    def wait(self, timeout: float) -> None:
+        """Return after timeout seconds, or earlier if a file was written"""
+        if self.fd is None:
+            time.sleep(timeout)
+            return
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            # events are only used to wake up, drain them
+            try:
+                while os.read(self.fd, 1 << 16):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self) -> "Notifier":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class WheelTracker:
+    """
+    Track wheels found in search paths, a wheel is ready to be converted
+    once its size and modification time did not change for debounce seconds
+    and it is a valid zip file.
+    """
+
+    def __init__(self, debounce: float):
+        self.debounce = debounce
+        # wheels already handed over for conversion
+        self.known: Dict[Path, Tuple[int, int]] = {}
+        # wheels being written: stat key and time since which it is stable
+        self.pending: Dict[Path, Tuple[Tuple[int, int], float]] = {}
+
+    def update(self, paths: List[Path]) -> List[Path]:
+        """
+        :param paths: Wheels currently found in search paths
+        :return: New or modified wheels ready to be converted
+        """
+        # forget removed wheels, they no longer satisfy requirements
+        found = set(paths)
+        for tracked in (self.known, self.pending):
+            for path in [p for p in tracked if p not in found]:
+                del tracked[path]
+
+        now = time.monotonic()
+        ready = []
+        for path in paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            key = (stat.st_size, stat.st_mtime_ns)
+            if self.known.get(path) == key:
+                continue
+            if path not in self.pending or self.pending[path][0] != key:
+                self.pending[path] = (key, now)
+                continue
+            if now - self.pending[path][1] >= self.debounce and zipfile.is_zipfile(path):
+                ready.append(path)
+
+        for path in ready:
+            if path in self.known:
+                # the wheel was replaced, unpack it again
+                shutil.rmtree(EXTRACT_PATH / path.name[:-4], ignore_errors=True)
+            self.known[path] = self.pending.pop(path)[0]
+
+        return ready
+
+
+def watch_wheels(
+    settings: Settings,
+    output_directory: Path,
+    search_paths: List[Path],
+    include_wheels: List[str] | None,
+    exclude_wheels: List[str] | None,
+    recursive: bool,
+    selection: str,
+    workers_count: int,
+    force_build: bool,
+    debounce: float,
+    apt_index: bool = False,
+) -> None:
+    """
+    Convert and build wheels as they land in search paths, until interrupted
+    :param apt_index: Update apt repository index of the output directory
+    after each batch of wheels
+    """
+    enable_wheel_cache()
+    tracker = WheelTracker(debounce)
+
+    with Notifier(search_paths, recursive) as notifier:
+        logger.task(f"Watching {', '.join(str(p) for p in search_paths)}")
+        try:
+            while True:
+                if recursive:
+                    try:
+                        notifier.watch(search_paths)
+                    except OSError as e:
+                        # the idle scan still finds wheels of that directory
+                        logger.debug(f"{e}")
+                ready = tracker.update(
+                    find_wheels(search_paths, include_wheels, exclude_wheels, recursive)
+                )
+                if ready:
+                    # each batch of wheels is a job, see JobServer.run_job
+                    apt.refresh_cache()
+                    metrics.reset()
+                    # previously converted wheels can satisfy requirements
+                    extra_paths = [p for p in tracker.known if p not in ready]
+                    packages = convert_wheels(
+                        settings, output_directory, ready, extra_paths, selection
+                    )
+                    build_packages(
+                        [p.root for p in packages], workers_count, force_build, apt_index
+                    )
+                    logger.summary(
+                        f"Warnings: {logging.get_warning_counter()}. "
+                        f"Errors: {logging.get_error_counter()}."
+                    )
+                notifier.wait(debounce if tracker.pending else IDLE_TIMEOUT)
+        except KeyboardInterrupt:
+            pass
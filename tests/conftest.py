@@ -1,5 +1,6 @@
 import hashlib
 import os
+import struct
 import sys
 from pathlib import Path
 from tempfile import mkdtemp
@@ -8,6 +9,14 @@ from unittest.mock import patch
 import pytest
 
 
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    """Keep caches (wheel catalog, shlibs) out of the home directory"""
+    monkeypatch.delenv("WHEEL2DEB_CACHE_DIR", raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
 @pytest.fixture
 def sha256sum():
     def _sha256sum(file_path: Path) -> str:
@@ -50,3 +59,42 @@ def wheel_path():
         )
 
     return next(iter(tmp_path.glob("dist/*.whl")))
+
+
+@pytest.fixture
+def shared_lib():
+    """Write a minimal 64 bits ELF shared object"""
+
+    def _shared_lib(path: Path, needed=(), runpath=None) -> Path:
+        strings = [*needed, *([runpath] if runpath else [])]
+        dynstr = b"\0"
+        offsets = []
+        for string in strings:
+            offsets.append(len(dynstr))
+            dynstr += string.encode() + b"\0"
+        dynstr += b"\0" * (-len(dynstr) % 8)
+
+        tags = [1] * len(needed) + ([29] if runpath else [])
+        dynamic = b"".join(struct.pack("<qQ", t, o) for t, o in zip(tags, offsets))
+        dynamic += struct.pack("<qQ", 0, 0)
+
+        dynstr_offset = 64
+        dynamic_offset = dynstr_offset + len(dynstr)
+        sections_offset = dynamic_offset + len(dynamic)
+        header = b"\x7fELF\x02\x01\x01" + b"\0" * 9
+        header += struct.pack(
+            "<HHIQQQIHHHHHH", 3, 62, 1, 0, 0, sections_offset, 0, 64, 0, 0, 64, 3, 0
+        )
+        sections = struct.pack("<IIQQQQIIQQ", *[0] * 10)
+        sections += struct.pack(
+            "<IIQQQQIIQQ", 0, 3, 0, 0, dynstr_offset, len(dynstr), 0, 0, 1, 0
+        )
+        sections += struct.pack(
+            "<IIQQQQIIQQ", 0, 6, 0, 0, dynamic_offset, len(dynamic), 1, 0, 8, 16
+        )
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(header + dynstr + dynamic + sections)
+        return path
+
+    return _shared_lib
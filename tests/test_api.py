@@ -0,0 +1,21 @@
+from wheel2deb import api
+
+
+def test_convert__should_return_a_result_per_wheel_when_wheels_are_converted(
+    wheel_path, tmp_path
+):
+    broken_path = tmp_path / "broken-0.1.0-py3-none-any.whl"
+    broken_path.write_bytes(b"not a zip file")
+
+    results = api.convert([wheel_path, broken_path], tmp_path / "output")
+
+    assert [r.wheel_path for r in results] == [wheel_path, broken_path]
+    package = results[0].packages[0]
+    assert package.name == "python3-foobar"
+    assert (package.root / "debian/control").is_file()
+    assert "python3:any" in package.depends
+    assert results[0].warnings == ("no license found !",)
+    assert "convert" in results[0].timings
+    assert not results[1].packages
+    assert "failed to read" in results[1].errors[0]
+    assert results[1].success is False
@@ -1,3 +1,6 @@
+import os
+
+from wheel2deb import apt
 from wheel2deb.apt import Package
 
 
@@ -10,3 +13,17 @@ def test_package_name_parsing():
 
     bar = Package.factory("bar", "3-1-1")
     assert bar.version == "3-1" and bar.revision == "1"
+
+
+def test_refresh_cache__should_forget_lookups_when_apt_lists_changed(
+    tmp_path, monkeypatch
+):
+    lists = tmp_path / "lists"
+    lists.mkdir()
+    monkeypatch.setattr(apt, "APT_CACHE_PATHS", (str(lists), str(tmp_path / "none")))
+    monkeypatch.setattr(apt, "_cache_mtimes", None)
+
+    assert apt.refresh_cache()
+    assert not apt.refresh_cache()
+    os.utime(lists, ns=(0, 0))
+    assert apt.refresh_cache()
@@ -1,4 +1,12 @@
-from wheel2deb.build import parse_debian_control
+import os
+from pathlib import Path
+
+from wheel2deb.build import (
+    build_packages,
+    needs_build,
+    parse_debian_control,
+    sort_paths,
+)
 
 DEBIAN_CONTROL = """\
 Source: python-absl-py
@@ -24,3 +32,52 @@ def test_parse_debian_control(tmp_path):
     assert control["Section"] == "python"
     assert control["Package"] == "python-absl-py"
     assert control["Build-Depends"][0] == "debhelper"
+
+
+def test_sort_paths__should_follow_package_order():
+    paths = [Path("python3-a_1_all"), Path("python3-z_1_all"), Path("python3-b_1_all")]
+    assert sort_paths(paths, ["python3-b", "python3-a"]) == [
+        Path("python3-b_1_all"),
+        Path("python3-a_1_all"),
+        Path("python3-z_1_all"),
+    ]
+
+
+def test_build_packages__should_consume_generators_when_packages_are_built(tmp_path):
+    consumed = []
+
+    def generate():
+        for name in ("python3-a_1_all", "python3-b_1_all"):
+            path = tmp_path / name
+            Path(f"{path}.deb").touch()
+            consumed.append(path)
+            yield path
+
+    build_packages(generate(), 2, False)
+    assert consumed == [tmp_path / "python3-a_1_all", tmp_path / "python3-b_1_all"]
+
+
+def test_needs_build__should_return_true_when_digest_is_newer_than_deb(tmp_path):
+    path = tmp_path / "python3-a_1_all"
+    assert needs_build(path, path) is True
+
+    Path(f"{path}.digest").write_text("abc\n")
+    Path(f"{path}.deb").touch()
+    assert needs_build(path, path) is False
+
+    os.utime(f"{path}.deb", ns=(0, 0))
+    assert needs_build(path, path) is True
+
+
+def test_needs_build__should_compare_digests_when_package_is_staged(tmp_path):
+    path = tmp_path / "work" / "python3-a_1_all"
+    output_path = tmp_path / "output" / "python3-a_1_all"
+    path.parent.mkdir()
+    output_path.parent.mkdir()
+    Path(f"{path}.digest").write_text("abc\n")
+    Path(f"{output_path}.deb").touch()
+    Path(f"{output_path}.digest").write_text("abc\n")
+    assert needs_build(path, output_path) is False
+
+    Path(f"{path}.digest").write_text("def\n")
+    assert needs_build(path, output_path) is True
@@ -0,0 +1,79 @@
+import marshal
+import sys
+
+from wheel2deb.bytecode import cache_path, compile_bytecode, remove_compiled_bytecode
+from wheel2deb.pyvers import Version
+
+VERSION = Version(*sys.version_info[:2])
+DESTINATION = "/usr/lib/python3/dist-packages/"
+
+
+def test_compile_bytecode__should_write_hash_based_bytecode_when_modules_are_installed(
+    tmp_path,
+):
+    src, manifest_path = tmp_path / "src", tmp_path / "src.bytecode"
+    modules = [
+        src / "foo/__init__.py",
+        src / "foo-1.0.data/purelib/bar.py",
+    ]
+    for module in modules:
+        module.parent.mkdir(parents=True)
+        module.write_text("x = 1\n")
+    (src / "foo-1.0.data/scripts").mkdir()
+    (src / "foo-1.0.data/scripts/baz.py").write_text("x = 1\n")
+
+    assert compile_bytecode(src, VERSION, DESTINATION, manifest_path)
+    assert not (src / "foo-1.0.data/scripts/__pycache__").exists()
+
+    data = cache_path(modules[1], VERSION).read_bytes()
+    # flags of checked hash based bytecode, see PEP 552
+    assert int.from_bytes(data[4:8], "little") == 3
+    code = marshal.loads(data[16:])
+    assert code.co_filename == "/usr/lib/python3/dist-packages/bar.py"
+
+
+def test_compile_bytecode__should_only_remove_bytecode_it_compiled(tmp_path):
+    src, manifest_path = tmp_path / "src", tmp_path / "src.bytecode"
+    (src / "foo").mkdir(parents=True)
+    (src / "foo/__init__.py").write_text("")
+    (src / "foo/removed.py").write_text("")
+    # shipped in the wheel, listed in RECORD
+    shipped = src / "foo/__pycache__/__init__.cpython-36.pyc"
+    shipped.parent.mkdir()
+    shipped.write_bytes(b"shipped")
+    recorded = {"foo/__init__.py", "foo/removed.py", str(shipped.relative_to(src))}
+
+    assert compile_bytecode(src, VERSION, DESTINATION, manifest_path, recorded)
+    removed = cache_path(src / "foo/removed.py", VERSION)
+    assert removed.exists()
+
+    (src / "foo/removed.py").unlink()
+    assert compile_bytecode(src, VERSION, DESTINATION, manifest_path, recorded)
+    assert not removed.exists()
+    assert cache_path(src / "foo/__init__.py", VERSION).exists()
+
+    assert remove_compiled_bytecode(src, manifest_path) == 1
+    assert not manifest_path.exists()
+    assert list(shipped.parent.iterdir()) == [shipped]
+
+
+def test_compile_bytecode__should_fail_when_a_module_is_invalid(tmp_path):
+    (tmp_path / "src/foo").mkdir(parents=True)
+    (tmp_path / "src/foo/__init__.py").write_text("print 'python 2'\n")
+    assert not compile_bytecode(
+        tmp_path / "src", VERSION, DESTINATION, tmp_path / "src.bytecode"
+    )
+
+
+def test_compile_bytecode__should_compile_top_level_module_when_wheel_has_one_module(
+    tmp_path,
+):
+    src, manifest_path = tmp_path / "src", tmp_path / "src.bytecode"
+    (src / "six-1.16.0.dist-info").mkdir(parents=True)
+    (src / "six-1.16.0.dist-info/METADATA").write_text("")
+    (src / "six.py").write_text("x = 1\n")
+
+    assert compile_bytecode(src, VERSION, DESTINATION, manifest_path)
+
+    code = marshal.loads(cache_path(src / "six.py", VERSION).read_bytes()[16:])
+    assert code.co_filename == "/usr/lib/python3/dist-packages/six.py"
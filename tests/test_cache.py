@@ -0,0 +1,46 @@
+from wheel2deb import debian
+from wheel2deb.cache import DiskCache, cache_directory
+from wheel2deb.context import Context
+from wheel2deb.debian import SourcePackage
+from wheel2deb.graph import PythonDeps
+from wheel2deb.pydist import parse_wheel
+
+
+def test_disk_cache__should_return_stored_value(tmp_path):
+    cache = DiskCache("test", tmp_path)
+    assert cache.get("key") is None
+    cache.set("key", {"missing": ["libfoo.so.1"]})
+    assert DiskCache("test", tmp_path).get("key") == {"missing": ["libfoo.so.1"]}
+
+
+def test_cache_directory__should_honor_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("WHEEL2DEB_CACHE_DIR", str(tmp_path))
+    assert cache_directory() == tmp_path
+    monkeypatch.delenv("WHEEL2DEB_CACHE_DIR")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert cache_directory() == tmp_path / "wheel2deb"
+
+
+def test_search_shlibs_deps__should_not_search_packages_again_when_lib_is_cached(
+    wheel_path, tmp_path, monkeypatch, shared_lib
+):
+    commands = []
+
+    def shell(args, cwd=None):
+        commands.append(args[0])
+        return "libw2d-foo1: /usr/lib/x86_64-linux-gnu/libw2d-foo.so.1\n", 0
+
+    monkeypatch.setattr(debian, "shell", shell)
+    monkeypatch.setattr(debian, "shlibs_cache", DiskCache("shlibs", tmp_path))
+
+    wheel = parse_wheel(wheel_path, tmp_path / "extract")
+    shared_lib(wheel.extract_path / "foobar" / "_foo.so", ["libw2d-foo.so.1"])
+    with (wheel.info_dir / "RECORD").open("a") as f:
+        f.write("foobar/_foo.so,sha256=foo,1\n")
+
+    for _ in range(2):
+        package = SourcePackage(Context(), wheel, tmp_path / "output", deps=PythonDeps())
+        package.search_shlibs_deps()
+        assert "libw2d-foo1" in package.depends
+
+    assert commands == ["apt-file"]
@@ -0,0 +1,38 @@
+import os
+
+from wheel2deb.catalog import Catalog
+from wheel2deb.metrics import metrics
+from wheel2deb.pydist import WheelInfo
+from wheel2deb.pyvers import Version
+
+
+def test_from_wheel_file__should_read_wheel_without_extracting_it(wheel_path):
+    info = WheelInfo.from_wheel_file(wheel_path)
+    assert info.name == "foobar"
+    assert info.tags == ("py3-none-any",)
+    assert [r.name for r in info.requires({"python_version": "3"})] == ["py"]
+    assert info.version_supported(Version(3, 8)) is True
+    assert info.record_summary["files"] > 0
+
+
+def test_catalog_get__should_not_parse_wheel_again_when_it_did_not_change(
+    wheel_path, tmp_path
+):
+    with Catalog(tmp_path / "catalog.sqlite") as catalog:
+        catalog.get(wheel_path)
+
+    misses = metrics.totals.get("catalog_misses", 0)
+    hits = metrics.totals.get("catalog_hits", 0)
+    with Catalog(tmp_path / "catalog.sqlite") as catalog:
+        info = catalog.get(wheel_path)
+        # touching the wheel does not change its content
+        stat = wheel_path.stat()
+        os.utime(wheel_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+        touched = catalog.get(wheel_path)
+
+    assert metrics.totals["catalog_hits"] == hits + 1
+    assert metrics.totals.get("catalog_misses", 0) == misses
+    assert info.to_dict() == touched.to_dict()
+    assert info.requires_dist == ("py>=0.1",)
+    assert info.path == wheel_path
+    assert len(info.sha256) == 64
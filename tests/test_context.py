@@ -0,0 +1,49 @@
+import pytest
+
+from wheel2deb.context import Settings, Target, load_configuration
+from wheel2deb.pyvers import Version
+
+configuration_with_targets = """\
+.+:
+  arch: amd64
+targets:
+  - python_version: "3.9"
+    distribution: bullseye
+  - name: bookworm
+    python_version: "3.11"
+    arch: arm64
+"""
+
+
+def test_load_configuration__should_parse_targets_when_configuration_has_targets(
+    tmp_path,
+):
+    configuration_path = tmp_path / "wheel2deb.yml"
+    configuration_path.write_text(configuration_with_targets)
+    settings = load_configuration(configuration_path)
+    assert [t.name for t in settings.targets] == ["3.9-bullseye", "bookworm"]
+    assert list(settings.config.keys()) == [".+"]
+
+
+def test_get_ctx__should_apply_target_settings_last():
+    settings = Settings({".+": {"arch": "amd64"}})
+    target = Target.from_dict({"python_version": "3.11", "arch": "arm64"})
+    ctx = settings.get_ctx("foobar", target)
+    assert ctx.arch == "arm64"
+    assert ctx.python_version == Version(3, 11)
+    assert settings.get_ctx("foobar").arch == "amd64"
+
+
+@pytest.mark.parametrize(
+    "targets",
+    [
+        "  - python_version: 3.10\n",
+        "  - name: py311\n    python_version: '3.11'\n  - name: py311\n",
+        "  - distribution: bookworm\n  - distribution: bookworm\n",
+    ],
+)
+def test_load_configuration__should_exit_when_targets_are_invalid(tmp_path, targets):
+    configuration_path = tmp_path / "wheel2deb.yml"
+    configuration_path.write_text(f"targets:\n{targets}")
+    with pytest.raises(SystemExit):
+        load_configuration(configuration_path)
@@ -0,0 +1,132 @@
+import os
+import subprocess
+import sys
+import zipfile
+from base64 import urlsafe_b64encode
+from hashlib import sha256
+
+from wheel2deb.context import Settings
+from wheel2deb.debian import (
+    changelog_date,
+    convert_wheels,
+    digest_path,
+    select_supported_wheels,
+)
+from wheel2deb.pydist import WheelInfo
+
+WHEELS = [
+    "foo-1.0.0-cp311-cp311-manylinux_2_17_x86_64.whl",
+    "foo-1.1.0-py3-none-any.whl",
+    "foo-1.1.0-cp311-cp311-manylinux_2_17_aarch64.whl",
+    "bar-0.1.0-py3-none-any.whl",
+]
+
+
+def select(selection, names=WHEELS):
+    settings = Settings()
+    settings.default_ctx.python_version = "3.11"
+    settings.default_ctx.platform_machine = "x86_64"
+    wheels = [WheelInfo(name) for name in names]
+    return [
+        w.wheel_name for w in select_supported_wheels(settings, wheels, None, selection)
+    ]
+
+
+def test_select_supported_wheels__should_keep_one_wheel_per_project_when_selection_is_set():  # noqa: E501
+    assert select("all") == WHEELS
+    assert select("newest") == [WHEELS[1], WHEELS[3]]
+    assert select("best-match") == [WHEELS[0], WHEELS[3]]
+
+    # newer wheels built for another machine or another interpreter
+    names = [
+        "baz-1.0.0-cp311-cp311-manylinux_2_17_x86_64.whl",
+        "baz-2.0.0-cp311-cp311-manylinux_2_17_aarch64.whl",
+        "baz-2.0.0-cp312-cp312-manylinux_2_17_x86_64.whl",
+        "qux-1.0.0-cp311-cp311-manylinux_2_17_aarch64.whl",
+        "abi-1.0.0-cp39-abi3-manylinux_2_17_x86_64.whl",
+        "abi-2.0.0-cp312-abi3-manylinux_2_17_x86_64.whl",
+    ]
+    expected = [names[0], names[3], names[4]]
+    assert select("newest", names) == expected
+    assert select("best-match", names) == expected
+
+
+def test_convert_wheels__should_not_rewrite_files_when_run_twice(wheel_path, tmp_path):
+    settings = Settings()
+    root = convert_wheels(settings, tmp_path, [wheel_path])[0].root
+    paths = [p for p in root.rglob("*") if p.is_file()] + [digest_path(root)]
+    mtimes = {p: p.stat().st_mtime_ns for p in paths}
+
+    assert convert_wheels(settings, tmp_path, [wheel_path])[0].root == root
+    assert {p: p.stat().st_mtime_ns for p in paths} == mtimes
+    install = (root / "debian/install").read_text().splitlines()
+    assert install == sorted(install)
+
+
+def test_changelog_date__should_use_source_date_epoch_when_set(monkeypatch):
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "0")
+    assert changelog_date() == "Thu, 01 Jan 1970 00:00:00 +0000"
+    monkeypatch.delenv("SOURCE_DATE_EPOCH")
+    assert changelog_date() == "Tue, 07 May 2019 20:31:30 +0000"
+
+
+def test_convert_wheels__should_ship_bytecode_when_precompile_is_set(
+    wheel_path, tmp_path
+):
+    settings = Settings()
+    settings.default_ctx.precompile = True
+    root = convert_wheels(settings, tmp_path, [wheel_path])[0].root
+    tag = f"cpython-{sys.version_info[0]}{sys.version_info[1]}"
+    pyc = root / f"src/foobar/__pycache__/test.{tag}.pyc"
+    mtime = pyc.stat().st_mtime_ns
+    assert "py3compile" not in (root / "debian/postinst").read_text()
+
+    convert_wheels(settings, tmp_path, [wheel_path])
+    assert pyc.stat().st_mtime_ns == mtime
+
+    settings.default_ctx.precompile = False
+    convert_wheels(settings, tmp_path, [wheel_path])
+    assert not pyc.parent.exists()
+    assert "py3compile" in (root / "debian/postinst").read_text()
+
+
+def test_convert_wheels__should_write_the_same_digest_when_hash_seed_changes(tmp_path):
+    requirements = "".join(f"Requires-Dist: missing-{i}>=1\n" for i in range(8))
+    files = {
+        "foo/__init__.py": "",
+        "foo-1.0.dist-info/METADATA": (
+            f"Metadata-Version: 2.1\nName: foo\nVersion: 1.0\n{requirements}"
+        ),
+        "foo-1.0.dist-info/WHEEL": "Wheel-Version: 1.0\nTag: py3-none-any\n",
+    }
+    record = ""
+    for name, content in files.items():
+        digest = urlsafe_b64encode(sha256(content.encode()).digest())
+        record += f"{name},sha256={digest.decode().rstrip('=')},{len(content)}\n"
+    files["foo-1.0.dist-info/RECORD"] = f"{record}foo-1.0.dist-info/RECORD,,\n"
+    path = tmp_path / "foo-1.0-py3-none-any.whl"
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+
+    script = (
+        "import sys\n"
+        "from pathlib import Path\n"
+        "from wheel2deb.context import Settings\n"
+        "from wheel2deb.debian import convert_wheels, digest_path\n"
+        "output = Path(sys.argv[2])\n"
+        "root = convert_wheels(Settings(), output, [Path(sys.argv[1])])[0].root\n"
+        "print(digest_path(root).read_text(), end='')\n"
+    )
+    digests = []
+    for seed in ("1", "2"):
+        env = {**os.environ, "PYTHONHASHSEED": seed}
+        result = subprocess.run(
+            [sys.executable, "-c", script, str(path), str(tmp_path / seed)],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        digests.append(result.stdout)
+    assert digests[0] and digests[0] == digests[1]
@@ -1,6 +1,12 @@
+from wheel2deb import depends
 from wheel2deb.context import Context
-from wheel2deb.depends import get_dependency_string, search_python_deps, suggest_name
-from wheel2deb.pydist import parse_wheel
+from wheel2deb.depends import (
+    get_dependency_string,
+    resolve_python_deps,
+    search_python_deps,
+    suggest_name,
+)
+from wheel2deb.pydist import WheelInfo, parse_wheel
 from wheel2deb.pyvers import Version
 
 
@@ -11,6 +17,9 @@ def test_name_suggestion():
 
     assert suggest_name(ctx, "O_O") == "python3-o-o"
 
+    ctx.map = {"Foo_Bar": "foobar"}
+    assert suggest_name(ctx, "foo-bar") == "python3-foobar"
+
     ctx.python_version = Version(2)
     assert suggest_name(ctx, "Click") == "python-click"
 
@@ -24,6 +33,25 @@ def test_search_python_deps(wheel_path):
     assert not missing_deps
 
 
+def test_resolve_python_deps__should_keep_dots_in_debian_names_when_project_is_dotted(
+    monkeypatch,
+):
+    searched = []
+    monkeypatch.setattr(
+        depends, "search_packages", lambda names, arch: searched.extend(names) or [None]
+    )
+    wheel = WheelInfo("foo-0.1.0-py3-none-any.whl", requires_dist=["Zope.Interface>=5"])
+    extra = WheelInfo("zope_interface-5.0-py3-none-any.whl")
+
+    deps = resolve_python_deps(Context(), wheel, [extra])
+
+    assert searched == ["python3-zope.interface"]
+    assert deps.depends == ["python3-zope.interface (>= 5)"]
+    assert deps.wheels == ["zope_interface-5.0-py3-none-any.whl"]
+    wheel = WheelInfo("zope.interface-5.0-py3-none-any.whl")
+    assert suggest_name(Context(), wheel.project_name) == "python3-zope.interface"
+
+
 def test_get_dependency_string():
     assert get_dependency_string("python3-py", "==", "1.2.3") == "python3-py (<< 1.3)"
     assert get_dependency_string("python3-py", "==", "1.2.*") == "python3-py (<< 1.3)"
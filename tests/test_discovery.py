@@ -0,0 +1,41 @@
+from wheel2deb.discovery import WheelMatcher, find_wheels
+
+WHEELS = [
+    "Foo_Bar-1.0.0-py3-none-any.whl",
+    "foo_bar-2.0.0-py3-none-any.whl",
+    "numpy-1.26.4-cp311-cp311-manylinux_2_17_x86_64.whl",
+    "pytest-8.0.0-1-py3-none-any.whl",
+]
+
+
+def test_wheel_matcher__should_match_filenames_projects_globs_and_regexes():
+    def matches(*patterns):
+        matcher = WheelMatcher(patterns)
+        return [w for w in WHEELS if matcher.match(w)]
+
+    assert matches("pytest-8.0.0-1-py3-none-any.whl") == [WHEELS[3]]
+    assert matches("foo-bar") == WHEELS[:2]
+    assert matches("FOO.BAR==2.0.0") == [WHEELS[1]]
+    assert matches("foo*==1.*") == [WHEELS[0]]
+    assert matches("*-manylinux_*.whl") == [WHEELS[2]]
+    assert matches("re:^py", "numpy") == WHEELS[2:]
+    assert matches("pytest==7.*", "bar") == []
+
+
+def test_find_wheels__should_apply_include_and_exclude_patterns(tmp_path):
+    (tmp_path / "sub").mkdir()
+    for name in WHEELS[:2]:
+        (tmp_path / name).touch()
+    for name in WHEELS[2:]:
+        (tmp_path / "sub" / name).touch()
+    (tmp_path / "foo.txt").touch()
+
+    assert [p.name for p in find_wheels([tmp_path])] == WHEELS[:2]
+    assert find_wheels([tmp_path], recursive=True) == [
+        tmp_path / WHEELS[0],
+        tmp_path / WHEELS[1],
+        tmp_path / "sub" / WHEELS[2],
+        tmp_path / "sub" / WHEELS[3],
+    ]
+    wheels = find_wheels([tmp_path], ["foo-bar", "numpy"], ["*==2.*"], recursive=True)
+    assert [p.name for p in wheels] == [WHEELS[0], WHEELS[2]]
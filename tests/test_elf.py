@@ -0,0 +1,33 @@
+from wheel2deb.elf import find_missing_libs, read_elf
+
+
+def test_read_elf__should_return_needed_libs_and_runpath(tmp_path, shared_lib):
+    path = shared_lib(tmp_path / "_foo.so", ["libbar.so.1"], "$ORIGIN/../foo.libs")
+    elf = read_elf(path)
+    assert elf.abi == (2, 1, 62)
+    assert elf.needed == ("libbar.so.1",)
+    assert elf.runpath == ("$ORIGIN/../foo.libs",)
+    assert elf.rpath == ()
+
+
+def test_read_elf__should_return_none_when_file_is_not_elf(tmp_path):
+    (tmp_path / "libfoo.so").write_text("INPUT(libfoo.so.1)")
+    (tmp_path / "empty.so").touch()
+    assert read_elf(tmp_path / "libfoo.so") is None
+    assert read_elf(tmp_path / "empty.so") is None
+
+
+def test_find_missing_libs__should_resolve_libs_from_runpath_and_lib_dirs(
+    tmp_path, shared_lib
+):
+    path = shared_lib(
+        tmp_path / "foo" / "_foo.so",
+        ["libbar.so.1", "libbaz.so.2", "libw2d-missing.so.0"],
+        "$ORIGIN/../foo.libs",
+    )
+    shared_lib(tmp_path / "foo.libs" / "libbar.so.1")
+    shared_lib(tmp_path / "baz" / "libbaz.so.2")
+    elf = read_elf(path)
+
+    missing = find_missing_libs(path, elf, [tmp_path / "baz"], "amd64")
+    assert missing == ["libw2d-missing.so.0"]
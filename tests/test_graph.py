@@ -0,0 +1,43 @@
+from wheel2deb.graph import DependencyGraph, Node, PythonDeps, save_graph
+
+
+def make_graph():
+    graph = DependencyGraph()
+    for name, wheels in (("a", ["b", "c"]), ("b", ["c"]), ("c", []), ("d", ["a"])):
+        graph.nodes[name] = Node(name, f"python3-{name}", PythonDeps(wheels=wheels))
+    return graph
+
+
+def test_order__should_sort_dependencies_first():
+    assert make_graph().order() == ["c", "b", "a", "d"]
+
+
+def test_order__should_include_every_wheel_when_graph_has_cycles():
+    graph = make_graph()
+    graph.nodes["c"] = Node("c", "python3-c", PythonDeps(wheels=["d"]))
+    assert sorted(graph.order()) == ["a", "b", "c", "d"]
+
+
+def test_from_dict__should_load_graph_serialized_with_to_dict():
+    graph = make_graph()
+    assert DependencyGraph.from_dict(graph.to_dict()) == graph
+
+
+def test_save_graph__should_keep_wheels_of_previous_runs_when_graph_exists(tmp_path):
+    path = tmp_path / "dependency-graph.json"
+    make_graph().save(path)
+    graph = DependencyGraph()
+    graph.nodes["b2"] = Node("b2", "python3-b", PythonDeps(wheels=["c"]))
+    graph.nodes["e"] = Node("e", "python3-e", PythonDeps(wheels=["a"]))
+
+    save_graph(graph, path)
+
+    saved = DependencyGraph.load(path)
+    assert sorted(saved.nodes) == ["a", "b2", "c", "d", "e"]
+    assert saved.package_order() == [
+        "python3-c",
+        "python3-a",
+        "python3-b",
+        "python3-d",
+        "python3-e",
+    ]
@@ -0,0 +1,42 @@
+import os
+import socket
+
+from wheel2deb.locking import WorkLock
+
+
+def test_work_lock__should_be_claimed_by_a_single_process(tmp_path):
+    path = tmp_path / "python3-foobar_0.1.0-1_all.lock"
+    first, second = WorkLock(path), WorkLock(path)
+
+    assert first.acquire() is True
+    assert second.acquire() is False
+    assert second.read_owner() == first.owner
+
+    first.release()
+    assert not path.exists()
+    assert second.acquire() is True
+    second.release()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_work_lock__should_take_over_lock_when_it_is_stale(tmp_path):
+    path = tmp_path / "python3-foobar_0.1.0-1_all.lock"
+    first = WorkLock(path, stale_timeout=60)
+    assert first.acquire() is True
+    first.release()
+
+    # not refreshed for too long
+    path.write_text("otherhost:1:token")
+    stat = path.stat()
+    os.utime(path, (stat.st_atime - 120, stat.st_mtime - 120))
+    assert first.acquire() is True
+    first.release()
+
+    # owner died on this host
+    path.write_text(f"{socket.gethostname()}:{2**22 + 1}:token")
+    assert first.acquire() is True
+    assert first.read_owner() == first.owner
+    first.release()
+
+    path.write_text("otherhost:1:token")
+    assert first.acquire() is False
@@ -0,0 +1,37 @@
+import queue
+from threading import Thread
+
+from wheel2deb import logger as logging
+
+logger = logging.getLogger(__name__)
+
+
+def test_get_warning_counter__should_count_warnings_logged_by_several_threads():
+    count = logging.get_warning_counter()
+
+    def warn():
+        for _ in range(100):
+            logger.warning("warning")
+
+    threads = [Thread(target=warn) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert logging.get_warning_counter() == count + 800
+
+
+def test_log_context__should_add_context_to_records():
+    records = queue.Queue()
+    handler = logging.ContextQueueHandler(records)
+    logger.addHandler(handler)
+    try:
+        with logging.log_context("foobar-0.1.0-py3-none-any.whl"):
+            logger.info("converting")
+        logger.info("done")
+    finally:
+        logger.removeHandler(handler)
+
+    assert records.get_nowait().context == "foobar-0.1.0-py3-none-any.whl"
+    assert records.get_nowait().context == ""
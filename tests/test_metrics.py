@@ -0,0 +1,32 @@
+import json
+
+from wheel2deb.metrics import Metrics
+
+
+def test_increment__should_update_item_and_total():
+    metrics = Metrics()
+    metrics.increment("bytes_copied", 10, "wheels", "foo.whl")
+    metrics.increment("bytes_copied", 5, "wheels", "bar.whl")
+    content = metrics.to_dict()
+    assert content["totals"]["bytes_copied"] == 15
+    assert content["wheels"]["foo.whl"]["bytes_copied"] == 10
+
+
+def test_save__should_write_prometheus_textfile_when_path_ends_with_prom(tmp_path):
+    metrics = Metrics()
+    metrics.set("build_success", 1, "packages", "python3-foo_1.0-1_all")
+    metrics.set("errors", 0)
+    metrics.save(tmp_path / "wheel2deb.prom")
+    lines = (tmp_path / "wheel2deb.prom").read_text().splitlines()
+    assert "wheel2deb_errors 0" in lines
+    assert 'wheel2deb_package_build_success{package="python3-foo_1.0-1_all"} 1' in lines
+
+
+def test_save__should_write_json_when_path_does_not_end_with_prom(tmp_path):
+    metrics = Metrics()
+    with metrics.timer("unpack", "wheels", "foo.whl"):
+        pass
+    metrics.save(tmp_path / "metrics.json")
+    content = json.loads((tmp_path / "metrics.json").read_text())
+    assert "unpack_seconds" in content["wheels"]["foo.whl"]
+    assert list(tmp_path.iterdir()) == [tmp_path / "metrics.json"]
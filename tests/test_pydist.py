@@ -1,4 +1,25 @@
-from wheel2deb.pydist import Entrypoint, parse_wheel
+import base64
+import hashlib
+import os
+import re
+import tracemalloc
+import weakref
+import zipfile
+
+import pytest
+from wheel.wheelfile import WheelError
+
+from wheel2deb import pydist
+from wheel2deb.metrics import metrics
+from wheel2deb.pydist import (
+    Entrypoint,
+    Record,
+    WheelInfo,
+    evaluate_marker,
+    normalize_name,
+    parse_requirement,
+    parse_wheel,
+)
 from wheel2deb.pyvers import Version
 
 
@@ -49,3 +70,200 @@ def test_entrypoints__should_return_list_of_entrypoints_when_wheel_has_entrypoin
 ):
     wheel = parse_wheel(wheel_path, tmp_path)
     assert wheel.entrypoints == [Entrypoint("wheel2deb", "wheel2deb.cli", "main")]
+
+
+def test_parse_requirement__should_return_the_same_object_when_called_twice():
+    requirement = parse_requirement('Typing-Extensions>=4; python_version>="3.8"')
+    assert requirement is parse_requirement('Typing-Extensions>=4; python_version>="3.8"')
+    assert normalize_name(requirement.name) == "typing-extensions"
+
+
+def test_parse_requirement__should_bound_its_cache_when_called_with_many_requirements():
+    for i in range(pydist.REQUIREMENT_CACHE_SIZE + 1):
+        parse_requirement(f"foo{i}")
+    assert parse_requirement.cache_info().currsize == pydist.REQUIREMENT_CACHE_SIZE
+
+
+def test_evaluate_marker__should_memoize_results_per_environment():
+    marker = parse_requirement('numpy>=1.21; python_version>="3.8"').marker
+    assert evaluate_marker(marker, {"python_version": "3.9", "extra": ""}) is True
+    assert evaluate_marker(marker, {"python_version": "3.7", "extra": ""}) is False
+    assert evaluate_marker(marker, {"extra": "", "python_version": "3.9"}) is True
+
+
+def test_record__should_keep_hashes_of_files():
+    record = Record.from_str(
+        "foobar/_foo.so,sha256=abc,42\n"
+        '"foobar/a,b.py",sha256=def,1\n'
+        "foobar-0.1.0.dist-info/RECORD,,\n"
+    )
+    assert record.libs == ("foobar/_foo.so",)
+    assert list(record.iter_entries()) == [
+        ("foobar/_foo.so", "sha256=abc", 42),
+        ("foobar/a,b.py", "sha256=def", 1),
+        ("foobar-0.1.0.dist-info/RECORD", "", -1),
+    ]
+    assert record.hash("foobar/a,b.py") == "sha256=def"
+    assert record.hash("foobar-0.1.0.dist-info/RECORD") is None
+    assert record.summary()["files"] == 3
+
+
+def test_version_supported__should_not_keep_wheels_alive_when_memoized():
+    wheel = WheelInfo("foo-0.1.0-py3-none-any.whl", requires_python=">=3.8")
+    assert wheel.version_supported(Version(3, 11)) is True
+    reference = weakref.ref(wheel)
+    del wheel
+    assert reference() is None
+
+
+def test_record__should_use_less_than_128_bytes_per_entry_when_parsed():
+    content = "\n".join(
+        f"numpy/core/tests/module_{d}/test_{f}.py,sha256={d:043d},1234"
+        for d in range(40)
+        for f in range(50)
+    )
+    tracemalloc.start()
+    try:
+        records = [Record.from_str(content) for _ in range(10)]
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    assert len(records[0].basenames) == 2000
+    assert size / 10 / 2000 < 128
+
+
+def test_wheel_info__should_use_less_than_1kib_when_read():
+    tracemalloc.start()
+    try:
+        infos = [
+            WheelInfo(
+                f"foo{i}-1.0-cp311-cp311-manylinux_2_17_x86_64.whl",
+                requires_dist=["numpy>=1.21", "six"],
+                classifiers=["Programming Language :: Python :: 3"] * 10,
+                tags=["cp311-cp311-manylinux_2_17_x86_64"],
+            )
+            for i in range(1000)
+        ]
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    assert len(infos) == 1000
+    assert size / 1000 < 1024
+
+
+def test_parse_wheel__should_extract_wheel_again_when_extracted_files_changed(
+    wheel_path, tmp_path, monkeypatch
+):
+    wheel = parse_wheel(wheel_path, tmp_path)
+    hits = metrics.to_dict()["totals"].get("extraction_cache_hits", 0)
+    assert parse_wheel(wheel_path, tmp_path).extract_path == wheel.extract_path
+    assert metrics.to_dict()["totals"]["extraction_cache_hits"] == hits + 1
+
+    # extractions are verified by each process
+    monkeypatch.setattr(pydist, "_verified_extractions", {})
+    (wheel.extract_path / "foobar/test.py").write_text("modified")
+    parse_wheel(wheel_path, tmp_path)
+    assert (wheel.extract_path / "foobar/test.py").read_text() == ""
+
+
+def test_parse_wheel__should_replace_cached_wheels_when_wheel_changed(
+    wheel_path, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(pydist, "_wheel_cache", {})
+    monkeypatch.setattr(pydist, "WHEEL_CACHE_SIZE", 1)
+    wheel = parse_wheel(wheel_path, tmp_path)
+    assert parse_wheel(wheel_path, tmp_path) is wheel
+
+    stat = wheel_path.stat()
+    os.utime(wheel_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert parse_wheel(wheel_path, tmp_path) is not wheel
+    assert len(pydist._wheel_cache) == 1
+
+    parse_wheel(wheel_path, tmp_path / "other")
+    assert [key[1] for key in pydist._wheel_cache] == [
+        tmp_path / "other" / "foobar-0.1.0-py3-none-any"
+    ]
+
+
+def test_parse_wheel__should_verify_files_once_when_parsed_for_several_targets(
+    wheel_path, tmp_path, monkeypatch
+):
+    parse_wheel(wheel_path, tmp_path)
+    calls = []
+    verify_record = pydist.verify_record
+    monkeypatch.setattr(
+        pydist, "verify_record", lambda *args: calls.append(args) or verify_record(*args)
+    )
+    parse_wheel(wheel_path, tmp_path)
+    parse_wheel(wheel_path, tmp_path)
+    assert calls == []
+
+    monkeypatch.setattr(pydist, "_verified_extractions", {})
+    parse_wheel(wheel_path, tmp_path)
+    parse_wheel(wheel_path, tmp_path)
+    assert len(calls) == 1
+
+
+def test_parse_wheel__should_not_verify_files_again_when_extractions_are_trusted(
+    wheel_path, tmp_path, monkeypatch
+):
+    wheel = parse_wheel(wheel_path, tmp_path)
+    (wheel.extract_path / "foobar/test.py").write_text("modified")
+    monkeypatch.setattr(pydist, "_trust_verified_extractions", True)
+    parse_wheel(wheel_path, tmp_path)
+    assert (wheel.extract_path / "foobar/test.py").read_text() == "modified"
+
+
+def rewrite_wheel(wheel_path, path, rewrite):
+    """Copy a wheel, rewrite(filename, content) returns the new content"""
+    with zipfile.ZipFile(wheel_path) as src, zipfile.ZipFile(path, "w") as dst:
+        for info in src.infolist():
+            dst.writestr(info, rewrite(info.filename, src.read(info)))
+    return path
+
+
+def test_parse_wheel__should_raise_when_a_file_does_not_match_its_hash(
+    wheel_path, tmp_path
+):
+    tampered_path = rewrite_wheel(
+        wheel_path,
+        tmp_path / wheel_path.name,
+        lambda name, content: b"tampered" if name == "foobar/test.py" else content,
+    )
+
+    with pytest.raises(WheelError, match="foobar/test.py"):
+        parse_wheel(tampered_path, tmp_path / "extract")
+    assert list((tmp_path / "extract").iterdir()) == []
+
+
+def test_parse_wheel__should_raise_when_record_uses_a_weak_hash(wheel_path, tmp_path):
+    md5 = base64.urlsafe_b64encode(hashlib.md5(b"").digest()).rstrip(b"=")
+
+    def rewrite(name, content):
+        if not name.endswith("RECORD"):
+            return content
+        return re.sub(
+            rb"(?m)^foobar/test.py,[^,]*,", b"foobar/test.py,md5=%s," % md5, content
+        )
+
+    weak_path = rewrite_wheel(wheel_path, tmp_path / wheel_path.name, rewrite)
+    with pytest.raises(WheelError, match="Weak hash algorithm"):
+        parse_wheel(weak_path, tmp_path / "extract")
+
+
+def test_parse_wheel__should_raise_when_a_file_is_missing_from_record(
+    wheel_path, tmp_path
+):
+    unlisted_path = tmp_path / wheel_path.name
+    rewrite_wheel(wheel_path, unlisted_path, lambda name, content: content)
+    with zipfile.ZipFile(unlisted_path, "a") as zf:
+        zf.writestr("foobar/unlisted.py", "")
+
+    with pytest.raises(WheelError, match="foobar/unlisted.py"):
+        parse_wheel(unlisted_path, tmp_path / "extract")
+
+
+def test_normalize_name__should_match_wheel_filenames_and_requirements():
+    wheel = WheelInfo("zope_interface-6.0-cp311-cp311-manylinux_2_17_x86_64.whl")
+    assert wheel.name == normalize_name("Zope.Interface") == "zope-interface"
+    assert wheel.name == normalize_name(parse_requirement("zope.interface>=5").name)
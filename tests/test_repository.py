@@ -0,0 +1,90 @@
+import gzip
+import os
+import subprocess
+import threading
+import time
+
+from wheel2deb import repository
+from wheel2deb.locking import WorkLock
+from wheel2deb.repository import parse_stanzas, update_repository
+
+DEBIAN_CONTROL = """\
+Package: python3-foobar
+Version: 0.1.0-1
+Architecture: all
+Maintainer: wheel2deb <wheel2deb@upciti.com>
+Description: foobar
+ This package was generated by wheel2deb
+"""
+
+
+def build_deb(tmp_path, name, control=DEBIAN_CONTROL):
+    (tmp_path / name / "DEBIAN").mkdir(parents=True, exist_ok=True)
+    (tmp_path / name / "DEBIAN" / "control").write_text(control)
+    deb_path = tmp_path / f"{name}.deb"
+    subprocess.run(
+        ["dpkg-deb", "--build", str(tmp_path / name), str(deb_path)], check=True
+    )
+    return deb_path
+
+
+def test_update_repository__should_index_packages_of_directory(tmp_path, sha256sum):
+    deb_path = build_deb(tmp_path, "python3-foobar_0.1.0-1_all")
+    update_repository(tmp_path)
+
+    content = (tmp_path / "Packages").read_text()
+    stanzas = parse_stanzas(content)
+    assert len(stanzas) == 1
+    assert stanzas[0]["Package"] == "python3-foobar"
+    assert stanzas[0]["Filename"] == "./python3-foobar_0.1.0-1_all.deb"
+    assert stanzas[0]["SHA256"] == sha256sum(deb_path)
+    assert stanzas[0]["Description"] == "foobar\n This package was generated by wheel2deb"
+    assert gzip.decompress((tmp_path / "Packages.gz").read_bytes()).decode() == content
+    assert "SHA256:" in (tmp_path / "Release").read_text()
+
+
+def test_update_repository__should_not_hash_packages_already_indexed(
+    tmp_path, monkeypatch
+):
+    build_deb(tmp_path, "python3-foobar_0.1.0-1_all")
+    update_repository(tmp_path)
+
+    def index_package(deb_path):
+        raise AssertionError(f"{deb_path} indexed twice")
+
+    monkeypatch.setattr(repository, "index_package", index_package)
+    update_repository(tmp_path)
+    assert len(parse_stanzas((tmp_path / "Packages").read_text())) == 1
+
+
+def test_update_repository__should_hash_packages_rebuilt_with_the_same_size(tmp_path):
+    deb_path = build_deb(tmp_path, "python3-foobar_0.1.0-1_all")
+    os.utime(deb_path, (time.time() - 60,) * 2)
+    update_repository(tmp_path)
+    size = deb_path.stat().st_size
+
+    build_deb(
+        tmp_path, "python3-foobar_0.1.0-1_all", DEBIAN_CONTROL.replace("1\n", "2\n")
+    )
+    assert deb_path.stat().st_size == size
+    update_repository(tmp_path)
+    assert parse_stanzas((tmp_path / "Packages").read_text())[0]["Version"] == "0.1.0-2"
+
+
+def test_update_repository__should_wait_when_another_process_updates_the_index(
+    tmp_path, monkeypatch
+):
+    monkeypatch.setattr(repository, "LOCK_RETRY_INTERVAL", 0.01)
+    build_deb(tmp_path, "python3-foobar_0.1.0-1_all")
+    lock = WorkLock(tmp_path / ".Packages.lock")
+    assert lock.acquire()
+
+    thread = threading.Thread(target=update_repository, args=(tmp_path,))
+    thread.start()
+    time.sleep(0.2)
+    assert not (tmp_path / "Packages").exists()
+
+    lock.release()
+    thread.join(5)
+    assert len(parse_stanzas((tmp_path / "Packages").read_text())) == 1
+    assert not list(tmp_path.glob(".*.tmp"))
@@ -0,0 +1,25 @@
+import stat
+from threading import Thread
+
+from wheel2deb.metrics import metrics
+from wheel2deb.server import JobServer, submit
+
+
+def test_submit__should_return_job_summary_when_server_is_listening(tmp_path):
+    socket_path = tmp_path / "wheel2deb.sock"
+    metrics.increment("builds_failed", 10)
+    with JobServer(socket_path) as server:
+        assert stat.S_IMODE(socket_path.stat().st_mode) == 0o600
+        thread = Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            args = {"output_directory": str(tmp_path / "output")}
+            # the output directory does not exist, build reports one error
+            result = submit(socket_path, "build", args)
+        finally:
+            server.shutdown()
+            thread.join()
+    assert result["errors"] == 1
+    assert result["warnings"] == 0
+    # metrics of a job do not include earlier jobs
+    assert "builds_failed" not in metrics.to_dict()["totals"]
@@ -0,0 +1,113 @@
+import base64
+import hashlib
+import shutil
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from wheel2deb.build import find_source_packages
+from wheel2deb.context import Settings
+from wheel2deb.debian import convert_wheels
+from wheel2deb.graph import GRAPH_FILENAME
+from wheel2deb.sharding import (
+    parse_shard,
+    read_wheel_descriptor,
+    shard_source_packages,
+    shard_wheels,
+    split_shard,
+)
+
+WHEELS = [Path(f"project{i}-1.0-py3-none-any.whl") for i in range(20)] + [
+    Path("Project0-2.0-py3-none-any.whl")
+]
+
+
+def test_parse_shard__should_return_none_when_shard_is_invalid():
+    assert parse_shard("2/3") == (2, 3)
+    assert parse_shard("0/3") is None
+    assert parse_shard("4/3") is None
+    assert parse_shard("foo") is None
+
+
+def test_shard_wheels__should_partition_wheels_by_project():
+    shards = [shard_wheels(WHEELS, (k, 3))[0] for k in (1, 2, 3)]
+    assert sorted(p for shard in shards for p in shard) == sorted(WHEELS)
+    assert all(shards)
+    # versions of a project land in the same shard
+    assert any(WHEELS[0] in s and WHEELS[-1] in s for s in shards)
+    selected, others = shard_wheels(WHEELS, (1, 3))
+    assert set(others) == set(WHEELS) - set(selected)
+
+
+def test_split_shard__should_balance_shards_by_size_when_size_is_given():
+    sizes = {p: 10 if p.name.startswith("project1-") else 1 for p in WHEELS}
+    shards = [
+        split_shard(
+            WHEELS, (k, 2), lambda p: p.name.split("-")[0], lambda p: (p, sizes[p])
+        )[0]
+        for k in (1, 2)
+    ]
+    assert [sum(sizes[p] for p in shard) for shard in shards] == [15, 15]
+
+
+def make_wheel(directory: Path, name: str, size: int) -> Path:
+    metadata = f"Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n"
+    files = {
+        f"{name}/__init__.py": b"#" * size,
+        f"{name}-1.0.dist-info/METADATA": metadata.encode(),
+        f"{name}-1.0.dist-info/WHEEL": b"Wheel-Version: 1.0\nTag: py3-none-any\n",
+    }
+    record = ""
+    for filename, content in files.items():
+        digest = base64.urlsafe_b64encode(hashlib.sha256(content).digest())
+        record += f"{filename},sha256={digest.decode().rstrip('=')},{len(content)}\n"
+    files[f"{name}-1.0.dist-info/RECORD"] = f"{record}{name}-1.0.dist-info/RECORD,,\n"
+
+    path = directory / f"{name}-1.0-py3-none-any.whl"
+    with zipfile.ZipFile(path, "w") as zf:
+        for filename, content in files.items():
+            zf.writestr(filename, content)
+    return path
+
+
+@pytest.mark.parametrize("by_size", [False, True])
+def test_shard_source_packages__should_select_the_wheels_of_the_convert_shard(
+    tmp_path, by_size
+):
+    wheels = [make_wheel(tmp_path, f"Project_{i}", i * 1000) for i in range(8)]
+    settings = Settings()
+    # debian names do not follow project names
+    settings.default_ctx.map = {"project-3": "renamed", "project-5": "a"}
+    convert_wheels(settings, tmp_path / "output", wheels)
+
+    source_packages = find_source_packages(tmp_path / "output")
+    for k in (1, 2, 3):
+        converted = shard_wheels(wheels, (k, 3), by_size)[0]
+        built = shard_source_packages(source_packages, (k, 3), by_size)
+        assert sorted(read_wheel_descriptor(p)["wheel"] for p in built) == sorted(
+            p.name for p in converted
+        )
+
+
+def test_shard_source_packages__should_balance_wheels_once_when_targets_share_them(
+    tmp_path,
+):
+    sizes = [9000, 8000, 5000, 4000, 4000, 3000, 2000, 1000]
+    wheels = [make_wheel(tmp_path, f"project{i}", size) for i, size in enumerate(sizes)]
+    convert_wheels(Settings(), tmp_path / "output", wheels)
+    # a second target only supports some of the wheels
+    target = tmp_path / "output" / "target"
+    target.mkdir()
+    (target / GRAPH_FILENAME).write_text('{"wheels": {}}')
+    for path in find_source_packages(tmp_path / "output"):
+        if read_wheel_descriptor(path)["wheel"].startswith(("project0", "project7")):
+            shutil.copytree(path, target / path.name)
+
+    source_packages = find_source_packages(tmp_path / "output")
+    for k in (1, 2, 3):
+        converted = shard_wheels(wheels, (k, 3), True)[0]
+        built = shard_source_packages(source_packages, (k, 3), True)
+        assert {read_wheel_descriptor(p)["wheel"] for p in built} == {
+            p.name for p in converted
+        }
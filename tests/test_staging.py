@@ -0,0 +1,101 @@
+from wheel2deb.graph import GRAPH_FILENAME, DependencyGraph, Node, PythonDeps
+from wheel2deb.staging import Staging
+
+PACKAGE = "python3-foobar_0.1.0-1_all"
+
+
+def make_build_results(directory):
+    (directory / PACKAGE / "debian").mkdir(parents=True)
+    (directory / PACKAGE / "debian" / "control").write_text("Source: foobar\n")
+    (directory / f"{PACKAGE}.deb").write_text("deb")
+    (directory / "python3-foobar_0.1.0-1_amd64.changes").write_text("changes")
+    (directory / "python3-foobar-extra_0.1.0-1_all.deb").write_text("other")
+
+
+def test_publish__should_move_build_results_to_output_directory(tmp_path):
+    staging = Staging.create(tmp_path / "work", tmp_path / "output")
+    make_build_results(staging.work_directory)
+
+    published = staging.publish(staging.work_directory / PACKAGE)
+
+    assert [p.name for p in published] == [
+        "python3-foobar_0.1.0-1_amd64.changes",
+        f"{PACKAGE}.deb",
+    ]
+    assert (tmp_path / "output" / f"{PACKAGE}.deb").read_text() == "deb"
+    assert not (tmp_path / "output" / PACKAGE).exists()
+    assert (staging.work_directory / PACKAGE).exists()
+    staging.cleanup()
+    assert list((tmp_path / "work").iterdir()) == [staging.work_directory]
+
+
+def test_create__should_reuse_work_directory_when_output_directory_is_the_same(
+    tmp_path,
+):
+    staging = Staging.create(tmp_path / "work", tmp_path / "output")
+    (staging.work_directory / "foo.sync").write_text("{}")
+    staging.cleanup()
+
+    staging = Staging.create(tmp_path / "work", tmp_path / "output")
+    assert (staging.work_directory / "foo.sync").read_text() == "{}"
+    other = Staging.create(tmp_path / "work", tmp_path / "other")
+    assert other.work_directory != staging.work_directory
+    other.cleanup()
+    staging.cleanup()
+
+
+def test_create__should_use_temporary_directory_when_work_directory_is_in_use(
+    tmp_path,
+):
+    staging = Staging.create(tmp_path / "work", tmp_path / "output")
+    concurrent = Staging.create(tmp_path / "work", tmp_path / "output")
+
+    assert concurrent.work_directory != staging.work_directory
+    concurrent.cleanup()
+    assert not concurrent.work_directory.exists()
+    staging.cleanup()
+    assert staging.work_directory.exists()
+
+
+def test_publish__should_replace_source_package_when_publish_sources_is_set(tmp_path):
+    (tmp_path / "output" / PACKAGE).mkdir(parents=True)
+    (tmp_path / "output" / PACKAGE / "stale").touch()
+    staging = Staging.create(tmp_path / "work", tmp_path / "output", True)
+    make_build_results(staging.work_directory)
+
+    staging.publish(staging.work_directory / PACKAGE)
+
+    assert [p.name for p in (tmp_path / "output" / PACKAGE).iterdir()] == ["debian"]
+    assert (staging.work_directory / PACKAGE / "debian").is_dir()
+    staging.cleanup()
+
+
+def test_stage__should_copy_source_package_to_work_directory(tmp_path):
+    make_build_results(tmp_path)
+    staging = Staging.create(tmp_path / "work", tmp_path)
+
+    path = staging.stage(tmp_path / PACKAGE)
+
+    assert path == staging.work_directory / PACKAGE
+    assert (path / "debian" / "control").is_file()
+    assert staging.output_path(path) == tmp_path / PACKAGE
+    staging.cleanup()
+    assert not path.exists()
+
+
+def test_publish_graphs__should_merge_graphs_when_output_directory_has_one(tmp_path):
+    def make_graph(name):
+        graph = DependencyGraph()
+        graph.nodes[name] = Node(name, f"python3-{name}", PythonDeps())
+        return graph
+
+    (tmp_path / "output").mkdir()
+    make_graph("foo").save(tmp_path / "output" / GRAPH_FILENAME)
+    staging = Staging.create(tmp_path / "work", tmp_path / "output")
+    make_graph("bar").save(staging.work_directory / GRAPH_FILENAME)
+
+    staging.publish_graphs()
+
+    graph = DependencyGraph.load(tmp_path / "output" / GRAPH_FILENAME)
+    assert sorted(graph.nodes) == ["bar", "foo"]
+    staging.cleanup()
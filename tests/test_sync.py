@@ -0,0 +1,74 @@
+from wheel2deb.pydist import Record
+from wheel2deb.sync import copy_file, sync_record
+
+RECORD = """\
+foo/__init__.py,sha256=abc,3
+foo/bar/baz.py,sha256=def,4
+foo-1.0.dist-info/RECORD,,
+"""
+
+
+def make_wheel(path, record):
+    for name, content in (
+        ("foo/__init__.py", "foo"),
+        ("foo/bar/baz.py", "bazz"),
+        ("foo-1.0.dist-info/RECORD", record),
+    ):
+        (path / name).parent.mkdir(parents=True, exist_ok=True)
+        (path / name).write_text(content)
+    return Record.from_str(record)
+
+
+def test_sync_record__should_only_copy_files_whose_entry_changed(tmp_path):
+    source, destination = tmp_path / "wheel", tmp_path / "src"
+    manifest_path = tmp_path / "src.sync"
+    record = make_wheel(source, RECORD)
+
+    copied, deleted = sync_record(source, destination, record, manifest_path)
+    assert sorted(copied) == [
+        "foo-1.0.dist-info/RECORD",
+        "foo/__init__.py",
+        "foo/bar/baz.py",
+    ]
+    assert (destination / "foo/bar/baz.py").read_text() == "bazz"
+    assert sync_record(source, destination, record, manifest_path) == ([], [])
+
+    record = make_wheel(source, RECORD.replace("sha256=abc", "sha256=xyz"))
+    copied, _ = sync_record(source, destination, record, manifest_path)
+    assert sorted(copied) == ["foo-1.0.dist-info/RECORD", "foo/__init__.py"]
+
+
+def test_sync_record__should_delete_files_removed_from_record(tmp_path):
+    source, destination = tmp_path / "wheel", tmp_path / "src"
+    manifest_path = tmp_path / "src.sync"
+    sync_record(source, destination, make_wheel(source, RECORD), manifest_path)
+
+    record = make_wheel(source, RECORD.replace("foo/bar/baz.py,sha256=def,4\n", ""))
+    _, deleted = sync_record(source, destination, record, manifest_path)
+    assert deleted == ["foo/bar/baz.py"]
+    assert not (destination / "foo/bar").exists()
+    assert (destination / "foo/__init__.py").is_file()
+
+
+def test_copy_file__should_keep_permissions(tmp_path):
+    source = tmp_path / "script"
+    source.write_text("#!/bin/sh\n")
+    source.chmod(0o755)
+    copy_file(source, tmp_path / "copy")
+    assert (tmp_path / "copy").read_text() == "#!/bin/sh\n"
+    assert (tmp_path / "copy").stat().st_mode & 0o777 == 0o755
+
+
+def test_sync_record__should_delete_files_missing_from_record_when_no_manifest(
+    tmp_path,
+):
+    source, destination = tmp_path / "wheel", tmp_path / "src"
+    record = make_wheel(source, RECORD)
+    (destination / "foo/bar").mkdir(parents=True)
+    (destination / "foo/bar/baz.py").write_text("bazz")
+    (destination / "foo/bar/removed.py").write_text("")
+
+    _, deleted = sync_record(source, destination, record, tmp_path / "src.sync")
+    assert deleted == ["foo/bar/removed.py"]
+    assert not (destination / "foo/bar/removed.py").exists()
+    assert (destination / "foo/bar/baz.py").exists()
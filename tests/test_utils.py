@@ -0,0 +1,90 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from wheel2deb import logger as logging
+from wheel2deb.utils import (
+    CommandRunner,
+    parse_tool_limits,
+    shell,
+    write_atomic,
+    write_if_changed,
+)
+
+
+def test_shell__should_return_output_and_return_code_when_command_exits():
+    assert shell(["sh", "-c", "echo foo; echo bar >&2; exit 3"]) == ("foo\nbar\n", 3)
+
+
+def test_shell__should_stream_output_in_the_caller_context():
+    lines = []
+
+    def output(line):
+        lines.append((logging._context.get(), line))
+
+    with logging.log_context("foobar"):
+        shell(["printf", "a\\nb\\n"], output=output)
+    assert lines == [("foobar", "a"), ("foobar", "b")]
+
+
+def test_command_runner__should_limit_concurrent_commands_per_tool():
+    runner = CommandRunner({"sleep": 1})
+    start_time = time.monotonic()
+    with ThreadPoolExecutor(3) as executor:
+        futures = [executor.submit(runner.submit, ["sleep", "0.2"]) for _ in range(3)]
+        results = [f.result().result() for f in futures]
+    assert results == [("", 0)] * 3
+    assert time.monotonic() - start_time >= 0.6
+
+
+def test_parse_tool_limits__should_ignore_invalid_limits():
+    assert parse_tool_limits("apt-file=1, dpkg-buildpackage=4,foo=0,bar") == {
+        "apt-file": 1,
+        "dpkg-buildpackage": 4,
+    }
+
+
+def test_write_if_changed__should_keep_file_when_content_did_not_change(tmp_path):
+    path = tmp_path / "rules"
+    assert write_if_changed(path, "foo\n") is True
+    path.chmod(0o755)
+    os.utime(path, ns=(0, 0))
+
+    assert write_if_changed(path, "foo\n") is False
+    assert path.stat().st_mtime_ns == 0
+    assert write_if_changed(path, b"bar\n") is True
+    assert path.read_text() == "bar\n"
+    assert path.stat().st_mode & 0o777 == 0o755
+
+
+def test_shell__should_return_output_when_lines_are_longer_than_64_kib():
+    lines = []
+    command = ["python3", "-c", "print('x' * 70000); print('y', end='')"]
+    output, returncode = shell(command, output=lines.append)
+    assert returncode == 0
+    assert output == "x" * 70000 + "\ny"
+    assert lines == ["x" * 70000, "y"]
+
+
+def test_shell__should_kill_command_when_output_callback_fails():
+    def output(line):
+        raise RuntimeError(line)
+
+    start_time = time.monotonic()
+    with pytest.raises(RuntimeError):
+        shell(["sh", "-c", "echo foo; exec sleep 5"], output=output)
+    assert time.monotonic() - start_time < 5
+
+
+def test_write_atomic__should_keep_permissions_when_file_is_replaced(tmp_path):
+    path = tmp_path / "Packages"
+    path.write_text("old")
+    path.chmod(0o640)
+
+    write_atomic(path, b"new")
+
+    assert path.read_bytes() == b"new"
+    assert path.stat().st_mode & 0o777 == 0o640
+    assert list(tmp_path.iterdir()) == [path]
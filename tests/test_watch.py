@@ -0,0 +1,47 @@
+import time
+
+import pytest
+
+from wheel2deb.watch import Notifier, WheelTracker
+
+
+def test_update__should_return_wheel_once_it_is_stable(tmp_path, wheel_path):
+    tracker = WheelTracker(debounce=0)
+    assert tracker.update([wheel_path]) == []
+    assert tracker.update([wheel_path]) == [wheel_path]
+    assert tracker.update([wheel_path]) == []
+
+
+def test_update__should_ignore_partially_written_wheels(tmp_path):
+    path = tmp_path / "foobar-0.1.0-py3-none-any.whl"
+    path.write_bytes(b"PK\x03\x04")
+    tracker = WheelTracker(debounce=0)
+    tracker.update([path])
+    assert tracker.update([path]) == []
+
+
+def test_update__should_forget_wheels_when_they_are_removed(tmp_path, wheel_path):
+    tracker = WheelTracker(debounce=0)
+    tracker.update([wheel_path])
+    tracker.update([wheel_path])
+    assert list(tracker.known) == [wheel_path]
+
+    assert tracker.update([]) == []
+    assert tracker.known == {} and tracker.pending == {}
+
+
+def test_wait__should_wake_up_when_a_file_is_written_in_a_subdirectory(tmp_path):
+    (tmp_path / "sub").mkdir()
+    with Notifier([tmp_path], recursive=True) as notifier:
+        if notifier.fd is None:
+            pytest.skip("inotify unavailable")
+        (tmp_path / "sub" / "new").mkdir()
+        notifier.watch([tmp_path])
+        assert tmp_path / "sub" / "new" in notifier.watched
+        # drain the event of the creation of the subdirectory
+        notifier.wait(0)
+
+        (tmp_path / "sub" / "new" / "foo.whl").write_bytes(b"")
+        start = time.monotonic()
+        notifier.wait(10)
+        assert time.monotonic() - start < 5
@@ -1,5 +1,7 @@
 import os
 import shutil
+import subprocess
+import sys
 
 import pytest
 from typer.testing import CliRunner
@@ -7,6 +9,9 @@ from typer.testing import CliRunner
 from wheel2deb.cli import app
 from wheel2deb.pydist import EXTRACT_PATH
 
+# modules only needed to convert wheels
+CONVERSION_STACK = ("jinja2", "pkginfo", "wheel", "packaging", "yaml")
+
 valid_configuration = """\
 .+:
   map:
@@ -80,3 +85,22 @@ def test_default__should_convert_wheel_and_build_debian_package_when_conf_is_val
     result = call_wheel2deb("-x", wheel_path.parent, conf=valid_configuration)
     assert result.exit_code == 0
     assert (tmp_path / "output/python3-foobar_0.1.0-1~w2d0_all.deb").is_file()
+
+
+@pytest.mark.parametrize("args", [["version"], ["build", "-o", "/nonexistent"]])
+def test_cli__should_not_import_conversion_stack_when_command_does_not_convert_wheels(
+    args,
+):
+    code = (
+        "import sys\n"
+        "from wheel2deb.cli import app\n"
+        "try:\n"
+        f"    app({args!r})\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"print(','.join(m for m in {CONVERSION_STACK!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.splitlines()[-1] == ""